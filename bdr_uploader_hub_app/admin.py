@@ -1,12 +1,23 @@
 import logging
+from pathlib import Path
 
-from django.contrib import admin
+from django.conf import settings
+from django.contrib import admin, messages
+from django.core.exceptions import PermissionDenied
+from django.http import Http404, HttpResponse, StreamingHttpResponse
+from django.template.response import TemplateResponse
+from django.urls import path, reverse
+from django.utils.html import format_html
 
+from .forms.manifest_import_form import ManifestImportForm
+from .lib import derivative_maker, fixity_checker, ingest_preview, manifest_importer, metrics
 from .lib.ingester_handler import Ingester
-from .models import AppConfig, Submission, UserProfile
+from .models import AppConfig, Notification, Submission, SubmissionFile, UserProfile
 
 log = logging.getLogger(__name__)
 
+DERIVATIVE_TEXT_DISPLAY_CHARS: int = 3000
+
 
 ## for django-auth --------------------------------------------------
 class UserProfileAdmin(admin.ModelAdmin):
@@ -19,14 +30,42 @@ class UserProfileAdmin(admin.ModelAdmin):
 ## other models -----------------------------------------------------
 
 
+class SubmissionFileInline(admin.TabularInline):
+    model = SubmissionFile
+    fields = ('position', 'original_file_name', 'staged_file_name', 'checksum_type', 'checksum', 'size')
+    readonly_fields = fields
+    extra = 0
+    can_delete = False  # staged files are shared; see lib/staging_store.py
+
+
 class SubmissionAdmin(admin.ModelAdmin):
     list_display = ('short_id', 'title', 'short_app_slug', 'status', 'bdr_pid', 'updated_at')
-    list_filter = ('app', 'status', 'created_at', 'updated_at')
+    list_filter = ('app', 'status', 'fixity_status', 'derivatives_status', 'created_at', 'updated_at')
     search_fields = ('title', 'bdr_pid', 'app', 'created_at', 'updated_at')
     ordering = ('-created_at',)
-    readonly_fields = ('id', 'created_at', 'updated_at', 'staff_ingester', 'ingest_error_message', 'bdr_pid')
+    readonly_fields = (
+        'id',
+        'created_at',
+        'updated_at',
+        'staff_ingester',
+        'ingest_error_message',
+        'bdr_pid',
+        'fixity_status',
+        'fixity_checked_at',
+        'scanned_at',
+        'scan_message',
+        'scan_attempts',
+        'scan_next_at',
+        'derivatives_status',
+        'derivatives_made_at',
+        'derivative_preview',
+        'derivative_text',
+    )
 
-    actions = ['ingest']
+    inlines = [SubmissionFileInline]
+
+    actions = ['ingest', 'preview_ingest', 'verify_fixity', 'rescan', 'remake_derivatives']
+    change_list_template = 'admin/bdr_uploader_hub_app/submission/change_list.html'  # adds `Import manifest` link
 
     ## id field -------------------------------------------------====
     def short_id(self, obj):
@@ -72,7 +111,169 @@ class SubmissionAdmin(admin.ModelAdmin):
 
     ingest.short_description = 'Ingest selected submissions'
 
+    ## ingest dry-run action ----------------------------------------
+    def preview_ingest(self, request, queryset):
+        """
+        Renders and validates the BDR-API payloads for the selected submissions, without posting;
+        streams a plain-text report, one line per submission, as results complete.
+        """
+        results = ingest_preview.preview_submissions(queryset)
+        return StreamingHttpResponse(ingest_preview.stream_report(results), content_type='text/plain; charset=utf-8')
+
+    preview_ingest.short_description = 'Preview ingest of selected submissions (dry run)'
+
+    ## fixity action ------------------------------------------------
+    def verify_fixity(self, request, queryset):
+        """
+        Re-hashes the selected submissions' staged files, in-process, and records the results.
+        For large batches, use `manage.py verify_fixity` instead.
+        """
+        try:
+            summary: dict[str, int] = fixity_checker.verify_submissions(queryset, workers=0, max_mb_per_second=0)
+        except fixity_checker.FixityUnavailable as e:
+            messages.error(request, str(e))
+            return
+        summary_text: str = ', '.join(f'{key}: {val}' for key, val in sorted(summary.items()))
+        if set(summary) - {'ok'}:
+            messages.warning(request, f'Fixity problems found; {summary_text}')
+        else:
+            messages.success(request, f'Fixity verified; {summary_text}')
+
+    verify_fixity.short_description = 'Verify fixity of selected submissions'
+
+    ## malware-scan action ------------------------------------------
+    def rescan(self, request, queryset):
+        """
+        Sends the selected quarantined or scan-failed submissions back to `scanning`, with a fresh set of attempts;
+        eg after a false positive, once the scanner's signatures are updated, or once the scanner's fixed.
+        See lib/malware_scanner.py.
+        """
+        count: int = 0
+        for status in ('quarantined', 'scan_failed'):
+            updated: int = queryset.filter(status=status).update(status='scanning', scan_attempts=0, scan_next_at=None)
+            metrics.record_status_transition(status, 'scanning', count=updated)
+            count += updated
+        messages.success(request, f'Re-queued {count} quarantined or scan-failed submission(s) for scanning.')
+
+    rescan.short_description = 'Re-scan selected quarantined or scan-failed submissions'
+
+    ## derivatives --------------------------------------------------
+    def derivative_preview(self, obj):
+        if obj.derivatives_status != 'ok':
+            return '-'
+        url: str = reverse('admin:bdr_uploader_hub_app_submission_derivative_preview', args=[obj.pk])
+        return format_html('<img src="{}" alt="first-page preview" style="max-width: 300px; border: 1px solid #ccc;">', url)
+
+    derivative_preview.short_description = 'Preview'
+
+    def derivative_text(self, obj):
+        text: str | None = derivative_maker.read_text(obj, DERIVATIVE_TEXT_DISPLAY_CHARS)
+        if not text:
+            return '-'
+        return format_html('<pre style="white-space: pre-wrap; max-height: 20em; overflow: auto;">{}</pre>', text)
+
+    derivative_text.short_description = 'Extracted text (start)'
+
+    def remake_derivatives(self, request, queryset):
+        """
+        Re-queues the selected submissions for `manage.py make_derivatives`; eg after a failure, or a tool upgrade.
+        """
+        count: int = derivative_maker.requeue(list(queryset.only('id', 'staged_file_name')))
+        messages.success(request, f'Re-queued derivatives for {count} submission(s).')
+
+    remake_derivatives.short_description = 'Re-make derivatives of selected submissions'
+
+    def derivative_preview_view(self, request, submission_id):
+        """
+        Serves the submission's first-page preview-image, from the staging-backend.
+        """
+        submission = self.get_object(request, str(submission_id))
+        if submission is None:
+            raise Http404
+        if not self.has_view_permission(request, submission):
+            raise PermissionDenied
+        data: bytes | None = derivative_maker.read_preview(submission)
+        if data is None:
+            raise Http404
+        return HttpResponse(data, content_type='image/png')
+
+    ## manifest-import view -----------------------------------------
+    def get_urls(self):
+        custom_urls = [
+            path(
+                'import_manifest/',
+                self.admin_site.admin_view(self.import_manifest_view),
+                name='bdr_uploader_hub_app_submission_import_manifest',
+            ),
+            path(
+                '<uuid:submission_id>/derivative_preview.png',
+                self.admin_site.admin_view(self.derivative_preview_view),
+                name='bdr_uploader_hub_app_submission_derivative_preview',
+            ),
+        ]
+        return custom_urls + super().get_urls()
+
+    def import_manifest_view(self, request):
+        """
+        Bulk-creates submissions from an uploaded manifest and a server-side files-directory.
+        The files-directory must be inside `MANIFEST_IMPORT_ROOT`.
+        See lib/manifest_importer.py.
+        """
+        log.debug('import_manifest_view called')
+        if not self.has_add_permission(request):
+            raise PermissionDenied
+        results: list = []
+        summary: dict = {}
+        report_csv: str = ''
+        if request.method == 'POST':
+            form = ManifestImportForm(request.POST, request.FILES)
+            if form.is_valid():
+                import_root: Path = Path(settings.MANIFEST_IMPORT_ROOT).resolve()
+                files_dir: Path = (import_root / form.cleaned_data['files_dir']).resolve()
+                if not settings.MANIFEST_IMPORT_ROOT or not files_dir.is_relative_to(import_root):
+                    form.add_error('files_dir', 'Files directory must be inside MANIFEST_IMPORT_ROOT.')
+                elif not files_dir.is_dir():
+                    form.add_error('files_dir', 'Files directory not found.')
+                else:
+                    manifest_file = form.cleaned_data['manifest']
+                    try:
+                        rows = manifest_importer.read_manifest(
+                            manifest_file.read().decode('utf-8-sig'),
+                            manifest_importer.guess_manifest_format(manifest_file.name),
+                        )
+                    except Exception as e:
+                        log.exception('problem reading manifest')
+                        form.add_error('manifest', f'Could not read manifest: {e}')
+                        rows = None
+                    if rows is not None:
+                        results = manifest_importer.import_manifest(
+                            form.cleaned_data['app'], rows, files_dir, dry_run=form.cleaned_data['dry_run']
+                        )
+                        summary = manifest_importer.summarize(results)
+                        report_csv = manifest_importer.make_report_csv(results)
+        else:
+            form = ManifestImportForm()
+        context = {
+            **self.admin_site.each_context(request),
+            'title': 'Import manifest',
+            'opts': self.model._meta,
+            'form': form,
+            'results': results,
+            'summary': summary,
+            'report_csv': report_csv,
+        }
+        return TemplateResponse(request, 'admin/bdr_uploader_hub_app/submission/import_manifest.html', context)
+
+
+class NotificationAdmin(admin.ModelAdmin):
+    list_display = ('kind', 'recipient', 'app', 'status', 'attempts', 'created_at', 'sent_at')
+    list_filter = ('kind', 'status', 'app')
+    search_fields = ('recipient', 'subject')
+    ordering = ('-created_at',)
+    readonly_fields = ('id', 'created_at', 'sent_at', 'attempts', 'last_error')
+
 
 admin.site.register(UserProfile, UserProfileAdmin)
 admin.site.register(AppConfig)  # using default admin-view
 admin.site.register(Submission, SubmissionAdmin)
+admin.site.register(Notification, NotificationAdmin)
@@ -0,0 +1,21 @@
+import logging
+
+from django import forms
+
+from bdr_uploader_hub_app.models import AppConfig
+
+log = logging.getLogger(__name__)
+
+
+class ManifestImportForm(forms.Form):
+    """
+    Used by the SubmissionAdmin `import_manifest` view.
+    """
+
+    app = forms.ModelChoiceField(queryset=AppConfig.objects.order_by('name'), label='Target app')
+    manifest = forms.FileField(label='Manifest', help_text='.csv (header-row) or .json (list of objects)')
+    files_dir = forms.CharField(
+        label='Files directory',
+        help_text="relative to the server's MANIFEST_IMPORT_ROOT; the manifest `file` column is relative to this",
+    )
+    dry_run = forms.BooleanField(required=False, label='Dry run', help_text='validate only')
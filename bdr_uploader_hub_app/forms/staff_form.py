@@ -4,6 +4,7 @@ from django import forms
 from django.conf import settings
 
 from bdr_uploader_hub_app.forms.staff_form_validation import validate_staff_form
+from bdr_uploader_hub_app.lib.upload_policy import FILE_TYPE_CHOICES
 
 log = logging.getLogger(__name__)
 
@@ -113,6 +114,17 @@ class StaffForm(forms.Form):
 
     invite_supplementary_files = forms.BooleanField(required=False, label='Invite supplementary files')
 
+    ## Form section - Upload policy ---------------------------------
+    max_upload_mb = forms.IntegerField(
+        required=False, min_value=1, label='Max upload size (MB)', help_text='blank for no limit'
+    )
+    allowed_file_types = forms.MultipleChoiceField(
+        required=False,
+        label='Allowed file types',
+        choices=FILE_TYPE_CHOICES,
+        help_text="none selected for any type; checked against the file's content, too",
+    )
+
     def clean(self):
         ## delegate all validation to bdr_uploader_hub_app/forms/staff_form_validation.py
         log.debug('delegating validation to staff_form_validation')
@@ -8,6 +8,20 @@ from django.core.validators import validate_email
 
 log = logging.getLogger(__name__)
 
+_http_client: httpx.Client | None = None
+
+
+def get_http_client() -> httpx.Client:
+    """
+    Returns a process-wide http-client, so collection-lookups re-use keep-alive connections
+    (and one TLS-context) instead of setting up a new connection per form-save. httpx.Client is thread-safe.
+    Called by validate_staff_form().
+    """
+    global _http_client
+    if _http_client is None:
+        _http_client = httpx.Client()
+    return _http_client
+
 
 def _validate_visibility(form, cleaned_data):
     """
@@ -64,7 +78,7 @@ def validate_staff_form(form, cleaned_data):
             log.debug(f'api_url, ``{api_url}``')
             response: httpx.Response | None = None
             try:  # handes, for example network being down
-                response = httpx.get(api_url)
+                response = get_http_client().get(api_url)
                 log.debug(f'Making BDR API call: status code, ``{response.status_code}``')
             except Exception as e:
                 log.exception(f'Error making BDR API call: {e}')
@@ -4,9 +4,35 @@ import pprint
 from django import forms
 from django.conf import settings
 
+from bdr_uploader_hub_app.lib.upload_policy import MAX_SUPPLEMENTARY_FILES, UploadPolicy
+
 log = logging.getLogger(__name__)
 
 
+class MultipleFileInput(forms.ClearableFileInput):
+    allow_multiple_selected = True
+
+
+class MultipleFileField(forms.FileField):
+    """
+    A file-field accepting several files; cleans to a list, empty when none were uploaded.
+    """
+
+    def __init__(self, *args, **kwargs):
+        kwargs.setdefault('widget', MultipleFileInput())
+        super().__init__(*args, **kwargs)
+
+    def clean(self, data, initial=None) -> list:
+        single_file_clean = super().clean
+        if isinstance(data, (list, tuple)):
+            files: list = [single_file_clean(item, initial) for item in data]
+        else:
+            files = [single_file_clean(data, initial)] if data else []
+        if len(files) > MAX_SUPPLEMENTARY_FILES:
+            raise forms.ValidationError(f'At most {MAX_SUPPLEMENTARY_FILES} supplementary files, please.')
+        return files
+
+
 def make_student_form_class(config_data: dict) -> type[forms.Form]:
     """
     Dynamically creates and returns a StudentUploadForm class based on the staff-config form data.
@@ -28,7 +54,20 @@ def make_student_form_class(config_data: dict) -> type[forms.Form]:
         help_text='(required)',
         widget=forms.Textarea,
     )
-    fields['main_file'] = forms.FileField(label='Upload File', required=True, help_text='(required)')
+    upload_policy = UploadPolicy.from_config(config_data)
+    main_file_help_text: str = '(required)'
+    if upload_policy.file_types:
+        main_file_help_text += f' {upload_policy.describe_types()}'
+    if upload_policy.max_bytes:
+        main_file_help_text += f' (max {upload_policy.max_bytes // (1024 * 1024)}MB)'
+    fields['main_file'] = forms.FileField(
+        label='Upload File',
+        required=True,
+        help_text=main_file_help_text,
+        widget=forms.ClearableFileInput(
+            attrs={'accept': upload_policy.accept_attribute()} if upload_policy.file_types else {}
+        ),
+    )
     ## Collaborators section ----------------------------------------
     rq_AR = config_data.get('advisors_and_readers_required', False)
     log.debug(f'rq_AR, ``{rq_AR}``')
@@ -196,8 +235,10 @@ def make_student_form_class(config_data: dict) -> type[forms.Form]:
             label='Degrees', required=config_data.get('degrees_required', False), help_text=help_text
         )
     if config_data.get('invite_supplementary_files'):
-        fields['supplementary_files'] = forms.FileField(
-            label='Supplementary Files', required=False, help_text='Upload supplementary files if needed'
+        fields['supplementary_files'] = MultipleFileField(
+            label='Supplementary Files',
+            required=False,
+            help_text=f'Upload supplementary files if needed (up to {MAX_SUPPLEMENTARY_FILES})',
         )
 
     ## dynamically create new Form class ----------------------------
@@ -0,0 +1,95 @@
+"""
+Minimal client for a clamd-compatible malware-scanning daemon (ClamAV's `clamd`), over a unix or tcp socket.
+
+Notes:
+- scan_file() streams the file with the `INSTREAM` command -- length-prefixed chunks, then a zero-length one --
+  so clamd needn't be able to read the staging volume, and memory-use stays at one chunk, whatever the file's size.
+- clamd refuses streams over its `StreamMaxLength` (25MB, by default); set it above the largest allowed upload
+  (see lib/upload_policy.py), or such files fail to scan, and stay `scanning`.
+- Kept free of django imports, like lib/s3_client.py.
+
+Called via lib/malware_scanner.py.
+"""
+
+import logging
+import socket
+import struct
+from pathlib import Path
+
+log = logging.getLogger(__name__)
+
+CHUNK_SIZE: int = 2**20  # 1MB
+MAX_REPLY_BYTES: int = 4096
+
+
+class ClamdError(Exception):
+    """
+    Raised when clamd can't be reached, or answers with an error rather than a verdict.
+    """
+
+
+class ClamdClient:
+    def __init__(self, address: str, timeout: float = 120, chunk_size: int = CHUNK_SIZE):
+        """
+        `address` is a unix-socket path, eg `/var/run/clamav/clamd.ctl`, or `tcp://<host>:<port>`.
+        """
+        self.address: str = address
+        self.timeout: float = timeout
+        self.chunk_size: int = chunk_size
+
+    def connect(self) -> socket.socket:
+        try:
+            if self.address.startswith('tcp://'):
+                (host, _, port) = self.address.removeprefix('tcp://').rpartition(':')
+                return socket.create_connection((host, int(port)), timeout=self.timeout)
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(self.timeout)
+            try:
+                sock.connect(self.address)
+            except OSError:
+                sock.close()
+                raise
+            return sock
+        except (OSError, ValueError) as e:
+            raise ClamdError(f'could not connect to clamd at ``{self.address}``; {e}') from e
+
+    def read_reply(self, sock: socket.socket) -> str:
+        """
+        Reads the null-terminated reply (replies are null-terminated, since commands are sent `z`-prefixed).
+        """
+        reply: bytes = b''
+        while not reply.endswith(b'\0') and len(reply) < MAX_REPLY_BYTES:
+            data: bytes = sock.recv(MAX_REPLY_BYTES)
+            if not data:
+                break
+            reply += data
+        return reply.rstrip(b'\0').decode('utf-8', errors='replace').strip()
+
+    def ping(self) -> bool:
+        with self.connect() as sock:
+            sock.sendall(b'zPING\0')
+            return self.read_reply(sock) == 'PONG'
+
+    def scan_file(self, path: Path) -> str | None:
+        """
+        Returns the name of the signature found, or None if the file is clean; raises ClamdError.
+        """
+        with self.connect() as sock, open(path, 'rb') as f:
+            try:
+                sock.sendall(b'zINSTREAM\0')
+                while chunk := f.read(self.chunk_size):
+                    sock.sendall(struct.pack('!L', len(chunk)))
+                    sock.sendall(chunk)
+                sock.sendall(struct.pack('!L', 0))
+            except OSError as e:  # clamd closes the stream early on eg `size limit exceeded`; read why, below
+                log.debug(f'clamd stopped reading ``{path}``; {e}')
+            try:
+                reply: str = self.read_reply(sock)
+            except OSError as e:
+                raise ClamdError(f'no reply from clamd for ``{path}``; {e}') from e
+        verdict: str = reply.removeprefix('stream:').strip()
+        if verdict == 'OK':
+            return None
+        if verdict.endswith(' FOUND'):
+            return verdict.removesuffix(' FOUND').strip()
+        raise ClamdError(f'unexpected clamd reply for ``{path}``; ``{reply}``')
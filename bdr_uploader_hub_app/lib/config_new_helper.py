@@ -1,6 +1,10 @@
+import hashlib
 import logging
 from urllib.parse import urlencode
 
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import Q
 from django.db.models.functions import Lower
 from django.urls import reverse
 
@@ -8,6 +12,8 @@ from bdr_uploader_hub_app.models import AppConfig
 
 log = logging.getLogger(__name__)
 
+AVAILABILITY_CACHE_SECONDS: int = 60  # advisory only; create_app_config() is the authoritative check
+
 
 def get_configs() -> list:
     """
@@ -50,3 +56,69 @@ def get_configs() -> list:
     return existing_app_data
 
     ## end def get_configs()
+
+
+def _taken_cache_key(field: str, value: str) -> str:
+    return f'appconfig_{field}_taken:{hashlib.md5(value.lower().encode()).hexdigest()}'
+
+
+def find_conflicts(app_name: str, slug: str) -> dict[str, bool]:
+    """
+    Returns {'name': taken, 'slug': taken}, case-insensitively, in one query.
+    Compares `LOWER(name)` and `LOWER(slug)`, so the lookups use AppConfig's case-insensitive unique indexes.
+    """
+    (name_lower, slug_lower) = (app_name.lower(), slug.lower())
+    rows = (
+        AppConfig.objects.annotate(name_lower=Lower('name'), slug_lower=Lower('slug'))
+        .filter(Q(name_lower=name_lower) | Q(slug_lower=slug_lower))
+        .values_list('name_lower', 'slug_lower')
+    )
+    conflicts: dict[str, bool] = {'name': False, 'slug': False}
+    for row_name, row_slug in rows:
+        conflicts['name'] = conflicts['name'] or row_name == name_lower
+        conflicts['slug'] = conflicts['slug'] or row_slug == slug_lower
+    return conflicts
+
+
+def describe_conflicts(conflicts: dict[str, bool]) -> str:
+    """
+    Returns the name/slug problem-text shown to staff; empty if neither is taken.
+    Called by views.hlpr_check_availability() and views.hlpr_check_name_and_slug().
+    """
+    name_problem: str = 'Name already exists.' if conflicts['name'] else ''
+    slug_problem: str = 'Slug already exists.' if conflicts['slug'] else ''
+    return f'{name_problem} {slug_problem}'.strip()
+
+
+def check_availability(app_name: str, slug: str) -> dict[str, bool]:
+    """
+    Returns {'name': taken, 'slug': taken}, from the cache where possible; otherwise via find_conflicts().
+    Called by views.hlpr_check_availability().
+    """
+    keys: dict[str, str] = {'name': _taken_cache_key('name', app_name), 'slug': _taken_cache_key('slug', slug)}
+    cached: dict = cache.get_many(list(keys.values()))
+    if all(key in cached for key in keys.values()):
+        return {field: cached[key] for field, key in keys.items()}
+    conflicts: dict[str, bool] = find_conflicts(app_name, slug)
+    cache.set_many({keys[field]: taken for field, taken in conflicts.items()}, AVAILABILITY_CACHE_SECONDS)
+    return conflicts
+
+
+def create_app_config(app_name: str, slug: str) -> tuple[AppConfig | None, dict[str, bool]]:
+    """
+    Inserts the AppConfig, relying on the case-insensitive unique constraints rather than a check-then-insert,
+    so two staff-members can't both create the same name or slug.
+    Returns (app_config, no-conflicts), or (None, conflicts) if the insert was refused.
+    Called by views.hlpr_check_name_and_slug().
+    """
+    try:
+        with transaction.atomic():
+            app_config: AppConfig = AppConfig.objects.create(name=app_name, slug=slug)
+    except IntegrityError:
+        conflicts: dict[str, bool] = find_conflicts(app_name, slug)
+        log.info(f'app-config insert refused; conflicts, ``{conflicts}``')
+        return (None, conflicts)
+    cache.set_many(
+        {_taken_cache_key('name', app_name): True, _taken_cache_key('slug', slug): True}, AVAILABILITY_CACHE_SECONDS
+    )
+    return (app_config, {'name': False, 'slug': False})
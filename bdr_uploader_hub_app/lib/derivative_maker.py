@@ -0,0 +1,192 @@
+"""
+Makes derivatives of staged files -- a first-page preview-image and the extracted text -- in the background,
+so reviewers can see what a student submitted without downloading it.
+
+Flow:
+- New Submissions start with `derivatives_status` `pending`; the `make_derivatives` management command picks them
+  up in batches (run it from cron, or with `--interval` as a simple daemon), so no upload-request waits on a PDF.
+  Submissions the malware-scan hasn't cleared (see lib/malware_scanner.py) wait, so no tool ever opens an
+  unscanned or infected file.
+- make_pending() collects a batch's distinct staged files (submissions can share one; see lib/staging_store.py).
+  A file whose derivatives are already stored is just marked `ok`; others are made on a process-pool
+  (or in-process, with `workers=0`), via derivative_worker.make_derivatives().
+- Each tool-run is time- and memory-limited; see lib/derivative_worker.py. A file that fails is marked `failed`,
+  and isn't retried until staff re-queue it from the admin.
+- Derivatives are stored beside the staged file, under its key plus a suffix (eg `9f/86/9f86d0...0f00a08.pdf.txt`),
+  by the staging-backend; release() and the staging-reaper remove them with the file.
+- Each Submission's `derivatives_status` and `derivatives_made_at` are then bulk-updated; `updated_at` is left
+  alone, so the staging-reaper's retention-clock isn't reset.
+
+Notes:
+- Only PDFs get derivatives, for now; other files are marked `unsupported`.
+- Needs the poppler-utils tools (settings `DERIVATIVE_PDFTOPPM_PATH` and `DERIVATIVE_PDFTOTEXT_PATH`); if either
+  is missing, DerivativesUnavailable is raised, and pending submissions stay pending.
+- With object-storage staging, each file is fetched into a scratch-directory in MEDIA_ROOT first.
+
+Called by the `make_derivatives` management command; derivatives are shown by the SubmissionAdmin.
+"""
+
+import logging
+import multiprocessing
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from django.conf import settings
+from django.utils import timezone
+
+from bdr_uploader_hub_app.lib import derivative_worker, metrics, staging_backends, staging_store
+from bdr_uploader_hub_app.lib.derivative_worker import DerivativeJob
+from bdr_uploader_hub_app.models import Submission
+
+log = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE: int = 20
+PREVIEW_SUFFIX, TEXT_SUFFIX = staging_store.DERIVATIVE_SUFFIXES
+SUPPORTED_EXTENSIONS: tuple[str, ...] = ('.pdf',)
+UNSCANNED_STATUSES: tuple[str, ...] = ('scanning', 'quarantined', 'scan_failed')  # not cleared by the malware-scan
+
+
+class DerivativesUnavailable(Exception):
+    """
+    Raised when the tools for making derivatives aren't installed.
+    """
+
+
+def tool_paths() -> tuple[str, str]:
+    """
+    Returns the resolved (pdftoppm, pdftotext) paths; raises DerivativesUnavailable if either isn't found.
+    """
+    paths: list[str] = []
+    for setting_name in ('DERIVATIVE_PDFTOPPM_PATH', 'DERIVATIVE_PDFTOTEXT_PATH'):
+        found: str | None = shutil.which(getattr(settings, setting_name))
+        if not found:
+            raise DerivativesUnavailable(
+                f'``{getattr(settings, setting_name)}`` not found; install poppler-utils, or set {setting_name}'
+            )
+        paths.append(found)
+    return (paths[0], paths[1])
+
+
+def select_pending(batch_size: int) -> list[Submission]:
+    submissions = (
+        Submission.objects.filter(derivatives_status='pending')
+        .exclude(status__in=UNSCANNED_STATUSES)
+        .exclude(staged_file_name__isnull=True)
+        .exclude(staged_file_name='')
+        .only('id', 'staged_file_name', 'derivatives_status', 'derivatives_made_at')
+        .order_by('created_at')
+    )
+    return list(submissions[:batch_size])
+
+
+def run_jobs(jobs: list[DerivativeJob], workers: int) -> dict[str, tuple[dict[str, str], str | None, float]]:
+    """
+    Runs each job; returns {source_path: (outputs, error, elapsed-seconds)}.
+    """
+    if workers > 0 and len(jobs) > 1:
+        context = multiprocessing.get_context('spawn')  # fresh interpreters; no forked db-connections
+        with ProcessPoolExecutor(
+            max_workers=workers, mp_context=context, initializer=derivative_worker.lower_priority
+        ) as executor:
+            outcomes = list(executor.map(derivative_worker.make_derivatives, jobs))
+    else:
+        outcomes = [derivative_worker.make_derivatives(job) for job in jobs]
+    return {source_path: (outputs, error, elapsed) for source_path, outputs, error, elapsed in outcomes}
+
+
+def is_made(backend, name: str) -> bool:
+    return all(backend.exists(staging_store.derivative_key(name, suffix)) for suffix in staging_store.DERIVATIVE_SUFFIXES)
+
+
+def make_pending(batch_size: int = DEFAULT_BATCH_SIZE, workers: int | None = None) -> dict[str, int]:
+    """
+    Makes derivatives for a batch of pending Submissions; returns a count per resulting `derivatives_status`
+    (empty when nothing's pending). `workers` defaults to settings `DERIVATIVE_WORKERS`.
+    """
+    workers = settings.DERIVATIVE_WORKERS if workers is None else workers
+    submissions: list[Submission] = select_pending(batch_size)
+    if not submissions:
+        return {}
+    (pdftoppm_path, pdftotext_path) = tool_paths()
+    backend = staging_backends.get_backend()
+    results: dict[str, str] = {}  # staged-file name -> derivatives_status
+    with tempfile.TemporaryDirectory(prefix='.derivatives-', dir=staging_store.get_staging_dir()) as scratch_dir:
+        jobs: dict[str, DerivativeJob] = {}
+        for name in sorted({submission.staged_file_name for submission in submissions}):
+            if Path(name).suffix.lower() not in SUPPORTED_EXTENSIONS:
+                results[name] = 'unsupported'
+            elif is_made(backend, name):
+                results[name] = 'ok'  # already made for another submission of the same content
+            elif not staging_store.is_staged(name):
+                results[name] = 'missing'
+            else:
+                work_dir = Path(scratch_dir, name)
+                work_dir.mkdir()
+                source_path: Path = staging_store.find_blob(name) if backend.is_local else work_dir / name
+                if not backend.is_local:
+                    backend.fetch(staging_store.blob_key(name), source_path)
+                jobs[name] = DerivativeJob(
+                    source_path=str(source_path),
+                    work_dir=str(work_dir),
+                    pdftoppm_path=pdftoppm_path,
+                    pdftotext_path=pdftotext_path,
+                    preview_size=settings.DERIVATIVE_PREVIEW_SIZE,
+                    timeout_seconds=settings.DERIVATIVE_TIMEOUT_SECONDS,
+                    max_memory_bytes=settings.DERIVATIVE_MAX_MEMORY_MB * 2**20,
+                )
+        log.info(f'making derivatives of ``{len(jobs)}`` files for ``{len(submissions)}`` submissions')
+        outcomes = run_jobs(list(jobs.values()), workers)
+        for name, job in jobs.items():
+            (outputs, error, elapsed) = outcomes[job.source_path]
+            metrics.DERIVATIVE_SECONDS.observe(elapsed)
+            if error:
+                log.warning(f'derivatives failed for ``{name}``; {error}')
+                results[name] = 'failed'
+                continue
+            backend.store(Path(outputs['preview']), staging_store.derivative_key(name, PREVIEW_SUFFIX))
+            backend.store(Path(outputs['text']), staging_store.derivative_key(name, TEXT_SUFFIX))
+            results[name] = 'ok'
+    for result in results.values():
+        metrics.DERIVATIVE_RESULTS.inc(result=result)
+    summary: dict[str, int] = {}
+    made_at = timezone.now()
+    for submission in submissions:
+        submission.derivatives_status = results[submission.staged_file_name]
+        submission.derivatives_made_at = made_at
+        summary[submission.derivatives_status] = summary.get(submission.derivatives_status, 0) + 1
+    Submission.objects.bulk_update(submissions, ['derivatives_status', 'derivatives_made_at'])
+    return summary
+
+
+def requeue(submissions: list[Submission]) -> int:
+    """
+    Deletes the submissions' stored derivatives, and marks them `pending` again; returns the number re-queued.
+    Called by the SubmissionAdmin `remake_derivatives` action.
+    """
+    backend = staging_backends.get_backend()
+    for name in {submission.staged_file_name for submission in submissions if submission.staged_file_name}:
+        for suffix in staging_store.DERIVATIVE_SUFFIXES:
+            backend.delete(staging_store.derivative_key(name, suffix))
+    return Submission.objects.filter(pk__in=[submission.pk for submission in submissions]).update(
+        derivatives_status='pending', derivatives_made_at=None
+    )
+
+
+def read_text(submission: Submission, max_chars: int) -> str | None:
+    """
+    Returns the start of the submission's extracted text, or None if it hasn't any.
+    """
+    if submission.derivatives_status != 'ok' or not submission.staged_file_name:
+        return None
+    data: bytes | None = staging_backends.get_backend().read(
+        staging_store.derivative_key(submission.staged_file_name, TEXT_SUFFIX)
+    )
+    return None if data is None else data[: max_chars * 4].decode('utf-8', errors='replace')[:max_chars]
+
+
+def read_preview(submission: Submission) -> bytes | None:
+    if submission.derivatives_status != 'ok' or not submission.staged_file_name:
+        return None
+    return staging_backends.get_backend().read(staging_store.derivative_key(submission.staged_file_name, PREVIEW_SUFFIX))
@@ -0,0 +1,93 @@
+"""
+Process-pool worker for making derivatives: a first-page preview-image and the extracted text of a PDF.
+
+Runs the poppler-utils `pdftoppm` and `pdftotext` tools, each in its own subprocess, capped by an address-space
+(memory) limit, a cpu-time limit, and a wall-clock timeout -- so a malformed or hostile PDF costs one failed job,
+not the worker.
+
+Kept free of django imports, so `spawn`ed worker-processes start quickly and without settings.
+Called via derivative_maker.make_pending().
+"""
+
+import os
+import resource
+import subprocess
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+NICE_INCREMENT: int = 10
+
+
+@dataclass(frozen=True)
+class DerivativeJob:
+    source_path: str
+    work_dir: str
+    pdftoppm_path: str
+    pdftotext_path: str
+    preview_size: int
+    timeout_seconds: float
+    max_memory_bytes: int
+
+
+def lower_priority() -> None:
+    """
+    Pool initializer; lowers cpu-priority so derivative-making doesn't compete with the web tier.
+    """
+    try:
+        os.nice(NICE_INCREMENT)
+    except (AttributeError, OSError):
+        pass
+
+
+def run_tool(args: list[str], job: DerivativeJob) -> None:
+    """
+    Runs the tool under the job's limits; raises CalledProcessError or TimeoutExpired.
+    """
+
+    def limit_resources() -> None:  # runs in the child, between fork and exec
+        resource.setrlimit(resource.RLIMIT_AS, (job.max_memory_bytes, job.max_memory_bytes))
+        cpu_seconds: int = max(int(job.timeout_seconds), 1)
+        resource.setrlimit(resource.RLIMIT_CPU, (cpu_seconds, cpu_seconds + 1))
+
+    subprocess.run(
+        args,
+        stdin=subprocess.DEVNULL,
+        capture_output=True,
+        timeout=job.timeout_seconds,
+        preexec_fn=limit_resources,
+        check=True,
+    )
+
+
+def make_derivatives(job: DerivativeJob) -> tuple[str, dict[str, str], str | None, float]:
+    """
+    Writes `preview.png` and `text.txt` into the job's work-dir.
+    Returns (source_path, {kind: output-path}, error, elapsed-seconds); `error` is None on success.
+    """
+    start: float = time.monotonic()
+    work_dir = Path(job.work_dir)
+    outputs: dict[str, str] = {}
+    try:
+        run_tool(
+            [
+                job.pdftoppm_path,
+                *('-png', '-singlefile', '-f', '1', '-l', '1', '-scale-to', str(job.preview_size)),
+                job.source_path,
+                str(work_dir / 'preview'),  # pdftoppm adds the `.png`
+            ],
+            job,
+        )
+        outputs['preview'] = str(work_dir / 'preview.png')
+        run_tool([job.pdftotext_path, '-enc', 'UTF-8', job.source_path, str(work_dir / 'text.txt')], job)
+        outputs['text'] = str(work_dir / 'text.txt')
+        missing: list[str] = [kind for kind, path in outputs.items() if not os.path.isfile(path)]
+        error: str | None = f'no {" or ".join(missing)} written' if missing else None
+    except subprocess.TimeoutExpired:
+        error = f'timed out after {job.timeout_seconds}s'
+    except subprocess.CalledProcessError as e:
+        stderr: str = (e.stderr or b'').decode('utf-8', errors='replace').strip()
+        error = f'``{Path(str(e.cmd[0])).name}`` exited with ``{e.returncode}``; {stderr[:500]}'
+    except OSError as e:
+        error = str(e)
+    return (job.source_path, outputs, error, time.monotonic() - start)
@@ -1,31 +1,60 @@
+"""
+Composes notification emails.
+Emails aren't sent from here; they're queued in the Notification outbox, and sent by the `send_notifications`
+worker -- see lib/notification_handler.py.
+"""
+
 import logging
 
 log = logging.getLogger(__name__)
 
+SUBMISSION_STATUS_NOTES: dict[str, str] = {  # for staff digests; see describe_submission_status()
+    'scanning': 'received; awaiting malware-scan',
+    'quarantined': 'quarantined; the malware-scan found a threat',
+    'scan_failed': 'could not be malware-scanned; needs attention',
+    'ready_to_ingest': 'ready to review and ingest',
+    'ingesting': 'being ingested',
+    'ingested': 'already ingested',
+}
+
+
+def make_ingest_success_message(title: str, bdr_url: str | None) -> tuple[str, str]:
+    """
+    Returns the subject and body of the email telling a student their submission has been ingested.
+    Called by notification_handler.build_ingest_success().
+    """
+    log.debug(f'title: {title}; bdr_url: {bdr_url}')
+    subject = 'Submission Successful'
+    body = (
+        f'Hello,\n\nYour submission "{title}" has been added to the Brown Digital Repository.\n\n'
+        f'You can view it here: {bdr_url}\n'
+    )
+    return (subject, body)
+
+
+def make_submission_received_line(title: str, student_email: str | None) -> str:
+    """
+    Returns one digest-line for a staff notification.
+    Called by notification_handler.queue_submissions_received().
+    """
+    return f'- "{title}", from {student_email or "(unknown)"}'
+
+
+def make_submission_digest_message(app_name: str, lines: list[str]) -> tuple[str, str]:
+    """
+    Returns the subject and body of a staff digest of new submissions for an app.
+    Called by notification_handler.send_pending().
+    """
+    subject = f'{len(lines)} new submission(s) for "{app_name}"'
+    body = f'The following submission(s) for "{app_name}" have been received:\n\n' + '\n'.join(lines) + '\n'
+    return (subject, body)
+
 
-def send_ingest_success_email(
-    first_name: str,
-    email: str,
-    title: str,
-    bdr_url: str,
-) -> None:
-    """
-    Send an email to the user indicating that their submission was successful.
-    Called by the ingest action in the admin interface.
-    Args:
-        first_name (str): The first name of the user.
-        email (str): The email address of the user.
-        title (str): The title of the submission.
-        bdr_url (str): The URL of the BDR submission.
-    """
-    log.debug('send_ingest_success_email called')
-    log.debug(f'first_name: {first_name}')
-    log.debug(f'email: {email}')
-    log.debug(f'title: {title}')
-    log.debug(f'bdr_url: {bdr_url}')
-    # Logic to send email
-    # Example:
-    # send_mail(
-    #     subject='Submission Successful',
-    #     message=f'Hello {first_name},\n\nYour submission "{title}" was successful.\n\nYou can view it here: {bdr_url}',
-    return
+def describe_submission_status(status: str | None) -> str:
+    """
+    Returns a digest-line's status-note, eg `received; awaiting malware-scan`.
+    Called by notification_handler.build_messages().
+    """
+    if status is None:
+        return 'since deleted'
+    return SUBMISSION_STATUS_NOTES.get(status, f'status: {status}')
@@ -0,0 +1,115 @@
+"""
+Re-hashes staged files and compares them to their Submissions' stored checksums.
+
+Flow:
+- verify_submissions() collects the distinct staged files (submissions can share one; see lib/staging_store.py),
+  and hashes each once, on a process-pool (or in-process, with `workers=0`), via fixity_worker.hash_file().
+- Each Submission's `fixity_status` and `fixity_checked_at` are then bulk-updated; `updated_at` is left alone,
+  so the staging-reaper's retention-clock isn't reset.
+- I/O is throttled to `max_bytes_per_second` in total, split across the workers.
+
+Called by the `verify_fixity` management command, and the SubmissionAdmin `verify_fixity` action.
+Ingest also re-verifies each file just before posting (see lib/handoff_handler.py), and records that result.
+Only filesystem-staged files can be checked here; with object-storage staging (see lib/staging_backends.py), the
+store verifies each upload's signed sha256, and ingest re-verifies the fetched copy.
+"""
+
+import datetime
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterable
+
+from django.conf import settings
+from django.db.models import Q, QuerySet
+from django.utils import timezone
+
+from bdr_uploader_hub_app.lib import fixity_worker, metrics, staging_backends, staging_store
+from bdr_uploader_hub_app.models import Submission
+
+log = logging.getLogger(__name__)
+
+
+class FixityUnavailable(Exception):
+    """
+    Raised when the staging-backend isn't the local filesystem.
+    """
+
+
+def select_submissions(include_ingested: bool = False, not_verified_within_hours: float | None = None) -> QuerySet:
+    """
+    Returns the Submissions due for a check; by default, those not yet ingested.
+    """
+    submissions: QuerySet = Submission.objects.exclude(staged_file_name__isnull=True).exclude(staged_file_name='')
+    if not include_ingested:
+        submissions = submissions.exclude(status='ingested')
+    if not_verified_within_hours is not None:
+        cutoff = timezone.now() - datetime.timedelta(hours=not_verified_within_hours)
+        submissions = submissions.filter(Q(fixity_checked_at__isnull=True) | Q(fixity_checked_at__lt=cutoff))
+    return submissions.only('id', 'staged_file_name', 'checksum_type', 'checksum')
+
+
+def hash_files(
+    tasks: list[tuple[str, str, float | None]], workers: int
+) -> dict[tuple[str, str], tuple[str | None, str | None]]:
+    """
+    Hashes each (path, checksum_type) task; returns {(path, checksum_type): (hexdigest, error)}.
+    """
+    if workers > 0 and len(tasks) > 1:
+        context = multiprocessing.get_context('spawn')  # fresh interpreters; no forked db-connections
+        with ProcessPoolExecutor(
+            max_workers=workers, mp_context=context, initializer=fixity_worker.lower_priority
+        ) as executor:
+            outcomes = list(executor.map(fixity_worker.hash_file, tasks))
+    else:
+        outcomes = [fixity_worker.hash_file(task) for task in tasks]
+    return {(task[0], task[1]): (digest, error) for task, (_path, digest, error) in zip(tasks, outcomes)}
+
+
+def verify_submissions(
+    submissions: Iterable[Submission],
+    workers: int | None = None,
+    max_mb_per_second: float | None = None,
+) -> dict[str, int]:
+    """
+    Checks, records and counts each Submission's fixity status: `ok`, `mismatch`, `missing` or `error`.
+    `workers` and `max_mb_per_second` default to settings `FIXITY_WORKERS` and `FIXITY_MAX_MB_PER_SECOND`;
+    a `max_mb_per_second` of 0 means unthrottled.
+    """
+    if not staging_backends.get_backend().is_local:
+        raise FixityUnavailable('fixity-checks need the filesystem staging-backend; ingest verifies object-storage files')
+    workers = settings.FIXITY_WORKERS if workers is None else workers
+    max_mb_per_second = settings.FIXITY_MAX_MB_PER_SECOND if max_mb_per_second is None else max_mb_per_second
+    max_bytes_per_second: float = max_mb_per_second * 2**20
+    submissions = list(submissions)
+    per_worker_rate: float | None = max_bytes_per_second / max(workers, 1) if max_bytes_per_second else None
+    paths: dict[str, str] = {  # sharded, or flat if not yet relocated; looked up once per staged file
+        name: str(staging_store.find_blob(name)) for name in {submission.staged_file_name for submission in submissions}
+    }
+    tasks: list[tuple[str, str, float | None]] = sorted(
+        {
+            (paths[submission.staged_file_name], submission.checksum_type or 'md5', per_worker_rate)
+            for submission in submissions
+        }
+    )
+    log.info(f'checking fixity of ``{len(tasks)}`` files for ``{len(submissions)}`` submissions')
+    results = hash_files(tasks, workers)
+    summary: dict[str, int] = {}
+    checked_at = timezone.now()
+    for submission in submissions:
+        path: str = paths[submission.staged_file_name]
+        (digest, error) = results[(path, submission.checksum_type or 'md5')]
+        if error == 'missing':
+            fixity_status = 'missing'
+        elif error:
+            fixity_status = 'error'
+        else:
+            fixity_status = 'ok' if digest == submission.checksum else 'mismatch'
+        if fixity_status != 'ok':
+            log.warning(f'fixity ``{fixity_status}`` for submission ``{submission.id}``; file, ``{path}``; {error or ""}')
+        submission.fixity_status = fixity_status
+        submission.fixity_checked_at = checked_at
+        summary[fixity_status] = summary.get(fixity_status, 0) + 1
+        metrics.FIXITY_RESULTS.inc(result=fixity_status)
+    Submission.objects.bulk_update(submissions, ['fixity_status', 'fixity_checked_at'], batch_size=500)
+    return summary
@@ -0,0 +1,55 @@
+"""
+Process-pool worker for fixity checks.
+
+Kept free of django imports, so `spawn`ed worker-processes start quickly and without settings.
+Called via fixity_checker.verify_submissions().
+"""
+
+import hashlib
+import os
+import time
+
+HASH_CHUNK_SIZE: int = 8 * 2**20  # 8MB
+NICE_INCREMENT: int = 10
+
+
+def lower_priority() -> None:
+    """
+    Pool initializer; lowers cpu-priority so a nightly run doesn't compete with the web tier.
+    """
+    try:
+        os.nice(NICE_INCREMENT)
+    except (AttributeError, OSError):
+        pass
+
+
+def hash_file(task: tuple[str, str, float | None]) -> tuple[str, str | None, str | None]:
+    """
+    Streams the file through the hasher, sleeping as needed to stay under `max_bytes_per_second`.
+    Tells the kernel the read is sequential, and drops the read pages from the page-cache as it goes,
+    so the scan doesn't evict the web tier's cached files.
+    Returns (path, hexdigest, None), or (path, None, error).
+    """
+    (path, checksum_type, max_bytes_per_second) = task
+    try:
+        hasher = hashlib.new(checksum_type)
+        bytes_read: int = 0
+        start: float = time.monotonic()
+        with open(path, 'rb') as f:
+            fd: int = f.fileno()
+            if hasattr(os, 'posix_fadvise'):
+                os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_SEQUENTIAL)
+            while chunk := f.read(HASH_CHUNK_SIZE):
+                hasher.update(chunk)
+                if hasattr(os, 'posix_fadvise'):
+                    os.posix_fadvise(fd, bytes_read, len(chunk), os.POSIX_FADV_DONTNEED)
+                bytes_read += len(chunk)
+                if max_bytes_per_second:
+                    ahead_by: float = bytes_read / max_bytes_per_second - (time.monotonic() - start)
+                    if ahead_by > 0:
+                        time.sleep(ahead_by)
+        return (path, hasher.hexdigest(), None)
+    except FileNotFoundError:
+        return (path, None, 'missing')
+    except (OSError, ValueError) as e:
+        return (path, None, str(e))
@@ -0,0 +1,216 @@
+"""
+Hands a staged file off to the directory the BDR-API reads from, and verifies it, before the ingest-post.
+
+`settings.BDR_API_HANDOFF_DIR` is this server's path to the directory the BDR-API sees as `BDR_API_FILE_PATH_ROOT`.
+When it's empty (or is the staging directory), MEDIA_ROOT is assumed to be on the BDR-API's share, and the
+staged file is only verified.
+
+Placement, cheapest first -- no option copies bytes through python:
+- hardlink (same filesystem; staged files are content-addressed and never modified, so sharing an inode is safe)
+- `os.copy_file_range()` (in-kernel copy; reflinks on filesystems that support it), into a temp-file
+- `shutil.copyfile()` (sendfile), where copy_file_range isn't available
+Copies are atomically renamed into place, so the BDR-API never sees a partial file.
+
+With object-storage staging (see lib/staging_backends.py), the file is instead fetched from the bucket into the
+hand-off directory (which is then required), via a temp-file, and verified the same way.
+
+Hand-off copies use the staging-store's sharded layout, so a file's path relative to the hand-off directory is
+the same as its path relative to the staging directory; bdr_api_relative_path() maps either onto
+`BDR_API_FILE_PATH_ROOT`.
+
+Verification checks size, and the checksum against `Submission.checksum` via `hashlib.file_digest()`,
+which hashes straight from a reusable buffer. A hand-off copy that fails verification -- eg, a truncated or stale
+file left by an earlier run, which placement re-uses as-is -- is removed and placed once more before giving up.
+
+Called by Ingester.manage_ingest().
+"""
+
+import hashlib
+import logging
+import os
+import shutil
+import uuid
+from collections.abc import Callable
+from pathlib import Path
+
+from django.conf import settings
+
+from bdr_uploader_hub_app.lib import metrics, staging_backends, staging_store
+
+log = logging.getLogger(__name__)
+
+COPY_CHUNK_SIZE: int = 2**30  # 1GB per copy_file_range() call
+
+
+class HandoffError(Exception):
+    """
+    Raised when a staged file can't be placed for, or verified for, the BDR-API.
+    """
+
+
+def get_handoff_dir() -> Path | None:
+    """
+    Returns the hand-off directory, or None if the staging directory is already the BDR-API's share.
+    """
+    handoff_dir_setting: str = getattr(settings, 'BDR_API_HANDOFF_DIR', '')
+    if not handoff_dir_setting:
+        return None
+    handoff_dir = Path(handoff_dir_setting)
+    handoff_dir.mkdir(parents=True, exist_ok=True)
+    if handoff_dir.resolve() == Path(settings.MEDIA_ROOT).resolve():
+        return None
+    return handoff_dir
+
+
+def kernel_copy(source_path: Path, target_path: Path) -> str:
+    """
+    Copies in-kernel; returns the method used.
+    """
+    if hasattr(os, 'copy_file_range'):
+        try:
+            with open(source_path, 'rb') as src, open(target_path, 'wb') as dst:
+                while os.copy_file_range(src.fileno(), dst.fileno(), COPY_CHUNK_SIZE):
+                    pass
+            return 'copy_file_range'
+        except OSError as e:  # eg, EXDEV on older kernels, or an unsupported filesystem
+            log.debug(f'copy_file_range unavailable, ``{e}``; falling back to sendfile')
+    shutil.copyfile(source_path, target_path)
+    return 'sendfile'
+
+
+def place(staged_path: Path, handoff_dir: Path) -> Path:
+    """
+    Places the staged file in the hand-off directory, under the same name and shard; returns the placed path.
+    """
+    target_path: Path = handoff_dir / staging_store.shard_relative_path(staged_path.name)
+    if target_path.exists():
+        log.debug(f'``{target_path.name}`` already handed off')
+        return target_path
+    target_path.parent.mkdir(parents=True, exist_ok=True)
+    try:
+        os.link(staged_path, target_path)
+        log.debug(f'hardlinked ``{staged_path}`` to ``{target_path}``')
+        return target_path
+    except FileExistsError:  # a concurrent ingest of the same content got there first
+        return target_path
+    except OSError as e:
+        log.debug(f'hardlink unavailable, ``{e}``; copying')
+    temp_path: Path = target_path.parent / f'.{uuid.uuid4().hex}.part'
+    try:
+        method: str = kernel_copy(staged_path, temp_path)
+        os.replace(temp_path, target_path)
+    except OSError as e:
+        temp_path.unlink(missing_ok=True)
+        raise HandoffError(f'could not place ``{staged_path.name}`` for the BDR-API: {e}') from e
+    log.debug(f'copied ``{staged_path}`` to ``{target_path}`` via ``{method}``')
+    return target_path
+
+
+def fetch(name: str, handoff_dir: Path) -> Path:
+    """
+    Fetches an object-storage staged file into the hand-off directory; returns the placed path.
+    """
+    target_path: Path = handoff_dir / staging_store.shard_relative_path(name)
+    if target_path.exists():
+        log.debug(f'``{name}`` already handed off')
+        return target_path
+    target_path.parent.mkdir(parents=True, exist_ok=True)
+    temp_path: Path = target_path.parent / f'.{uuid.uuid4().hex}.part'
+    try:
+        staging_backends.get_backend().fetch(staging_store.blob_key(name), temp_path)
+        os.replace(temp_path, target_path)
+    except Exception as e:
+        temp_path.unlink(missing_ok=True)
+        raise HandoffError(f'could not fetch ``{name}`` for the BDR-API: {e}') from e
+    log.debug(f'fetched ``{name}`` to ``{target_path}``')
+    return target_path
+
+
+def bdr_api_relative_path(path: Path) -> Path:
+    """
+    Returns the file's path relative to the hand-off or staging directory, eg `9f/86/9f86d0...0f00a08.pdf`;
+    a file outside both (or flat, from before sharding) maps to its bare name.
+    Called by Ingester.prepare_file().
+    """
+    resolved_path: Path = path.resolve()
+    for root in (get_handoff_dir(), Path(settings.MEDIA_ROOT)):
+        if root is not None and resolved_path.is_relative_to(root.resolve()):
+            return resolved_path.relative_to(root.resolve())
+    return Path(path.name)
+
+
+def verify(path: Path, expected_size: int, checksum_type: str, checksum: str) -> None:
+    """
+    Raises HandoffError if the file's size or checksum doesn't match.
+    """
+    try:
+        actual_size: int = path.stat().st_size
+    except FileNotFoundError as e:
+        raise HandoffError(f'file not found, ``{path}``') from e
+    if actual_size != expected_size:
+        raise HandoffError(f'size mismatch for ``{path.name}``; expected ``{expected_size}``, found ``{actual_size}``')
+    with open(path, 'rb') as f:
+        actual_checksum: str = hashlib.file_digest(f, checksum_type).hexdigest()
+    if actual_checksum != checksum:
+        raise HandoffError(
+            f'{checksum_type} mismatch for ``{path.name}``; expected ``{checksum}``, found ``{actual_checksum}``'
+        )
+
+
+def place_verified(place_fn: Callable[[], Path], expected_size: int, checksum_type: str, checksum: str) -> Path:
+    """
+    Places via `place_fn` (place() or fetch()), and verifies; a placed file that fails verification is removed
+    and placed once more, then re-verified. Returns the verified path.
+    Called by hand_off() and hand_off_object().
+    """
+    handoff_path: Path = place_fn()
+    try:
+        verify(handoff_path, expected_size, checksum_type, checksum)
+    except HandoffError as e:
+        log.warning(f'hand-off copy failed verification, ``{e}``; re-placing ``{handoff_path}``')
+        handoff_path.unlink(missing_ok=True)
+        handoff_path = place_fn()
+        verify(handoff_path, expected_size, checksum_type, checksum)
+    return handoff_path
+
+
+def hand_off(staged_path: Path, checksum_type: str, checksum: str) -> Path:
+    """
+    Places (if needed) and verifies the staged file; returns the path the BDR-API will read.
+    With object-storage staging, only `staged_path.name` is used.
+    """
+    backend = staging_backends.get_backend()
+    if not backend.is_local:
+        return hand_off_object(staged_path.name, checksum_type, checksum)
+    try:
+        expected_size: int = staged_path.stat().st_size
+    except FileNotFoundError as e:
+        raise HandoffError(f'staged file not found, ``{staged_path}``') from e
+    handoff_dir: Path | None = get_handoff_dir()
+    with metrics.HANDOFF_SECONDS.time():
+        if handoff_dir:
+            handoff_path: Path = place_verified(
+                lambda: place(staged_path, handoff_dir), expected_size, checksum_type, checksum
+            )
+        else:
+            handoff_path = staged_path
+            verify(handoff_path, expected_size, checksum_type, checksum)
+    log.info(f'handed off ``{handoff_path}``')
+    return handoff_path
+
+
+def hand_off_object(name: str, checksum_type: str, checksum: str) -> Path:
+    """
+    Fetches (if needed) and verifies an object-storage staged file; returns the path the BDR-API will read.
+    Called by hand_off().
+    """
+    expected_size: int | None = staging_backends.get_backend().size(staging_store.blob_key(name))
+    if expected_size is None:
+        raise HandoffError(f'staged object not found, ``{staging_store.blob_key(name)}``')
+    handoff_dir: Path | None = get_handoff_dir()
+    if handoff_dir is None:
+        raise HandoffError('object-storage staging needs BDR_API_HANDOFF_DIR, for the BDR-API to read from')
+    with metrics.HANDOFF_SECONDS.time():
+        handoff_path: Path = place_verified(lambda: fetch(name, handoff_dir), expected_size, checksum_type, checksum)
+    log.info(f'handed off ``{handoff_path}``')
+    return handoff_path
@@ -0,0 +1,141 @@
+"""
+Ingest dry-run: renders every BDR-API payload for a selection of submissions, without posting anything.
+
+Flow:
+- preview_submissions() runs preview_submission() for each submission on a thread-pool, yielding results as they
+  complete, so callers can stream a report.
+- preview_submission() runs each ingest stage -- prepare_mods, prepare_rights, prepare_rels, prepare_file,
+  parameterize -- and records every stage's problem, rather than stopping at the first.
+- Nothing is written: no status-changes, no hand-off placement, no post.
+
+Called by the `preview_ingest` management command, and the SubmissionAdmin `preview_ingest` action.
+"""
+
+import json
+import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import Any, Iterable, Iterator
+
+from django.db.models import QuerySet
+
+from bdr_uploader_hub_app.lib import handoff_handler, staging_store
+from bdr_uploader_hub_app.lib.ingester_handler import Ingester
+from bdr_uploader_hub_app.lib.mods_handler import ModsMaker
+from bdr_uploader_hub_app.models import Submission
+
+log = logging.getLogger(__name__)
+
+DEFAULT_WORKERS: int = 4
+
+
+def preview_submission(submission: Submission, verify_checksums: bool = False) -> dict[str, Any]:
+    """
+    Returns {'id', 'title', 'status' (`ok` or `error`), 'errors', 'params'} for one submission.
+    Runs on a worker-thread; uses only the already-loaded submission and app, so makes no db-queries.
+    """
+    ingester = Ingester()
+    errors: list[str] = []
+    if submission.status != 'ready_to_ingest':
+        errors.append(f'status: is ``{submission.status}``, not ``ready_to_ingest``')
+    ## mods ---------------------------------------------------------
+    try:
+        ingester.mods = ModsMaker(submission).prepare_mods()
+    except Exception as e:
+        errors.append(f'mods: {e}')
+    ## rights, ir, rels ---------------------------------------------
+    try:
+        ingester.rights = ingester.prepare_rights(submission.student_eppn, submission.visibility_options)
+    except Exception as e:
+        errors.append(f'rights: {e}')
+    ingester.ir = ingester.prepare_ir(submission.student_eppn, submission.student_email)
+    try:
+        ingester.rels = ingester.prepare_rels(submission.app.temp_config_json)
+    except KeyError as e:
+        errors.append(f'rels: app config is missing {e}')
+    ## file ---------------------------------------------------------
+    try:
+        staged_path = Path(submission.primary_file.path)
+        if not (staged_path.is_file() or staging_store.is_staged(staged_path.name)):
+            raise FileNotFoundError(f'staged file not found, ``{staged_path}``')
+        if verify_checksums and staged_path.is_file():  # object-storage files are verified at hand-off
+            handoff_handler.verify(staged_path, staged_path.stat().st_size, submission.checksum_type, submission.checksum)
+        ingester.file_data = ingester.prepare_file(
+            submission.checksum_type, submission.checksum, str(staged_path), submission.original_file_name
+        )
+    except Exception as e:
+        errors.append(f'file: {e}')
+    for supplementary_file in submission.supplementary_files.all():
+        try:
+            staged_path = staging_store.find_blob(supplementary_file.staged_file_name)
+            if not (staged_path.is_file() or staging_store.is_staged(supplementary_file.staged_file_name)):
+                raise FileNotFoundError(f'staged file not found, ``{staged_path}``')
+            if verify_checksums and staged_path.is_file():
+                handoff_handler.verify(
+                    staged_path, supplementary_file.size, supplementary_file.checksum_type, supplementary_file.checksum
+                )
+            ingester.supplementary_file_data.append(
+                ingester.prepare_file(
+                    supplementary_file.checksum_type,
+                    supplementary_file.checksum,
+                    str(staged_path),
+                    supplementary_file.original_file_name,
+                )
+            )
+        except Exception as e:
+            errors.append(f'supplementary file ``{supplementary_file.original_file_name}``: {e}')
+    ## params -------------------------------------------------------
+    params: dict | None = None
+    if not errors:
+        try:
+            params = ingester.parameterize()
+        except Exception as e:
+            errors.append(f'params: {e}')
+    return {
+        'id': str(submission.id),
+        'title': submission.title,
+        'status': 'error' if errors else 'ok',
+        'errors': errors,
+        'params': params,
+    }
+
+
+def preview_submissions(
+    submissions: Iterable[Submission], workers: int = DEFAULT_WORKERS, verify_checksums: bool = False
+) -> Iterator[dict[str, Any]]:
+    """
+    Yields preview-results in completion order.
+    A queryset is loaded (with its apps and supplementary files) up front, so worker-threads never touch the db.
+    """
+    if isinstance(submissions, QuerySet):
+        submissions = submissions.select_related('app').prefetch_related('supplementary_files')
+    submissions = list(submissions)
+    log.info(f'previewing ingest of ``{len(submissions)}`` submissions with ``{workers}`` workers')
+    with ThreadPoolExecutor(max_workers=max(workers, 1)) as executor:
+        futures = [executor.submit(preview_submission, submission, verify_checksums) for submission in submissions]
+        for future in as_completed(futures):
+            yield future.result()
+
+
+def format_result(result: dict[str, Any], output_format: str = 'text') -> str:
+    """
+    Returns one report-line: `jsonl` (including the rendered params) or `text`.
+    """
+    if output_format == 'jsonl':
+        return json.dumps(result)
+    line: str = f'{result["status"]:<6} {result["id"][:8]}  {result["title"]}'
+    if result['errors']:
+        line += '\n' + '\n'.join(f'         - {error}' for error in result['errors'])
+    return line
+
+
+def stream_report(results: Iterable[dict[str, Any]], output_format: str = 'text') -> Iterator[str]:
+    """
+    Yields report-lines as results arrive, then a summary-line.
+    """
+    counts: dict[str, int] = {'ok': 0, 'error': 0}
+    for result in results:
+        counts[result['status']] += 1
+        yield format_result(result, output_format) + '\n'
+    summary: str = f'ok: {counts["ok"]}; error: {counts["error"]}'
+    yield (json.dumps({'summary': counts}) if output_format == 'jsonl' else f'\n{summary}') + '\n'
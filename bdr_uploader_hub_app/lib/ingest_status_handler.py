@@ -0,0 +1,160 @@
+"""
+Claims submissions for ingest, and commits their resulting statuses in batches.
+
+Flow:
+- claim_submissions() moves `ready_to_ingest` submissions to `ingesting` and returns the ids this caller won.
+  On databases with `SELECT ... FOR UPDATE SKIP LOCKED` (postgres, mysql 8), rows being claimed by another
+  staff-member's ingest are skipped rather than waited-on; elsewhere (sqlite) each row is claimed with a
+  conditional update. Either way, two concurrent ingests never both post the same submission.
+- While ingesting, confirm_claim() re-checks each submission's claim immediately before its post, and
+  heartbeat_claims() refreshes `updated_at` on the claims still to be posted, once per loaded chunk; so a claim
+  released by release_stale_claims() mid-run is skipped rather than posted twice, and a running ingest's claims
+  don't look stale.
+- A successful post's pid and status are written straight away, by record_ingested() -- one single-row update --
+  so a worker killed mid-batch can't lose the pids of items already created in the BDR.
+- StatusCommitter collects failed submissions and bulk-updates only the status-related columns, in one
+  transaction per batch -- rather than a full-row `save()` per submission.
+- release_stale_claims() recovers submissions left `ingesting` by an ingest that died (a worker timeout or
+  crash): those with a pid become `ingested`; the rest go back to `ready_to_ingest`, with a note, to be re-ingested.
+
+Called by Ingester.manage_ingest(); release_stale_claims() by the `release_stale_ingests` management command.
+"""
+
+import datetime
+import logging
+import uuid
+from typing import Iterable
+
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from bdr_uploader_hub_app.lib import metrics
+from bdr_uploader_hub_app.models import Submission
+
+log = logging.getLogger(__name__)
+
+STATUS_FIELDS: tuple[str, ...] = (
+    'status',
+    'bdr_pid',
+    'ingest_error_message',
+    'fixity_status',
+    'fixity_checked_at',
+    'updated_at',
+)
+DEFAULT_BATCH_SIZE: int = 50
+DEFAULT_STALE_CLAIM_MINUTES: float = 60  # far longer than any single ingest-request runs
+
+
+def claim_submissions(submission_ids: Iterable[uuid.UUID], staff_ingester: str) -> list[uuid.UUID]:
+    """
+    Marks still-`ready_to_ingest` submissions as `ingesting`; returns the claimed ids.
+    """
+    submission_ids = list(submission_ids)
+    claim_values: dict = {'status': 'ingesting', 'staff_ingester': staff_ingester, 'updated_at': timezone.now()}
+    if connection.features.has_select_for_update_skip_locked:
+        with transaction.atomic():
+            claimed_ids: list[uuid.UUID] = list(
+                Submission.objects.select_for_update(skip_locked=True)
+                .filter(id__in=submission_ids, status='ready_to_ingest')
+                .values_list('id', flat=True)
+            )
+            Submission.objects.filter(id__in=claimed_ids).update(**claim_values)
+    else:
+        claimed_ids = [
+            submission_id
+            for submission_id in submission_ids
+            if Submission.objects.filter(id=submission_id, status='ready_to_ingest').update(**claim_values)
+        ]
+    log.debug(f'claimed ``{len(claimed_ids)}`` of ``{len(submission_ids)}`` submissions')
+    metrics.record_status_transition('ready_to_ingest', 'ingesting', count=len(claimed_ids))
+    return claimed_ids
+
+
+def confirm_claim(submission_id: uuid.UUID, staff_ingester: str) -> bool:
+    """
+    Returns whether the submission is still `ingesting` under this staff-member's claim, refreshing the claim if so;
+    one conditional single-row update.
+    """
+    return bool(
+        Submission.objects.filter(id=submission_id, status='ingesting', staff_ingester=staff_ingester).update(
+            updated_at=timezone.now()
+        )
+    )
+
+
+def heartbeat_claims(submission_ids: Iterable[uuid.UUID], staff_ingester: str) -> int:
+    """
+    Refreshes `updated_at` on those of the submissions still claimed by this staff-member; returns the count.
+    """
+    return Submission.objects.filter(id__in=list(submission_ids), status='ingesting', staff_ingester=staff_ingester).update(
+        updated_at=timezone.now()
+    )
+
+
+def record_ingested(submission: Submission) -> None:
+    """
+    Writes a successfully-posted submission's status-related columns immediately, in one single-row update.
+    """
+    submission.updated_at = timezone.now()
+    Submission.objects.filter(id=submission.id).update(**{field: getattr(submission, field) for field in STATUS_FIELDS})
+    metrics.record_status_transition('ingesting', submission.status)
+
+
+def release_stale_claims(older_than_minutes: float = DEFAULT_STALE_CLAIM_MINUTES) -> dict[str, int]:
+    """
+    Releases submissions claimed for ingest more than `older_than_minutes` ago and never finished; returns a count
+    per new status. A submission with a pid was created in the BDR, so becomes `ingested`; one without becomes
+    `ready_to_ingest` again.
+    """
+    cutoff = timezone.now() - datetime.timedelta(minutes=older_than_minutes)
+    stale = Submission.objects.filter(status='ingesting', updated_at__lt=cutoff)
+    summary: dict[str, int] = {
+        'ingested': stale.filter(bdr_pid__isnull=False)
+        .exclude(bdr_pid='')
+        .update(status='ingested', ingest_error_message=None, updated_at=timezone.now()),
+        'ready_to_ingest': stale.filter(Q(bdr_pid__isnull=True) | Q(bdr_pid='')).update(
+            status='ready_to_ingest',
+            ingest_error_message=f'ingest claim released after {older_than_minutes:g} minutes, unfinished',
+            updated_at=timezone.now(),
+        ),
+    }
+    for status, count in summary.items():
+        metrics.record_status_transition('ingesting', status, count=count)
+    if any(summary.values()):
+        log.warning(f'released stale ingest-claims; ``{summary}``')
+    return summary
+
+
+class StatusCommitter:
+    """
+    Batches status-writes for failed submissions; see record_ingested() for successful ones.
+    Use as a context-manager, so the last partial batch is flushed even if processing raises.
+    """
+
+    def __init__(self, batch_size: int = DEFAULT_BATCH_SIZE):
+        self.batch_size: int = batch_size
+        self.pending: list[Submission] = []
+
+    def add(self, submission: Submission) -> None:
+        submission.updated_at = timezone.now()  # bulk_update() skips `auto_now`
+        self.pending.append(submission)
+        if len(self.pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self) -> None:
+        if not self.pending:
+            return
+        with transaction.atomic():
+            Submission.objects.bulk_update(self.pending, STATUS_FIELDS)
+        for submission in self.pending:
+            metrics.record_status_transition('ingesting', submission.status)
+        log.debug(f'committed statuses for ``{len(self.pending)}`` submissions')
+        self.pending = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.flush()
+        return False
@@ -3,20 +3,37 @@
 import json
 import logging
 import pprint
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from typing import Iterator
 
 import httpx
 from django.conf import settings
 from django.contrib import messages
+from django.utils import timezone
 from lxml import etree
 
+from bdr_uploader_hub_app.lib import (
+    handoff_handler,
+    ingest_status_handler,
+    metrics,
+    notification_handler,
+    staging_store,
+)
 from bdr_uploader_hub_app.lib.mods_handler import ModsMaker
 from bdr_uploader_hub_app.models import Submission
 
-from .emailer import send_ingest_success_email
-
 log = logging.getLogger(__name__)
 
+RETRYABLE_STATUS_CODES: tuple[int, ...] = (503,)  # the bdr-api didn't process the request
+LOAD_CHUNK_SIZE: int = ingest_status_handler.DEFAULT_BATCH_SIZE  # submissions fetched per query while ingesting
+UNUSED_COLUMNS: tuple[str, ...] = (  # columns ingest never reads, so never loads; see load_claimed()
+    'temp_submission_json',  # the whole form-data, kept for reference
+    'scan_message',
+    'app__description',
+)
+
 
 class Ingester:
     """
@@ -32,10 +49,14 @@ class Ingester:
         self.ir = {}
         self.rels = {}
         self.file_data = {}
+        self.supplementary_file_data: list[dict] = []  # content-streams after the primary file's
+        self.http_client: httpx.Client | None = None
+        self.shared_params: dict[tuple, dict] = {}  # per-(app, visibility) serialized params; see get_shared_params()
 
     def validate_queryset(self, request, queryset):
         """
         Validates the queryset to ensure all submissions are ready for ingestion.
+        One query, returning only the submissions that aren't ready -- and only the columns the message needs.
         The `messages.warning(request, err)` displays a warning message on the admin-page.
         Called by the `ingest` action in the SubmissionAdmin class.
         """
@@ -43,14 +64,16 @@ class Ingester:
         errors: list = []
         ok: bool = False
         err: str | None = None
-        for submission in queryset:
-            log.debug(f'processing submission.title: ``{submission.title}``')
-            log.debug(f'submission.status: ``{submission.status}``')
-            if not submission.status == 'ready_to_ingest':
-                errors.append(f'`{str(submission.id)[0:4]}...--{str(submission)}`')
-                log.warning(
-                    f'`{str(submission.id)[0:4]}...--{str(submission)}` not ready to ingest; status: {submission.status}'
-                )
+        not_ready = (
+            queryset.exclude(status='ready_to_ingest')
+            .select_related(None)  # the admin's changelist-queryset may join `app`
+            .only('id', 'title', 'status')
+        )
+        for submission in not_ready:
+            errors.append(f'`{str(submission.id)[0:4]}...--{str(submission)}`')
+            log.warning(
+                f'`{str(submission.id)[0:4]}...--{str(submission)}` not ready to ingest; status: {submission.status}'
+            )
         if errors:
             err = f'Invalid selections: {", ".join(errors)}'
             messages.warning(request, err)
@@ -63,51 +86,88 @@ class Ingester:
     def manage_ingest(self, request, queryset) -> None:
         """
         Manages the ingestion of the selected submissions into the BDR.
+        Submissions are first claimed (so a concurrent ingest by another staff-member skips them); each successful
+        post's pid is written straight away, and failures are committed in batches; see lib/ingest_status_handler.py.
+        Claimed submissions are loaded with their app, in chunks, without the columns ingest doesn't use;
+        see load_claimed(). Each claim is re-checked just before its post, so one released mid-run (see
+        `release_stale_ingests`) is skipped rather than posted twice.
         Called by the `ingest` action in the SubmissionAdmin class.
         """
         log.debug('manage_ingest called')
         errors = []
-        for submission in queryset:
-            log.debug(f'submission details:\n{pprint.pformat(submission.__dict__, indent=2)}')
-            self.submission = submission
-            try:
-                f = submission.primary_file
-                log.debug(f'type of f, ``{type(f)}``')
-                self.mods: str = ModsMaker(submission).prepare_mods()
-                self.rights: dict = self.prepare_rights(submission.student_eppn, submission.visibility_options)
-                self.ir: dict = self.prepare_ir(submission.student_eppn, submission.student_email)
-                # self.rels: dict = self.prepare_rels(submission.app.temp_config_json)  # temp_config_json loads as a dict
-                temp_config_data: dict = submission.app.temp_config_json  # loads as a dict
-                self.rels: dict = self.prepare_rels(temp_config_data)  # temp_config_json loads as a dict
-                self.file_data: dict = self.prepare_file(
-                    submission.checksum_type,
-                    submission.checksum,
-                    submission.primary_file.path,
-                    submission.original_file_name,
-                )
-                params: dict = self.parameterize()
-                result: tuple[str | None, str | None] = self.post(params)
-                (pid, err) = result
-                submission.bdr_pid = pid
-                submission.status = 'ingested'
-                submission.ingest_error_message = None
-                submission.save()
-                send_ingest_success_email(
-                    request.user.first_name, submission.student_email, submission.title, submission.bdr_url
-                )  # bdr_url will be a property based on bdr_pid
-                log.info('sent_ingestion_confirmation email')
-            except Exception as e:
-                log.exception(f'Error ingesting submission: {submission}, Error: {e}')
-                submission.status = 'ingest_error'
-                submission.ingest_error_message = str(e)
-                submission.save()
-                message_error = f'`{str(submission.id)[0:4]}...--{str(submission)}`'
-                errors.append(message_error)
+        notifications: list = []
+        selected_ids: list = list(queryset.values_list('id', flat=True))
+        claimed_ids: list = ingest_status_handler.claim_submissions(selected_ids, request.user.email)
+        skipped_count: int = len(selected_ids) - len(claimed_ids)
+        with ingest_status_handler.StatusCommitter() as committer:
+            for submission in self.load_claimed(claimed_ids, request.user.email):
+                log.debug(f'submission details:\n{pprint.pformat(submission.__dict__, indent=2)}')
+                self.submission = submission
+                try:
+                    self.mods: str = ModsMaker(submission).prepare_mods()
+                    ## place-and-verify file for bdr-api; raises HandoffError before the post
+                    handoff_path: Path = handoff_handler.hand_off(
+                        Path(submission.primary_file.path), submission.checksum_type, submission.checksum
+                    )
+                    submission.fixity_status = 'ok'
+                    submission.fixity_checked_at = timezone.now()
+                    self.file_data: dict = self.prepare_file(
+                        submission.checksum_type,
+                        submission.checksum,
+                        str(handoff_path),
+                        submission.original_file_name,
+                    )
+                    self.supplementary_file_data = self.prepare_supplementary_files(submission)
+                    params: dict = self.build_params(submission)
+                    if not ingest_status_handler.confirm_claim(submission.id, request.user.email):
+                        log.warning(f'claim on ``{submission.id}`` was released mid-ingest; skipping it')
+                        skipped_count += 1
+                        continue
+                    result: tuple[str | None, str | None] = self.post(params)
+                    (pid, err) = result
+                    submission.bdr_pid = pid
+                    submission.status = 'ingested'
+                    submission.ingest_error_message = None
+                    ingest_status_handler.record_ingested(submission)  # the item exists in the BDR; keep its pid now
+                    notifications.append(notification_handler.build_ingest_success(submission))  # sent later
+                except Exception as e:
+                    log.exception(f'Error ingesting submission: {submission}, Error: {e}')
+                    submission.status = 'ingest_error'
+                    submission.ingest_error_message = str(e)
+                    committer.add(submission)
+                    message_error = f'`{str(submission.id)[0:4]}...--{str(submission)}`'
+                    errors.append(message_error)
+        self.close()
+        notification_handler.queue(notifications)  # one insert; the `send_notifications` worker emails students
+        if skipped_count:
+            messages.warning(request, f'{skipped_count} submission(s) skipped; already being ingested')
         if errors:
             messages.error(request, f'Some errors occurred during ingestion, for items: {", ".join(errors)}')
         else:
             messages.success(request, 'Submissions ingested')
 
+    def load_claimed(self, claimed_ids: list, staff_ingester: str) -> Iterator[Submission]:
+        """
+        Yields the claimed submissions, with their app (for build_params()) and supplementary files, `LOAD_CHUNK_SIZE`
+        at a time -- so memory stays bounded however many are selected -- and without the columns ingest never reads.
+        At the start of each chunk, the claims not yet yielded are refreshed, so they never look stale to
+        `release_stale_ingests` while this ingest is still working through them.
+        Called by manage_ingest().
+        """
+        submissions = (
+            Submission.objects.filter(id__in=claimed_ids)
+            .select_related('app')
+            .prefetch_related('supplementary_files')
+            .defer(*UNUSED_COLUMNS)
+            .order_by('created_at')
+        )
+        pending_ids: set = set(claimed_ids)
+        for index, submission in enumerate(submissions.iterator(chunk_size=LOAD_CHUNK_SIZE)):
+            if index % LOAD_CHUNK_SIZE == 0:
+                ingest_status_handler.heartbeat_claims(pending_ids, staff_ingester)
+            pending_ids.discard(submission.id)
+            yield submission
+
     def format_mods(self, unformatted_mods_string: str) -> str:
         """
         Formats the item_mods object via lxml.
@@ -204,7 +264,7 @@ class Ingester:
         (path, filename) = rslt
         log.debug(f'path: ``{path}``, filename: ``{filename}``')
         bdr_api_file_path_root: Path = Path(settings.BDR_API_FILE_PATH_ROOT)
-        bdr_api_file_path: Path = bdr_api_file_path_root / filename
+        bdr_api_file_path: Path = bdr_api_file_path_root / handoff_handler.bdr_api_relative_path(saved_file_path)
         log.debug(f'bdr_api_file_path: ``{bdr_api_file_path}``')
         bdr_api_file_path_str: str = str(bdr_api_file_path)
         ## prepare file-data ------------------------------------------
@@ -217,6 +277,33 @@ class Ingester:
         log.debug(f'file_data: {pprint.pformat(file_data)}')
         return file_data
 
+    def prepare_supplementary_files(self, submission: Submission) -> list[dict]:
+        """
+        Hands off, and verifies, the submission's supplementary files concurrently, on a pool bounded by
+        `settings.STAGING_WORKERS`; returns their file-data in upload-order.
+        Raises HandoffError if any file can't be placed or verified.
+        Called by manage_ingest().
+        """
+        supplementary_files: list = list(submission.supplementary_files.all())  # prefetched by manage_ingest()
+        if not supplementary_files:
+            return []
+
+        def hand_off(supplementary_file) -> dict:
+            handoff_path: Path = handoff_handler.hand_off(
+                staging_store.find_blob(supplementary_file.staged_file_name),
+                supplementary_file.checksum_type,
+                supplementary_file.checksum,
+            )
+            return self.prepare_file(
+                supplementary_file.checksum_type,
+                supplementary_file.checksum,
+                str(handoff_path),
+                supplementary_file.original_file_name,
+            )
+
+        with ThreadPoolExecutor(max_workers=max(settings.STAGING_WORKERS, 1)) as executor:
+            return list(executor.map(hand_off, supplementary_files))
+
     # def prepare_file(
     #     self, submission_checksum_type: str, submission_checksum: str, file_path: str, original_file_name: str
     # ) -> dict:
@@ -235,7 +322,8 @@ class Ingester:
 
     def parameterize(self) -> dict:
         """
-        Parameterizes the submission data for ingestion.
+        Parameterizes the submission data for ingestion, from the prepared `self.*` parts.
+        manage_ingest() uses the equivalent, memoized build_params(); this remains the reference implementation.
         """
         log.debug('parameterize() called')
         ## prep data ------------------------------------------------
@@ -243,7 +331,7 @@ class Ingester:
         rights_param = json.dumps({'parameters': self.rights})
         ir_param = json.dumps({'parameters': self.ir})
         rels_param = json.dumps(self.rels)
-        file_param = json.dumps([self.file_data])  # bdr-api requires list
+        file_param = json.dumps([self.file_data, *self.supplementary_file_data])  # bdr-api requires list; primary first
 
         ## assemble main params -------------------------------------
         params = {}
@@ -261,13 +349,86 @@ class Ingester:
         log.debug(f'params: {pprint.pformat(params)}')
         return params
 
+    def get_shared_params(self, app_config, visibility: str) -> dict:
+        """
+        Returns the serialized params that are identical for every submission of an app and visibility --
+        rels, and permission_ids -- plus the additional-rights string; building them on first use.
+        Memoized per Ingester instance, ie, per ingest-batch, so config-changes are picked up by the next batch.
+        Called by build_params().
+        """
+        key: tuple = (app_config.pk, visibility)
+        if key not in self.shared_params:
+            additional_rights: str = self.prepare_rights('', visibility)['additional_rights']
+            rels: dict = self.prepare_rels(app_config.temp_config_json)
+            self.shared_params[key] = {
+                'additional_rights': additional_rights,
+                'rels': json.dumps(rels),
+                'permission_ids': json.dumps([settings.BDR_MANAGER_GROUP]),
+            }
+        return self.shared_params[key]
+
+    def build_params(self, submission: Submission) -> dict:
+        """
+        Returns the same params as parameterize(), serializing only the per-item mods, rights, ir and file-data;
+        the rest comes from get_shared_params().
+        Expects `self.mods`, `self.file_data` and `self.supplementary_file_data` to be prepared.
+        Called by manage_ingest().
+        """
+        shared: dict = self.get_shared_params(submission.app, submission.visibility_options)
+        ir: dict = {'depositor_eppn': submission.student_eppn, 'depositor_email': submission.student_email}
+        params = {
+            'mods': json.dumps({'xml_data': self.mods}),
+            'rights': json.dumps(
+                {'parameters': {'owner_id': submission.student_eppn, 'additional_rights': shared['additional_rights']}}
+            ),
+            'ir': json.dumps({'parameters': ir}),
+            'rels': shared['rels'],
+            'content_streams': json.dumps([self.file_data, *self.supplementary_file_data]),  # primary first
+            'permission_ids': shared['permission_ids'],
+            'agent_name': 'BDR_UPLOAD_HUB',
+        }
+        return params
+
+    def get_http_client(self) -> httpx.Client:
+        """
+        Returns this Ingester's http-client, so a batch re-uses one keep-alive connection to the BDR-API.
+        Closed by close().
+        """
+        if self.http_client is None:
+            self.http_client = httpx.Client()
+        return self.http_client
+
+    def close(self) -> None:
+        if self.http_client is not None:
+            self.http_client.close()
+            self.http_client = None
+
     def post(self, params) -> tuple[str | None, str | None]:
         """
         Posts the submission to the BDR for ingestion.
+        Retries, with backoff, only where the item can't have been created: connection-failures, and 503s.
         """
         log.debug('post called')
         error_message = ''
-        resp = httpx.post(settings.BDR_PRIVATE_API_ROOT_URL, data=params)
+        retries: int = settings.BDR_POST_RETRIES
+        for attempt in range(retries + 1):
+            try:
+                with metrics.BDR_POST_SECONDS.time():
+                    resp = self.get_http_client().post(settings.BDR_PRIVATE_API_ROOT_URL, data=params)
+            except httpx.ConnectError:
+                if attempt == retries:
+                    raise
+                log.warning(f'bdr-api connect-error; retry ``{attempt + 1}`` of ``{retries}``')
+                metrics.BDR_POST_RETRIES.inc(reason='connect_error')
+                time.sleep(settings.BDR_POST_RETRY_BACKOFF_SECONDS * 2**attempt)
+                continue
+            metrics.BDR_POST_RESPONSES.inc(status_code=str(resp.status_code))
+            if resp.status_code in RETRYABLE_STATUS_CODES and attempt < retries:
+                log.warning(f'bdr-api ``{resp.status_code}``; retry ``{attempt + 1}`` of ``{retries}``')
+                metrics.BDR_POST_RETRIES.inc(reason=str(resp.status_code))
+                time.sleep(settings.BDR_POST_RETRY_BACKOFF_SECONDS * 2**attempt)
+                continue
+            break
         log.debug(f'type(resp), ``{type(resp)}``; resp.status_code, ``{resp.status_code}``')
         if resp.status_code == 200:
             data_dict = resp.json()
@@ -0,0 +1,214 @@
+"""
+Malware-scanning stage between upload and ingest.
+
+Flow:
+- With a scanner configured (settings `MALWARE_SCANNER`), student_confirm() and the manifest-importer create
+  Submissions as `scanning` rather than `ready_to_ingest` (see initial_status()); the upload-request itself does
+  no scanning, so isn't slowed.
+- The `scan_uploads` management command (run it from cron, or with `--interval` as a simple daemon) picks up
+  `scanning` submissions in batches, and streams each distinct staged file -- primary and supplementary -- to the
+  scanner, `MALWARE_SCAN_WORKERS` at a time.
+- A submission whose files are all clean becomes `ready_to_ingest`; one with any file found infected becomes
+  `quarantined`, with the findings in `scan_message`. Only `ready_to_ingest` submissions can be ingested.
+- A file that can't be scanned (scanner down, file missing) leaves its submission `scanning`, backing off:
+  it's skipped until `scan_next_at`, `MALWARE_SCAN_RETRY_MINUTES` after the first failure, doubling with each
+  further one. After `MALWARE_SCAN_MAX_ATTEMPTS` failures it becomes `scan_failed`, with the errors in
+  `scan_message`, for staff to look into, and re-queue from the admin.
+
+Notes:
+- Scanners: `clamd` (a ClamAV daemon, or anything speaking its INSTREAM protocol; see lib/clamd_client.py), or
+  `none`, which skips the stage. loadtest/clamd_standin.py is a local stand-in, for tests and load-runs.
+- With object-storage staging, each file is fetched into a scratch-directory in MEDIA_ROOT first.
+- Status-updates are conditional on the submission still being `scanning`, so a concurrent staff edit isn't undone.
+
+Called by the `scan_uploads` management command; initial_status() by views.create_submission() and
+lib/manifest_importer.py.
+"""
+
+import datetime
+import logging
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import httpx
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db.models import Prefetch, Q
+from django.utils import timezone
+
+from bdr_uploader_hub_app.lib import metrics, staging_backends, staging_store
+from bdr_uploader_hub_app.lib.clamd_client import ClamdClient, ClamdError
+from bdr_uploader_hub_app.lib.s3_client import S3Error
+from bdr_uploader_hub_app.models import Submission, SubmissionFile
+
+log = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE: int = 50
+
+
+class ScanningUnavailable(Exception):
+    """
+    Raised when there are submissions to scan, but no scanner is configured.
+    """
+
+
+def get_scanner() -> ClamdClient | None:
+    """
+    Returns the configured scanner, or None for `none`.
+    """
+    scanner_name: str = getattr(settings, 'MALWARE_SCANNER', 'none') or 'none'
+    if scanner_name == 'none':
+        return None
+    if scanner_name != 'clamd':
+        raise ImproperlyConfigured(f'unknown MALWARE_SCANNER, ``{scanner_name}``; use `clamd` or `none`')
+    return ClamdClient(settings.MALWARE_SCAN_CLAMD_ADDRESS, timeout=settings.MALWARE_SCAN_TIMEOUT_SECONDS)
+
+
+def initial_status() -> str:
+    """
+    Returns the status new Submissions start with: `scanning`, or `ready_to_ingest` when scanning is off.
+    """
+    return 'ready_to_ingest' if get_scanner() is None else 'scanning'
+
+
+def select_scanning(batch_size: int) -> list[Submission]:
+    """
+    Returns the oldest `scanning` submissions, skipping any still backing off after a failed scan.
+    """
+    submissions = (
+        Submission.objects.filter(status='scanning')
+        .filter(Q(scan_next_at__isnull=True) | Q(scan_next_at__lte=timezone.now()))
+        .only('id', 'staged_file_name', 'original_file_name', 'status', 'scan_attempts')
+        .prefetch_related(
+            Prefetch(
+                'supplementary_files',
+                queryset=SubmissionFile.objects.only('submission_id', 'staged_file_name', 'original_file_name'),
+            )
+        )
+        .order_by('created_at')
+    )
+    return list(submissions[:batch_size])
+
+
+def staged_files(submission: Submission) -> list[tuple[str, str]]:
+    """
+    Returns the submission's (staged_file_name, original_file_name) pairs, primary first.
+    """
+    files: list[tuple[str, str]] = []
+    if submission.staged_file_name:
+        files.append((submission.staged_file_name, submission.original_file_name or submission.staged_file_name))
+    files.extend(
+        (sub_file.staged_file_name, sub_file.original_file_name) for sub_file in submission.supplementary_files.all()
+    )
+    return files
+
+
+def scan_staged_file(scanner: ClamdClient, name: str, scratch_dir: str) -> tuple[str | None, str | None]:
+    """
+    Returns (signature-found, error); both None means clean.
+    """
+    backend = staging_backends.get_backend()
+    try:
+        if backend.is_local:
+            path: Path = staging_store.find_blob(name)
+            if not path.is_file():
+                return (None, 'missing')
+        else:
+            path = Path(scratch_dir, name)
+            backend.fetch(staging_store.blob_key(name), path)
+        start: float = time.monotonic()
+        signature: str | None = scanner.scan_file(path)
+        metrics.MALWARE_SCAN_SECONDS.observe(time.monotonic() - start)
+        metrics.MALWARE_SCAN_BYTES.inc(path.stat().st_size)
+        if not backend.is_local:
+            path.unlink()
+        return (signature, None)
+    except (ClamdError, OSError, S3Error, httpx.HTTPError) as e:
+        log.warning(f'could not scan ``{name}``; {e}')
+        return (None, str(e))
+
+
+def record_failure(submission: Submission, errors: list[str], scanned_at: datetime.datetime) -> str:
+    """
+    Counts a failed try, and sets the back-off -- or, after the last allowed try, marks the submission `scan_failed`.
+    Returns the outcome, `error` or `scan_failed`.
+    """
+    attempts: int = submission.scan_attempts + 1
+    pending = Submission.objects.filter(id=submission.id, status='scanning')
+    if attempts >= settings.MALWARE_SCAN_MAX_ATTEMPTS:
+        log.warning(f'giving up scanning submission ``{submission.id}`` after ``{attempts}`` tries; {"; ".join(errors)}')
+        pending.update(
+            status='scan_failed',
+            scan_attempts=attempts,
+            scan_next_at=None,
+            scanned_at=scanned_at,
+            scan_message='; '.join(errors),
+        )
+        metrics.record_status_transition('scanning', 'scan_failed')
+        return 'scan_failed'
+    delay = datetime.timedelta(minutes=settings.MALWARE_SCAN_RETRY_MINUTES * 2 ** (attempts - 1))
+    pending.update(scan_attempts=attempts, scan_next_at=scanned_at + delay, scan_message='; '.join(errors))
+    return 'error'
+
+
+def scan_pending(batch_size: int = DEFAULT_BATCH_SIZE, workers: int | None = None) -> dict[str, int]:
+    """
+    Scans a batch of `scanning` Submissions' files; returns a count per outcome -- `clean`, `quarantined`, `error`
+    (still `scanning`, backing off), and `scan_failed` (out of tries) -- or an empty dict when nothing's waiting.
+    `workers` defaults to settings `MALWARE_SCAN_WORKERS`; 0 scans in-process, one file at a time.
+    """
+    submissions: list[Submission] = select_scanning(batch_size)
+    if not submissions:
+        return {}
+    scanner: ClamdClient | None = get_scanner()
+    if scanner is None:
+        raise ScanningUnavailable('submissions are waiting to be scanned, but MALWARE_SCANNER is `none`')
+    workers = settings.MALWARE_SCAN_WORKERS if workers is None else workers
+    names: list[str] = sorted({name for submission in submissions for (name, _original) in staged_files(submission)})
+    log.info(f'scanning ``{len(names)}`` files for ``{len(submissions)}`` submissions')
+    with tempfile.TemporaryDirectory(prefix='.scanning-', dir=staging_store.get_staging_dir()) as scratch_dir:
+        if workers > 0 and len(names) > 1:
+            with ThreadPoolExecutor(max_workers=workers) as executor:  # i/o-bound; the scanning is clamd's
+                outcomes = list(executor.map(lambda name: scan_staged_file(scanner, name, scratch_dir), names))
+        else:
+            outcomes = [scan_staged_file(scanner, name, scratch_dir) for name in names]
+    results: dict[str, tuple[str | None, str | None]] = dict(zip(names, outcomes))
+    for signature, error in outcomes:
+        metrics.MALWARE_SCAN_RESULTS.inc(result='error' if error else 'infected' if signature else 'clean')
+    summary: dict[str, int] = {}
+    scanned_at = timezone.now()
+    clean_ids: list = []
+    for submission in submissions:
+        findings: list[str] = []
+        errors: list[str] = []
+        for name, original_name in staged_files(submission):
+            (signature, error) = results[name]
+            if signature:
+                findings.append(f'{original_name}: {signature}')
+            elif error:
+                errors.append(f'{original_name}: {error}')
+        if findings:
+            log.warning(f'quarantining submission ``{submission.id}``; {"; ".join(findings)}')
+            Submission.objects.filter(id=submission.id, status='scanning').update(
+                status='quarantined',
+                scanned_at=scanned_at,
+                scan_message='; '.join(findings),
+                scan_attempts=0,
+                scan_next_at=None,
+            )
+            metrics.record_status_transition('scanning', 'quarantined')
+            outcome = 'quarantined'
+        elif errors:
+            outcome = record_failure(submission, errors, scanned_at)
+        else:
+            clean_ids.append(submission.id)
+            outcome = 'clean'
+        summary[outcome] = summary.get(outcome, 0) + 1
+    if clean_ids:
+        cleared: int = Submission.objects.filter(id__in=clean_ids, status='scanning').update(
+            status='ready_to_ingest', scanned_at=scanned_at, scan_message='', scan_attempts=0, scan_next_at=None
+        )
+        metrics.record_status_transition('scanning', 'ready_to_ingest', count=cleared)
+    return summary
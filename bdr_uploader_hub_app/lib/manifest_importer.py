@@ -0,0 +1,248 @@
+"""
+Bulk-import of Submissions from a CSV or JSON manifest plus a directory of files.
+
+Flow:
+- read_manifest() loads the rows.
+- validate_rows() checks each row against the target AppConfig's student-form rules (built once, via
+  make_student_form_class()), and checks that the row's file exists inside the files-directory.
+- stage_rows() stages-and-checksums the valid rows' files on a bounded thread-pool.
+- create_submissions() bulk-creates the Submissions, in batches; as `scanning` when malware-scanning is on
+  (see lib/malware_scanner.py), else `ready_to_ingest`.
+- Every row gets a result-dict, so callers can write a per-row report.
+
+Called by the `import_manifest` management command, and by the SubmissionAdmin import view.
+"""
+
+import csv
+import io
+import json
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Iterable
+
+from django import forms as django_forms
+
+from bdr_uploader_hub_app.forms.student_form import make_student_form_class
+from bdr_uploader_hub_app.lib import malware_scanner, metrics, notification_handler, uploaded_file_handler
+from bdr_uploader_hub_app.models import AppConfig, Submission
+
+log = logging.getLogger(__name__)
+
+## manifest columns copied onto the Submission (after form-validation)
+FORM_FIELDS: tuple[str, ...] = (
+    'title',
+    'abstract',
+    'advisors_and_readers',
+    'team_members',
+    'faculty_mentors',
+    'authors',
+    'department',
+    'research_program',
+    'license_options',
+    'visibility_options',
+    'keywords',
+    'concentrations',
+    'degrees',
+)
+REQUIRED_COLUMNS: tuple[str, ...] = ('file', 'student_eppn', 'student_email')
+REPORT_COLUMNS: tuple[str, ...] = ('row', 'file', 'status', 'submission_id', 'errors')
+
+DEFAULT_WORKERS: int = 4
+DEFAULT_BATCH_SIZE: int = 200
+
+
+def read_manifest(manifest_text: str, manifest_format: str) -> list[dict[str, str]]:
+    """
+    Parses a `csv` (header-row) or `json` (list of objects) manifest into a list of row-dicts.
+    """
+    log.debug(f'reading manifest; format, ``{manifest_format}``')
+    if manifest_format == 'csv':
+        reader = csv.DictReader(io.StringIO(manifest_text))
+        rows: list[dict[str, str]] = [dict(row) for row in reader]
+    elif manifest_format == 'json':
+        data = json.loads(manifest_text)
+        if not isinstance(data, list):
+            raise ValueError('json manifest must be a list of objects')
+        rows = [{key: '' if value is None else str(value) for key, value in item.items()} for item in data]
+    else:
+        raise ValueError(f'unknown manifest format, ``{manifest_format}``')
+    log.debug(f'manifest rows, ``{len(rows)}``')
+    return rows
+
+
+def guess_manifest_format(file_name: str) -> str:
+    return 'json' if file_name.lower().endswith('.json') else 'csv'
+
+
+def validate_rows(app_config: AppConfig, rows: list[dict[str, str]], files_dir: Path) -> list[dict[str, Any]]:
+    """
+    Validates each row against the app's student-form rules, and resolves its file.
+    Returns one result-dict per row; valid rows have status `valid` and carry `cleaned_data` and `source_path`.
+    """
+    config_data: dict = app_config.temp_config_json
+    StudentUploadForm: type[django_forms.Form] = make_student_form_class(config_data)  # built once for all rows
+    files_root: Path = files_dir.resolve()
+    results: list[dict[str, Any]] = []
+    for index, row in enumerate(rows, start=1):
+        result: dict[str, Any] = {'row': index, 'file': row.get('file', ''), 'status': 'valid', 'errors': []}
+        ## required columns -----------------------------------------
+        for column in REQUIRED_COLUMNS:
+            if not (row.get(column) or '').strip():
+                result['errors'].append(f'missing `{column}`')
+        ## form-rules -----------------------------------------------
+        data: dict[str, str] = {field: (row.get(field) or '').strip() for field in FORM_FIELDS}
+        if not data['license_options']:
+            data['license_options'] = config_data.get('license_default') or ''
+        if not data['visibility_options']:
+            data['visibility_options'] = config_data.get('visibility_default') or ''
+        form = StudentUploadForm(data=data)
+        form.fields.pop('main_file', None)  # the file comes from the files-directory, checked below
+        form.fields.pop('supplementary_files', None)
+        if not form.is_valid():
+            for field_name, field_errors in form.errors.items():
+                result['errors'].extend(f'{field_name}: {error}' for error in field_errors)
+        ## file -----------------------------------------------------
+        if row.get('file'):
+            source_path: Path = (files_root / row['file']).resolve()
+            if not source_path.is_relative_to(files_root):
+                result['errors'].append('file is outside the files-directory')
+            elif not source_path.is_file():
+                result['errors'].append(f'file not found, ``{row["file"]}``')
+            else:
+                result['source_path'] = source_path
+        ## finalize -------------------------------------------------
+        if result['errors']:
+            result['status'] = 'error'
+        else:
+            result['cleaned_data'] = form.cleaned_data
+            result['student_eppn'] = row['student_eppn'].strip()
+            result['student_email'] = row['student_email'].strip()
+        results.append(result)
+    return results
+
+
+def stage_row_file(result: dict[str, Any]) -> dict[str, Any]:
+    """
+    Stages the row's file (duplicates share one staged copy) and checksums it.
+    Errors are recorded on the row rather than raised.
+    Called by stage_rows(), on a worker thread.
+    """
+    try:
+        (staged_path, digests) = uploaded_file_handler.stage_local_file(result['source_path'])
+        result['staged_path'] = staged_path
+        result['checksum_type'] = 'md5'
+        result['checksum'] = digests['md5']
+    except Exception as e:
+        log.exception(f'problem staging row ``{result["row"]}``')
+        result['status'] = 'error'
+        result['errors'].append(f'staging failed: {e}')
+    return result
+
+
+def stage_rows(results: list[dict[str, Any]], workers: int = DEFAULT_WORKERS) -> None:
+    """
+    Stages and checksums all valid rows' files concurrently; the work is i/o-bound, so threads suffice.
+    """
+    valid_results: list[dict[str, Any]] = [result for result in results if result['status'] == 'valid']
+    log.debug(f'staging ``{len(valid_results)}`` files with ``{workers}`` workers')
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        list(executor.map(stage_row_file, valid_results))
+
+
+def build_submission(app_config: AppConfig, result: dict[str, Any], status: str) -> Submission:
+    cleaned_data: dict = result['cleaned_data']
+    staged_path: Path = result['staged_path']
+    temp_submission_json: dict = {
+        **cleaned_data,
+        'original_file_name': Path(result['file']).name,
+        'checksum_type': result['checksum_type'],
+        'checksum': result['checksum'],
+        'staged_file_path': str(staged_path),
+        'imported_from_manifest': True,
+    }
+    return Submission(
+        app=app_config,
+        student_eppn=result['student_eppn'],
+        student_email=result['student_email'],
+        **{field: cleaned_data.get(field) for field in FORM_FIELDS},
+        primary_file=str(staged_path),
+        original_file_name=Path(result['file']).name,
+        staged_file_name=staged_path.name,
+        checksum_type=result['checksum_type'],
+        checksum=result['checksum'],
+        temp_submission_json=temp_submission_json,
+        status=status,
+    )
+
+
+def _batched(items: list, size: int) -> Iterable[list]:
+    for start in range(0, len(items), size):
+        yield items[start : start + size]
+
+
+def create_submissions(app_config: AppConfig, results: list[dict[str, Any]], batch_size: int = DEFAULT_BATCH_SIZE) -> int:
+    """
+    Bulk-creates Submissions for the successfully-staged rows; returns the number created.
+    """
+    staged_results: list[dict[str, Any]] = [result for result in results if result['status'] == 'valid']
+    created_count: int = 0
+    status: str = malware_scanner.initial_status()
+    for batch in _batched(staged_results, batch_size):
+        submissions: list[Submission] = [build_submission(app_config, result, status) for result in batch]
+        Submission.objects.bulk_create(submissions)
+        notification_handler.queue_submissions_received(app_config, submissions)
+        for result, submission in zip(batch, submissions):
+            result['status'] = 'created'
+            result['submission_id'] = str(submission.id)
+        created_count += len(submissions)
+        log.debug(f'bulk-created ``{len(submissions)}`` submissions')
+    metrics.record_status_transition(None, status, count=created_count)
+    return created_count
+
+
+def import_manifest(
+    app_config: AppConfig,
+    rows: list[dict[str, str]],
+    files_dir: Path,
+    workers: int = DEFAULT_WORKERS,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    dry_run: bool = False,
+) -> list[dict[str, Any]]:
+    """
+    Manages validation, staging and creation; returns the per-row results.
+    With `dry_run`, only validates.
+    """
+    log.info(f'importing ``{len(rows)}`` manifest rows into app ``{app_config.slug}``; dry_run, ``{dry_run}``')
+    results: list[dict[str, Any]] = validate_rows(app_config, rows, files_dir)
+    if not dry_run:
+        stage_rows(results, workers)
+        create_submissions(app_config, results, batch_size)
+    return results
+
+
+def summarize(results: list[dict[str, Any]]) -> dict[str, int]:
+    summary: dict[str, int] = {}
+    for result in results:
+        summary[result['status']] = summary.get(result['status'], 0) + 1
+    return summary
+
+
+def make_report_csv(results: list[dict[str, Any]]) -> str:
+    """
+    Returns the per-row report as csv text.
+    """
+    output = io.StringIO()
+    writer = csv.DictWriter(output, fieldnames=REPORT_COLUMNS)
+    writer.writeheader()
+    for result in results:
+        writer.writerow(
+            {
+                'row': result['row'],
+                'file': result['file'],
+                'status': result['status'],
+                'submission_id': result.get('submission_id', ''),
+                'errors': ' | '.join(result['errors']),
+            }
+        )
+    return output.getvalue()
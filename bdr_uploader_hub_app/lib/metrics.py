@@ -0,0 +1,424 @@
+"""
+Lightweight, in-process metrics, rendered in the Prometheus text exposition format.
+
+Notes:
+- Deliberately dependency-free; recording a sample is a dict-lookup and a few additions under a lock,
+  so instrumenting hot paths costs microseconds.
+- Each server process keeps its own registry; when running multiple workers, a scrape reflects the
+  worker that answered it. (Configure the scraper to hit each worker, or run a single metrics worker.)
+- Management commands (scans, derivatives, fixity, notifications, ...) run in their own processes, so they publish
+  their counters and histograms to the `WorkerMetrics` table, one row per command and host, via publishing();
+  render() adds the rows into the scrape. A command resumes its counts from its row, so they keep climbing across
+  cron-runs rather than resetting each time. Gauges are computed by the web process, at scrape-time.
+- Served by views.metrics_view().
+"""
+
+import bisect
+import logging
+import socket
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Iterator
+
+log = logging.getLogger(__name__)
+
+
+## default buckets --------------------------------------------------
+DURATION_BUCKETS: tuple[float, ...] = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0)
+BYTES_BUCKETS: tuple[float, ...] = tuple(float(1024 * 4**i) for i in range(12))  # 1KB .. 4GB
+
+
+def _format_labels(label_names: tuple[str, ...], label_values: tuple[str, ...], extra: str = '') -> str:
+    """
+    Formats a label-set like `{view="info",method="GET"}`.
+    Called by the metric classes' collect() methods.
+    """
+    pairs: list[str] = []
+    for name, value in zip(label_names, label_values):
+        escaped = str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        pairs.append(f'{name}="{escaped}"')
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    """
+    Shared plumbing for the metric types below.
+    """
+
+    metric_type: str = ''
+
+    def __init__(self, name: str, documentation: str, label_names: tuple[str, ...] = (), register: bool = True):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = label_names
+        self._lock = threading.Lock()
+        if register:
+            REGISTRY.register(self)
+
+    def _key(self, labels: dict[str, str]) -> tuple[str, ...]:
+        return tuple(str(labels.get(name, '')) for name in self.label_names)
+
+    def header(self) -> list[str]:
+        return [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.metric_type}']
+
+
+class Counter(_Metric):
+    """
+    Monotonically increasing count.
+    """
+
+    metric_type = 'counter'
+
+    def __init__(self, name: str, documentation: str, label_names: tuple[str, ...] = (), register: bool = True):
+        super().__init__(name, documentation, label_names, register)
+        self._values: dict[tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def snapshot(self) -> list:
+        """
+        Returns the values as json-able `[label-values, value]` pairs; see merge().
+        """
+        with self._lock:
+            return [[list(key), value] for key, value in self._values.items()]
+
+    def merge(self, snapshot: list) -> None:
+        with self._lock:
+            for key, value in snapshot:
+                self._values[tuple(key)] = self._values.get(tuple(key), 0.0) + value
+
+    def clone(self) -> 'Counter':
+        return Counter(self.name, self.documentation, self.label_names, register=False)
+
+    def collect(self) -> list[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        lines = self.header()
+        for key, value in items:
+            lines.append(f'{self.name}{_format_labels(self.label_names, key)} {_format_value(value)}')
+        return lines
+
+
+class Gauge(_Metric):
+    """
+    Point-in-time value; optionally computed at scrape-time via a callback.
+    """
+
+    metric_type = 'gauge'
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        label_names: tuple[str, ...] = (),
+        callback: Callable[[], float] | None = None,
+        register: bool = True,
+    ):
+        super().__init__(name, documentation, label_names, register)
+        self._values: dict[tuple[str, ...], float] = {}
+        self.callback = callback
+
+    def set(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels: str) -> None:
+        self.inc(-amount, **labels)
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def collect(self) -> list[str]:
+        if self.callback is not None:
+            try:
+                self.set(float(self.callback()))
+            except Exception:
+                log.exception(f'problem computing gauge ``{self.name}``')
+        with self._lock:
+            items = sorted(self._values.items())
+        lines = self.header()
+        for key, value in items:
+            lines.append(f'{self.name}{_format_labels(self.label_names, key)} {_format_value(value)}')
+        return lines
+
+
+class Histogram(_Metric):
+    """
+    Bucketed observations, with `_sum` and `_count`.
+    """
+
+    metric_type = 'histogram'
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        label_names: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DURATION_BUCKETS,
+        register: bool = True,
+    ):
+        super().__init__(name, documentation, label_names, register)
+        self.buckets: tuple[float, ...] = tuple(sorted(buckets))
+        self._counts: dict[tuple[str, ...], list[int]] = {}  # per-bucket (non-cumulative) counts, plus +Inf
+        self._sums: dict[tuple[str, ...], float] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts = self._counts.get(key)
+            if counts is None:
+                counts = [0] * (len(self.buckets) + 1)
+                self._counts[key] = counts
+            counts[index] += 1
+            self._sums[key] = self._sums.get(key, 0.0) + value
+
+    @contextmanager
+    def time(self, **labels: str) -> Iterator[None]:
+        """
+        Observes the wall-clock duration of the wrapped block, in seconds.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def count(self, **labels: str) -> int:
+        return sum(self._counts.get(self._key(labels), []))
+
+    def snapshot(self) -> list:
+        """
+        Returns the observations as json-able `[label-values, bucket-counts, sum]` triples; see merge().
+        """
+        with self._lock:
+            return [[list(key), list(counts), self._sums[key]] for key, counts in self._counts.items()]
+
+    def merge(self, snapshot: list) -> None:
+        with self._lock:
+            for key, counts, total in snapshot:
+                if len(counts) != len(self.buckets) + 1:
+                    log.debug(f'skipping ``{self.name}`` observations recorded with other buckets')
+                    continue
+                current = self._counts.setdefault(tuple(key), [0] * (len(self.buckets) + 1))
+                for index, bucket_count in enumerate(counts):
+                    current[index] += bucket_count
+                self._sums[tuple(key)] = self._sums.get(tuple(key), 0.0) + total
+
+    def clone(self) -> 'Histogram':
+        return Histogram(self.name, self.documentation, self.label_names, self.buckets, register=False)
+
+    def collect(self) -> list[str]:
+        with self._lock:
+            items = sorted((key, list(counts), self._sums[key]) for key, counts in self._counts.items())
+        lines = self.header()
+        for key, counts, total in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += bucket_count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f'{self.name}_bucket{_format_labels(self.label_names, key, le)} {cumulative}')
+            lines.append(f'{self.name}_sum{_format_labels(self.label_names, key)} {_format_value(total)}')
+            lines.append(f'{self.name}_count{_format_labels(self.label_names, key)} {cumulative}')
+        return lines
+
+
+class Registry:
+    """
+    Holds all metrics; render() produces the `/metrics/` response body.
+    """
+
+    def __init__(self):
+        self._metrics: list[_Metric] = []
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> None:
+        with self._lock:
+            self._metrics.append(metric)
+
+    def snapshot(self) -> dict[str, list]:
+        """
+        Returns the recorded counters and histograms, by name; gauges are left to the web process.
+        """
+        snapshot: dict[str, list] = {}
+        for metric in list(self._metrics):
+            if isinstance(metric, (Counter, Histogram)) and (values := metric.snapshot()):
+                snapshot[metric.name] = values
+        return snapshot
+
+    def merge(self, snapshot: dict[str, list]) -> None:
+        for metric in list(self._metrics):
+            if isinstance(metric, (Counter, Histogram)) and metric.name in snapshot:
+                metric.merge(snapshot[metric.name])
+
+    def render(self, snapshots: list[dict[str, list]] | None = None) -> str:
+        """
+        Renders every metric, with the counters and histograms of `snapshots` (other processes') added in.
+        """
+        lines: list[str] = []
+        for metric in list(self._metrics):
+            if snapshots and isinstance(metric, (Counter, Histogram)):
+                combined = metric.clone()
+                combined.merge(metric.snapshot())
+                for snapshot in snapshots:
+                    combined.merge(snapshot.get(metric.name, []))
+                metric = combined
+            lines.extend(metric.collect())
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+
+
+def _ingest_queue_depth() -> float:
+    """
+    Computed at scrape-time; one indexed count-query (`Submission.status` has a db-index).
+    """
+    from bdr_uploader_hub_app.models import Submission
+
+    return Submission.objects.filter(status='ready_to_ingest').count()
+
+
+def _scan_queue_depth() -> float:
+    from bdr_uploader_hub_app.models import Submission
+
+    return Submission.objects.filter(status='scanning').count()
+
+
+# -------------------------------------------------------------------
+# the app's metrics
+# -------------------------------------------------------------------
+
+UPLOAD_BYTES = Histogram('bdr_hub_upload_bytes', 'Size of staged uploads, in bytes.', buckets=BYTES_BUCKETS)
+UPLOAD_SECONDS = Histogram('bdr_hub_upload_staging_seconds', 'Time to stage an upload into MEDIA_ROOT.')
+UPLOAD_REJECTIONS = Counter(
+    'bdr_hub_upload_rejections_total', "Uploads rejected by the app's upload-policy, by reason.", ('reason',)
+)
+UPLOAD_PROGRESS_WRITES = Counter('bdr_hub_upload_progress_writes_total', 'Upload-progress records written to the cache.')
+STAGING_DEDUP_HITS = Counter('bdr_hub_staging_dedup_hits_total', 'Staged files whose content was already staged.')
+STAGING_DEDUP_BYTES = Counter(
+    'bdr_hub_staging_dedup_bytes_total', 'Bytes not stored because the content was already staged.'
+)
+STAGING_REAPED_FILES = Counter(
+    'bdr_hub_staging_reaped_files_total', 'Staged files removed by the reaper, by reason.', ('reason',)
+)
+STAGING_REAPED_BYTES = Counter('bdr_hub_staging_reaped_bytes_total', 'Bytes freed by the staging reaper.')
+OBJECT_STORE_SECONDS = Histogram(
+    'bdr_hub_object_store_seconds', 'Time to upload or download a staged file, with object-storage.', ('operation',)
+)
+OBJECT_STORE_BYTES = Counter(
+    'bdr_hub_object_store_bytes_total', 'Bytes uploaded or downloaded, with object-storage.', ('operation',)
+)
+CHECKSUM_SECONDS = Histogram('bdr_hub_checksum_seconds', 'Time to checksum a staged file.')
+MODS_SECONDS = Histogram('bdr_hub_mods_prepare_seconds', 'Time spent in ModsMaker.prepare_mods().')
+FIXITY_RESULTS = Counter('bdr_hub_fixity_results_total', 'Fixity-check results, per submission.', ('result',))
+DERIVATIVE_RESULTS = Counter('bdr_hub_derivative_results_total', 'Derivative-making results, per staged file.', ('result',))
+MALWARE_SCAN_RESULTS = Counter('bdr_hub_malware_scan_results_total', 'Malware-scan results, per staged file.', ('result',))
+MALWARE_SCAN_SECONDS = Histogram('bdr_hub_malware_scan_seconds', 'Time to stream a staged file to the scanner.')
+MALWARE_SCAN_BYTES = Counter('bdr_hub_malware_scan_bytes_total', 'Bytes streamed to the malware-scanner.')
+DERIVATIVE_SECONDS = Histogram('bdr_hub_derivative_seconds', "Time to make a staged file's derivatives.")
+HANDOFF_SECONDS = Histogram('bdr_hub_handoff_seconds', 'Time to place and verify a file for the BDR-API.')
+BDR_POST_SECONDS = Histogram('bdr_hub_bdr_post_seconds', 'Latency of the BDR private-API ingest post.')
+BDR_POST_RESPONSES = Counter(
+    'bdr_hub_bdr_post_responses_total', 'BDR private-API responses, by status code.', ('status_code',)
+)
+BDR_POST_RETRIES = Counter('bdr_hub_bdr_post_retries_total', 'BDR private-API post retries, by reason.', ('reason',))
+SUBMISSION_TRANSITIONS = Counter(
+    'bdr_hub_submission_status_transitions_total', 'Submission status transitions.', ('from_status', 'to_status')
+)
+INGEST_QUEUE_DEPTH = Gauge(
+    'bdr_hub_ingest_queue_depth', 'Submissions with status `ready_to_ingest`.', callback=_ingest_queue_depth
+)
+SCAN_QUEUE_DEPTH = Gauge('bdr_hub_scan_queue_depth', 'Submissions with status `scanning`.', callback=_scan_queue_depth)
+NOTIFICATIONS_SENT = Counter('bdr_hub_notification_emails_total', 'Notification emails, by send result.', ('result',))
+VIEW_SECONDS = Histogram('bdr_hub_view_seconds', 'Request duration, by view.', ('view', 'method', 'status'))
+
+
+def record_status_transition(from_status: str | None, to_status: str, count: int = 1) -> None:
+    """
+    Counts a Submission status change.
+    Called wherever a Submission's status is set.
+    """
+    SUBMISSION_TRANSITIONS.inc(count, from_status=from_status or 'none', to_status=to_status)
+
+
+## the WorkerMetrics rows this process has published; their counts are already in REGISTRY
+_published_sources: set[str] = set()
+_current_source: str | None = None
+
+
+@contextmanager
+def publishing(command_name: str) -> Iterator[None]:
+    """
+    Wraps a management command's work: resumes the command's counts from its last published row, and publishes
+    them when the work ends, however it ends. Long-running (`--interval`) commands call publish() after each pass, too.
+    """
+    global _current_source
+    from bdr_uploader_hub_app.models import WorkerMetrics
+
+    source: str = f'{command_name}@{socket.gethostname()}'
+    if source not in _published_sources:  # resumed once per process, so nothing's counted twice
+        row = WorkerMetrics.objects.filter(source=source).first()
+        if row is not None:
+            REGISTRY.merge(row.data)
+        _published_sources.add(source)
+    _current_source = source
+    try:
+        yield
+    finally:
+        publish()
+        _current_source = None
+
+
+def publish() -> None:
+    """
+    Saves this process's counters and histograms to its WorkerMetrics row; a no-op outside publishing().
+    """
+    from bdr_uploader_hub_app.models import WorkerMetrics
+
+    if _current_source is None:
+        return
+    try:
+        WorkerMetrics.objects.update_or_create(source=_current_source, defaults={'data': REGISTRY.snapshot()})
+    except Exception:  # metrics mustn't fail the command's work
+        log.exception(f'problem publishing metrics for ``{_current_source}``')
+
+
+def worker_snapshots() -> list[dict[str, list]]:
+    """
+    Returns the other processes' published counts; one query, at scrape-time.
+    """
+    from bdr_uploader_hub_app.models import WorkerMetrics
+
+    try:
+        return list(WorkerMetrics.objects.exclude(source__in=_published_sources).values_list('data', flat=True))
+    except Exception:
+        log.exception('problem loading published worker-metrics')
+        return []
+
+
+def render() -> str:
+    return REGISTRY.render(worker_snapshots())
@@ -4,6 +4,7 @@ from django.template.loader import get_template
 from lxml import etree
 from lxml.etree import XMLSyntaxError
 
+from bdr_uploader_hub_app.lib import metrics
 from bdr_uploader_hub_app.models import Submission
 
 log = logging.getLogger(__name__)
@@ -16,6 +17,15 @@ class ModsMaker:
     def prepare_mods(self) -> str:
         """
         Manages the creation of the mods xml file.
+        Timed into the `bdr_hub_mods_prepare_seconds` metric.
+        """
+        with metrics.MODS_SECONDS.time():
+            return self._prepare_mods()
+
+    def _prepare_mods(self) -> str:
+        """
+        Builds, validates, and formats the mods xml.
+        Called by prepare_mods().
         """
         log.debug('prepare_mods called')
         title = self.submission.title
@@ -114,7 +124,7 @@ class ModsMaker:
         ## return the formatted xml ----------------------------------
         return formatted_xml
 
-        ## end def prepare_mods()
+        ## end def _prepare_mods()
 
     def validate_xml(self, xml: str) -> None:
         """
@@ -0,0 +1,185 @@
+"""
+Notification outbox: queues emails during requests, and sends them later, in batches.
+
+Flow:
+- Request-time code (student_confirm, ingest, manifest-import) only bulk-inserts Notification rows,
+  so mail latency never adds to request time.
+- The `send_notifications` worker calls send_pending(), which:
+  - claims a batch of pending rows, marking them `sending`, in one short transaction (skipping rows locked by
+    another worker, where the database supports it) -- no locks or transaction are held while mail is sent,
+  - digests all `submission_received` rows for the same staff-recipient and app into one email, noting each
+    submission's current status (eg, still awaiting its malware-scan) as of send-time,
+  - sends everything over one SMTP connection via `get_connection()` and `send_messages()`,
+  - records each email's rows as `sent` as soon as it's sent, or retries them on later runs, up to MAX_ATTEMPTS,
+    then marks them `failed`; so a crash part-way through re-sends nothing already sent.
+- Rows left `sending` by a crashed worker go back to `pending` after STALE_SENDING_MINUTES.
+"""
+
+import datetime
+import logging
+from collections import defaultdict
+from dataclasses import dataclass, field
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import connection, transaction
+from django.utils import timezone
+
+from bdr_uploader_hub_app.lib import emailer, metrics
+from bdr_uploader_hub_app.models import AppConfig, Notification, Submission
+
+log = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE: int = 100
+MAX_ATTEMPTS: int = 5
+STALE_SENDING_MINUTES: float = 15
+RESULT_FIELDS: list[str] = ['status', 'attempts', 'last_error', 'sent_at']
+
+
+def parse_staff_emails(config_data: dict) -> list[str]:
+    """
+    Returns the app's `staff_to_notify` addresses (stored pipe-separated, as entered in the staff-form).
+    """
+    raw: str = config_data.get('staff_to_notify') or ''
+    return [email.strip() for email in raw.split('|') if email.strip()]
+
+
+def build_ingest_success(submission: Submission) -> Notification:
+    """
+    Returns an unsaved student-notification for a successfully-ingested submission.
+    Called by Ingester.manage_ingest().
+    """
+    (subject, body) = emailer.make_ingest_success_message(submission.title, submission.bdr_url)
+    return Notification(
+        kind='ingest_success',
+        app_id=submission.app_id,
+        submission=submission,
+        recipient=submission.student_email,
+        subject=subject,
+        body=body,
+    )
+
+
+def queue(notifications: list[Notification]) -> None:
+    notifications = [notification for notification in notifications if notification.recipient]
+    Notification.objects.bulk_create(notifications)
+    log.debug(f'queued ``{len(notifications)}`` notifications')
+
+
+def queue_submissions_received(app_config: AppConfig, submissions: list[Submission]) -> None:
+    """
+    Queues one digest-line per staff-recipient per submission; send_pending() combines them.
+    Called by views.student_confirm() and manifest_importer.create_submissions().
+    """
+    staff_emails: list[str] = parse_staff_emails(app_config.temp_config_json)
+    queue(
+        [
+            Notification(
+                kind='submission_received',
+                app=app_config,
+                submission=submission,
+                recipient=staff_email,
+                subject='',  # set on the digest, at send-time
+                body=emailer.make_submission_received_line(submission.title, submission.student_email),
+            )
+            for submission in submissions
+            for staff_email in staff_emails
+        ]
+    )
+
+
+@dataclass
+class Outgoing:
+    message: EmailMessage
+    notifications: list[Notification] = field(default_factory=list)
+
+
+def build_messages(notifications: list[Notification]) -> list[Outgoing]:
+    """
+    Returns one message per student-notification, and one digest per (staff-recipient, app).
+    """
+    app_names: dict = {
+        app.id: app.name for app in AppConfig.objects.filter(id__in={n.app_id for n in notifications if n.app_id})
+    }
+    submission_statuses: dict = dict(
+        Submission.objects.filter(
+            id__in={n.submission_id for n in notifications if n.kind == 'submission_received' and n.submission_id}
+        ).values_list('id', 'status')
+    )
+    outgoing: list[Outgoing] = []
+    digests: dict[tuple, list[Notification]] = defaultdict(list)
+    for notification in notifications:
+        if notification.kind == 'submission_received':
+            digests[(notification.recipient, notification.app_id)].append(notification)
+        else:
+            message = EmailMessage(notification.subject, notification.body, settings.SERVER_EMAIL, [notification.recipient])
+            outgoing.append(Outgoing(message, [notification]))
+    for (recipient, app_id), grouped in digests.items():
+        lines: list[str] = [
+            f'{n.body}; {emailer.describe_submission_status(submission_statuses.get(n.submission_id))}' for n in grouped
+        ]
+        (subject, body) = emailer.make_submission_digest_message(app_names.get(app_id, '(unknown app)'), lines)
+        outgoing.append(Outgoing(EmailMessage(subject, body, settings.SERVER_EMAIL, [recipient]), grouped))
+    return outgoing
+
+
+def claim_pending(batch_size: int) -> list[Notification]:
+    """
+    Marks a batch of pending rows `sending`, in one short transaction, and returns them.
+    Rows left `sending` by a crashed worker are returned to `pending` first.
+    """
+    now = timezone.now()
+    Notification.objects.filter(
+        status='sending', claimed_at__lt=now - datetime.timedelta(minutes=STALE_SENDING_MINUTES)
+    ).update(status='pending')
+    with transaction.atomic():
+        claimed_ids: list = list(
+            Notification.objects.select_for_update(skip_locked=connection.features.has_select_for_update_skip_locked)
+            .filter(status='pending')
+            .order_by('created_at')
+            .values_list('id', flat=True)[:batch_size]
+        )
+        Notification.objects.filter(id__in=claimed_ids, status='pending').update(status='sending', claimed_at=now)
+    ## the timestamp marks this claim's rows, where row-locks can't (sqlite)
+    return list(Notification.objects.filter(id__in=claimed_ids, status='sending', claimed_at=now).order_by('created_at'))
+
+
+def send_pending(batch_size: int = DEFAULT_BATCH_SIZE) -> dict[str, int]:
+    """
+    Sends a batch of pending notifications over one SMTP connection; returns counts of emails `sent` and `failed`.
+    Each email's rows are updated as soon as it's sent, outside any transaction.
+    """
+    summary: dict[str, int] = {'sent': 0, 'failed': 0}
+    notifications: list[Notification] = claim_pending(batch_size)
+    if not notifications:
+        return summary
+    outgoing: list[Outgoing] = build_messages(notifications)
+    unsent_ids: set = {notification.id for notification in notifications}
+    mail_connection = get_connection()
+    try:
+        mail_connection.open()
+        for item in outgoing:
+            try:
+                mail_connection.send_messages([item.message])
+                result, error = 'sent', None
+            except Exception as e:
+                log.exception(f'problem sending notification to ``{item.message.to}``')
+                result, error = 'failed', str(e)
+            for notification in item.notifications:
+                notification.attempts += 1
+                if result == 'sent':
+                    notification.status = 'sent'
+                    notification.sent_at = timezone.now()
+                else:
+                    notification.last_error = error
+                    notification.status = 'failed' if notification.attempts >= MAX_ATTEMPTS else 'pending'
+            Notification.objects.bulk_update(item.notifications, RESULT_FIELDS)
+            unsent_ids -= {notification.id for notification in item.notifications}
+            summary[result] += 1
+            metrics.NOTIFICATIONS_SENT.inc(result=result)
+    finally:
+        mail_connection.close()
+        if unsent_ids:  # eg, the mail-server couldn't be reached; release the rest of the claim
+            Notification.objects.filter(id__in=unsent_ids, status='sending').update(status='pending')
+    log.info(f'notifications: ``{len(notifications)}`` rows; emails, ``{summary}``')
+    return summary
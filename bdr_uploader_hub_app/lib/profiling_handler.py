@@ -0,0 +1,172 @@
+"""
+Per-request profiling, for staff diagnosis of slow views.
+
+Flow:
+- ProfilingMiddleware calls `is_profiling_requested()`; if false, the request is handled normally.
+- Otherwise `profile_request()` runs the rest of the request under cProfile (or pyinstrument, if installed and
+  requested via `?profile=pyinstrument`), while recording every SQL query on every db-connection.
+- The report is written to `PROFILE_OUTPUT_DIR`, and can be downloaded via views.profile_download().
+"""
+
+import cProfile
+import contextlib
+import io
+import logging
+import pstats
+import re
+import time
+import uuid
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Callable
+
+from django.conf import settings
+from django.db import connections
+from django.http import HttpRequest, HttpResponse
+from django.urls import reverse
+
+log = logging.getLogger(__name__)
+
+PROFILE_ID_PATTERN = re.compile(r'^[0-9a-f]{32}$')
+
+
+def is_profiling_requested(request: HttpRequest) -> bool:
+    """
+    Returns True only for staff requests carrying `?profile=...` or an `X-Profile` header.
+    The string-checks come first so that normal requests don't even parse the query-string.
+    Called by ProfilingMiddleware.
+    """
+    if 'profile=' not in request.META.get('QUERY_STRING', '') and 'HTTP_X_PROFILE' not in request.META:
+        return False
+    user = getattr(request, 'user', None)
+    return bool(user is not None and user.is_authenticated and user.is_staff)
+
+
+def requested_profiler(request: HttpRequest) -> str:
+    """
+    Returns `pyinstrument` if requested and installed; otherwise `cprofile`.
+    """
+    requested: str = request.GET.get('profile', '') or request.META.get('HTTP_X_PROFILE', '')
+    if requested == 'pyinstrument':
+        try:
+            import pyinstrument  # noqa: F401 (optional dependency)
+
+            return 'pyinstrument'
+        except ImportError:
+            log.warning('pyinstrument requested but not installed; using cProfile')
+    return 'cprofile'
+
+
+class QueryRecorder:
+    """
+    Records sql, duration and call-counts via django's `connection.execute_wrapper()` hook.
+    """
+
+    def __init__(self):
+        self.queries: list[dict[str, Any]] = []
+
+    def __call__(self, execute: Callable, sql: str, params: Any, many: bool, context: dict) -> Any:
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - start
+            self.queries.append({'alias': context['connection'].alias, 'sql': sql, 'duration': duration})
+
+    def summary(self) -> str:
+        """
+        Returns a text summary; repeated statements (the usual N+1 signature) are listed first.
+        """
+        total_time: float = sum(query['duration'] for query in self.queries)
+        grouped: dict[str, list[float]] = defaultdict(list)
+        for query in self.queries:
+            grouped[query['sql']].append(query['duration'])
+        lines: list[str] = [f'SQL queries: {len(self.queries)}; total sql time: {total_time * 1000:.1f}ms', '']
+        lines.append('## statements, by count then total time -----------------')
+        ordered = sorted(grouped.items(), key=lambda item: (len(item[1]), sum(item[1])), reverse=True)
+        for sql, durations in ordered:
+            lines.append(f'{len(durations):>5}x  {sum(durations) * 1000:>9.1f}ms  {sql}')
+        lines.append('')
+        lines.append('## queries, in order ------------------------------------')
+        for query in self.queries:
+            lines.append(f'{query["duration"] * 1000:>9.1f}ms  [{query["alias"]}]  {query["sql"]}')
+        return '\n'.join(lines)
+
+
+def get_output_dir() -> Path:
+    output_dir = Path(settings.PROFILE_OUTPUT_DIR)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    return output_dir
+
+
+def profile_request(request: HttpRequest, get_response: Callable[[HttpRequest], HttpResponse]) -> HttpResponse:
+    """
+    Runs the request under a profiler and a query-recorder, stores the report, and adds
+    `X-Profile-Id` and `X-Profile-Url` headers to the response.
+    Called by ProfilingMiddleware.
+    """
+    profiler_name: str = requested_profiler(request)
+    recorder = QueryRecorder()
+    profile_id: str = uuid.uuid4().hex
+    start = time.perf_counter()
+    with contextlib.ExitStack() as stack:
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(recorder))
+        if profiler_name == 'pyinstrument':
+            from pyinstrument import Profiler
+
+            profiler = Profiler()
+            profiler.start()
+            try:
+                response = get_response(request)
+            finally:
+                profiler.stop()
+            profile_text: str = profiler.output_text(unicode=True, color=False)
+            (get_output_dir() / f'{profile_id}.html').write_text(profiler.output_html())
+        else:
+            profiler = cProfile.Profile()
+            try:
+                profiler.enable()
+            except ValueError:  # another profiler is already active in this thread
+                log.warning('could not enable cProfile; returning unprofiled response')
+                return get_response(request)
+            try:
+                response = get_response(request)
+            finally:
+                profiler.disable()
+            stream = io.StringIO()
+            stats = pstats.Stats(profiler, stream=stream)
+            stats.sort_stats('cumulative').print_stats(60)
+            profile_text = stream.getvalue()
+            stats.dump_stats(str(get_output_dir() / f'{profile_id}.prof'))  # loadable by snakeviz, etc.
+    elapsed = time.perf_counter() - start
+    ## write text report --------------------------------------------
+    header: str = (
+        f'path: {request.get_full_path()}\n'
+        f'method: {request.method}\n'
+        f'user: {request.user}\n'
+        f'status: {response.status_code}\n'
+        f'elapsed: {elapsed * 1000:.1f}ms\n'
+        f'profiler: {profiler_name}\n'
+    )
+    report: str = (
+        f'{header}\n{recorder.summary()}\n\n## profile ----------------------------------------------\n{profile_text}'
+    )
+    (get_output_dir() / f'{profile_id}.txt').write_text(report)
+    log.info(f'stored profile ``{profile_id}`` for ``{request.get_full_path()}``')
+    ## annotate response --------------------------------------------
+    response['X-Profile-Id'] = profile_id
+    response['X-Profile-Url'] = reverse('profile_download_url', args=[profile_id])
+    return response
+
+
+def get_report_path(profile_id: str, extension: str = 'txt') -> Path | None:
+    """
+    Returns a stored report's path (`txt` summary, `prof` cProfile-dump, or `html` pyinstrument-page),
+    or None if the id or extension is malformed, or the report doesn't exist.
+    Called by views.profile_download().
+    """
+    if not PROFILE_ID_PATTERN.match(profile_id) or extension not in ('txt', 'prof', 'html'):
+        return None
+    report_path: Path = get_output_dir() / f'{profile_id}.{extension}'
+    return report_path if report_path.exists() else None
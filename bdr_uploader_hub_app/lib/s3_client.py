@@ -0,0 +1,258 @@
+"""
+Minimal client for S3-compatible object-stores (AWS S3, MinIO, Ceph): just the calls the staging-store needs,
+signed with AWS Signature Version 4, over httpx.
+
+Notes:
+- Kept free of django imports, so loadtest/s3_standin.py can check signatures with the same code.
+- Uses path-style URLs (`<endpoint>/<bucket>/<key>`), which all of the above accept.
+- put_file() sends a file of up to `part_size` as one PUT; a larger file as a multipart upload, whose parts are
+  read and sent concurrently, `workers` at a time -- so memory-use stays at about `workers * part_size`,
+  whatever the file's size. A failed multipart upload is aborted, so no orphaned parts are left in the bucket.
+- download() streams an object to a local file.
+- refresh() copies an object onto itself, which resets its last-modified time (S3 copies objects of up to 5GB).
+- list_objects() pages through the bucket with ListObjectsV2.
+- Every request's payload is signed by its sha256, so the store rejects a body corrupted in transit.
+
+Called via lib/staging_backends.py.
+"""
+
+import datetime
+import email.utils
+import hashlib
+import hmac
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Iterator
+from urllib.parse import parse_qsl, quote, urlencode, urlsplit
+from xml.etree import ElementTree
+
+import httpx
+
+log = logging.getLogger(__name__)
+
+EMPTY_SHA256: str = hashlib.sha256(b'').hexdigest()
+DOWNLOAD_CHUNK_SIZE: int = 8 * 2**20  # 8MB
+
+
+class S3Error(Exception):
+    """
+    Raised when the object-store answers with an unexpected status, or an error-document.
+    """
+
+
+def signing_key(secret_key: str, date_stamp: str, region: str) -> bytes:
+    key: bytes = ('AWS4' + secret_key).encode()
+    for message in (date_stamp, region, 's3', 'aws4_request'):
+        key = hmac.new(key, message.encode(), hashlib.sha256).digest()
+    return key
+
+
+def sign_request(method: str, url: str, headers: dict[str, str], access_key: str, secret_key: str, region: str) -> str:
+    """
+    Returns the `Authorization` header-value for the request.
+    `headers` must include `host`, `x-amz-date` and `x-amz-content-sha256`; all of them are signed.
+    Called by S3Client.request(), and by the stand-in, to check requests.
+    """
+    parts = urlsplit(url)
+    canonical_query: str = '&'.join(
+        f'{quote(key, safe="-_.~")}={quote(value, safe="-_.~")}'
+        for key, value in sorted(parse_qsl(parts.query, keep_blank_values=True))
+    )
+    lowered: dict[str, str] = {key.lower(): ' '.join(str(value).split()) for key, value in headers.items()}
+    signed_headers: str = ';'.join(sorted(lowered))
+    canonical_headers: str = ''.join(f'{key}:{lowered[key]}\n' for key in sorted(lowered))
+    canonical_request: str = '\n'.join(
+        (
+            method,
+            parts.path or '/',
+            canonical_query,
+            canonical_headers,
+            signed_headers,
+            lowered['x-amz-content-sha256'],
+        )
+    )
+    amz_date: str = lowered['x-amz-date']
+    scope: str = f'{amz_date[:8]}/{region}/s3/aws4_request'
+    string_to_sign: str = '\n'.join(
+        ('AWS4-HMAC-SHA256', amz_date, scope, hashlib.sha256(canonical_request.encode()).hexdigest())
+    )
+    signature: str = hmac.new(
+        signing_key(secret_key, amz_date[:8], region), string_to_sign.encode(), hashlib.sha256
+    ).hexdigest()
+    return f'AWS4-HMAC-SHA256 Credential={access_key}/{scope}, SignedHeaders={signed_headers}, Signature={signature}'
+
+
+class S3Client:
+    def __init__(
+        self,
+        endpoint_url: str,
+        bucket: str,
+        access_key: str,
+        secret_key: str,
+        region: str = 'us-east-1',
+        part_size: int = 16 * 2**20,
+        workers: int = 4,
+        timeout: float = 60,
+    ):
+        self.endpoint_url: str = endpoint_url.rstrip('/')
+        self.bucket: str = bucket
+        self.access_key: str = access_key
+        self.secret_key: str = secret_key
+        self.region: str = region
+        self.part_size: int = part_size
+        self.workers: int = max(workers, 1)
+        self.http = httpx.Client(timeout=timeout)  # thread-safe; re-uses connections across parts
+
+    def object_url(self, key: str, query: str = '') -> str:
+        url: str = f'{self.endpoint_url}/{self.bucket}/{quote(key, safe="/-_.~")}'
+        return f'{url}?{query}' if query else url
+
+    def signed_headers(self, method: str, url: str, payload_sha256: str, headers: dict | None = None) -> dict:
+        signed: dict[str, str] = {
+            'host': urlsplit(url).netloc,
+            'x-amz-content-sha256': payload_sha256,
+            'x-amz-date': datetime.datetime.now(datetime.UTC).strftime('%Y%m%dT%H%M%SZ'),
+            **(headers or {}),
+        }
+        signed['authorization'] = sign_request(method, url, signed, self.access_key, self.secret_key, self.region)
+        return signed
+
+    def request(
+        self, method: str, key: str, query: str = '', content: bytes = b'', headers: dict | None = None
+    ) -> httpx.Response:
+        url: str = self.object_url(key, query)
+        payload_sha256: str = hashlib.sha256(content).hexdigest() if content else EMPTY_SHA256
+        return self.http.request(
+            method, url, content=content, headers=self.signed_headers(method, url, payload_sha256, headers)
+        )
+
+    def check(self, response: httpx.Response, action: str) -> httpx.Response:
+        ## S3 can answer a CompleteMultipartUpload with a 200 whose body is an error-document
+        if response.status_code not in (200, 204) or response.content.lstrip().startswith(b'<Error>'):
+            raise S3Error(f'{action} failed; status, ``{response.status_code}``; body, ``{response.text[:500]}``')
+        return response
+
+    def head(self, key: str) -> int | None:
+        """
+        Returns the object's size, or None if it doesn't exist.
+        """
+        result: tuple[int, float] | None = self.stat(key)
+        return result[0] if result else None
+
+    def stat(self, key: str) -> tuple[int, float] | None:
+        """
+        Returns the object's size and last-modified timestamp, or None if it doesn't exist.
+        """
+        response: httpx.Response = self.request('HEAD', key)
+        if response.status_code == 404:
+            return None
+        self.check(response, f'HEAD ``{key}``')
+        modified: float = email.utils.parsedate_to_datetime(response.headers['last-modified']).timestamp()
+        return (int(response.headers['content-length']), modified)
+
+    def refresh(self, key: str) -> None:
+        """
+        Copies the object onto itself, so its last-modified time is now.
+        """
+        headers: dict[str, str] = {
+            'x-amz-copy-source': quote(f'/{self.bucket}/{key}', safe='/-_.~'),
+            'x-amz-metadata-directive': 'REPLACE',  # S3 refuses a self-copy that changes nothing
+        }
+        self.check(self.request('PUT', key, headers=headers), f'refresh ``{key}``')
+
+    def list_objects(self, prefix: str = '', page_size: int = 1000) -> Iterator[tuple[str, int, float]]:
+        """
+        Yields each object's key, size and last-modified timestamp, under `prefix`; a page of `page_size` per request.
+        """
+        token: str = ''
+        while True:
+            params: dict[str, str] = {'list-type': '2', 'max-keys': str(page_size), 'prefix': prefix}
+            if token:
+                params['continuation-token'] = token
+            response: httpx.Response = self.request('GET', '', urlencode(params, safe='-_.~', quote_via=quote))
+            root = ElementTree.fromstring(self.check(response, f'list ``{prefix}``').content)
+            for contents in root.iterfind('{*}Contents'):
+                modified: str = contents.findtext('{*}LastModified') or ''
+                yield (
+                    contents.findtext('{*}Key') or '',
+                    int(contents.findtext('{*}Size') or 0),
+                    datetime.datetime.fromisoformat(modified).timestamp(),
+                )
+            token = root.findtext('{*}NextContinuationToken') or ''
+            if root.findtext('{*}IsTruncated') != 'true' or not token:
+                break
+
+    def get(self, key: str) -> bytes | None:
+        """
+        Returns a small object's content, or None if it doesn't exist; use download() for staged files.
+        """
+        response: httpx.Response = self.request('GET', key)
+        if response.status_code == 404:
+            return None
+        return self.check(response, f'GET ``{key}``').content
+
+    def delete(self, key: str) -> None:
+        response: httpx.Response = self.request('DELETE', key)
+        if response.status_code != 404:
+            self.check(response, f'DELETE ``{key}``')
+
+    def put_file(self, path: Path, key: str) -> str:
+        """
+        Uploads the file; returns `single` or `multipart`.
+        """
+        size: int = path.stat().st_size
+        if size <= self.part_size:
+            self.check(self.request('PUT', key, content=path.read_bytes()), f'PUT ``{key}``')
+            return 'single'
+        self.put_multipart(path, key, size)
+        return 'multipart'
+
+    def put_multipart(self, path: Path, key: str, size: int) -> None:
+        response: httpx.Response = self.check(self.request('POST', key, 'uploads'), f'create upload for ``{key}``')
+        upload_id: str = ElementTree.fromstring(response.content).findtext('{*}UploadId') or ''
+        upload_query: str = f'uploadId={quote(upload_id, safe="")}'
+        parts: list[tuple[int, int, int]] = [
+            (number, offset, min(self.part_size, size - offset))
+            for number, offset in enumerate(range(0, size, self.part_size), start=1)
+        ]
+
+        def put_part(part: tuple[int, int, int]) -> str:
+            (number, offset, length) = part
+            with open(path, 'rb') as f:
+                f.seek(offset)
+                data: bytes = f.read(length)
+            response = self.request('PUT', key, f'partNumber={number}&{upload_query}', content=data)
+            return self.check(response, f'PUT part ``{number}`` of ``{key}``').headers['etag']
+
+        try:
+            with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                etags: list[str] = list(executor.map(put_part, parts))
+            body: str = ''.join(
+                f'<Part><PartNumber>{number}</PartNumber><ETag>{etag}</ETag></Part>'
+                for (number, _offset, _length), etag in zip(parts, etags)
+            )
+            self.check(
+                self.request(
+                    'POST', key, upload_query, f'<CompleteMultipartUpload>{body}</CompleteMultipartUpload>'.encode()
+                ),
+                f'complete upload of ``{key}``',
+            )
+        except Exception:
+            log.exception(f'multipart upload of ``{key}`` failed; aborting')
+            self.request('DELETE', key, upload_query)
+            raise
+        log.debug(f'uploaded ``{key}`` in ``{len(parts)}`` parts')
+
+    def download(self, key: str, target_path: Path) -> None:
+        """
+        Streams the object to `target_path`.
+        """
+        url: str = self.object_url(key)
+        with self.http.stream('GET', url, headers=self.signed_headers('GET', url, EMPTY_SHA256)) as response:
+            if response.status_code != 200:
+                response.read()
+                self.check(response, f'GET ``{key}``')
+            with open(target_path, 'wb') as f:
+                for chunk in response.iter_bytes(DOWNLOAD_CHUNK_SIZE):
+                    f.write(chunk)
@@ -0,0 +1,187 @@
+"""
+Where staged files are kept: the local filesystem (MEDIA_ROOT), or an S3-compatible object-store.
+
+Selected by `settings.STAGING_BACKEND`, `filesystem` (the default) or `s3`. Either way, an upload is first
+streamed and hashed into a `.part` temp-file in MEDIA_ROOT (see lib/staging_upload_handler.py); the backend then
+takes the finished file over, under its sharded key, eg `9f/86/9f86d0...0f00a08.pdf` (see lib/staging_store.py).
+
+With the object-store, MEDIA_ROOT is only each web-node's scratch-space, so nodes needn't share a mount:
+- files are uploaded with concurrent multipart parts (see lib/s3_client.py),
+- ingest fetches each file into `BDR_API_HANDOFF_DIR`, and verifies it, before the post (see lib/handoff_handler.py),
+- a re-used object is copied onto itself, so its last-modified time -- the staging-reaper's grace-period clock,
+  as mtime is on the filesystem -- counts from the latest use,
+- the staging-reaper lists the bucket for unreferenced and expired objects, as well as clearing each node's
+  leftover temp-files; fixity-checks and `shard_staging` are filesystem-only, so use the bucket's versioning instead.
+
+Called by lib/staging_store.py and lib/handoff_handler.py.
+"""
+
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import Iterator
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+from bdr_uploader_hub_app.lib import metrics
+from bdr_uploader_hub_app.lib.s3_client import S3Client
+
+log = logging.getLogger(__name__)
+
+
+class FilesystemBackend:
+    """
+    Staged files live under `root`; the store's original behavior.
+    """
+
+    is_local: bool = True
+
+    def __init__(self, root: Path):
+        self.root: Path = root
+
+    def path(self, key: str) -> Path:
+        return self.root / key
+
+    def exists(self, key: str) -> bool:
+        return self.path(key).exists()
+
+    def size(self, key: str) -> int | None:
+        try:
+            return self.path(key).stat().st_size
+        except FileNotFoundError:
+            return None
+
+    def store(self, temp_path: Path, key: str) -> None:
+        """
+        Moves the finished temp-file into place; atomic, since temp-files are written under the same root.
+        """
+        target_path: Path = self.path(key)
+        target_path.parent.mkdir(parents=True, exist_ok=True)
+        os.replace(temp_path, target_path)
+
+    def touch(self, key: str) -> None:
+        """
+        Refreshes the mtime, so the reaper's grace-period counts from the latest use.
+        """
+        os.utime(self.path(key))
+
+    def read(self, key: str) -> bytes | None:
+        try:
+            return self.path(key).read_bytes()
+        except FileNotFoundError:
+            return None
+
+    def fetch(self, key: str, target_path: Path) -> None:
+        """
+        Copies the staged file to `target_path`. Callers that only need to read it use path() instead;
+        ingest hands it off by hardlink (see handoff_handler.place()).
+        """
+        from bdr_uploader_hub_app.lib.handoff_handler import kernel_copy  # handoff_handler imports this module
+
+        kernel_copy(self.path(key), target_path)
+
+    def delete(self, key: str) -> None:
+        self.path(key).unlink(missing_ok=True)
+
+
+class S3Backend:
+    """
+    Staged files live in a bucket, under `prefix`.
+    """
+
+    is_local: bool = False
+
+    def __init__(self, client: S3Client, prefix: str = ''):
+        self.client: S3Client = client
+        self.prefix: str = prefix.strip('/') + '/' if prefix.strip('/') else ''
+
+    def object_key(self, key: str) -> str:
+        return f'{self.prefix}{key}'
+
+    def exists(self, key: str) -> bool:
+        return self.size(key) is not None
+
+    def size(self, key: str) -> int | None:
+        return self.client.head(self.object_key(key))
+
+    def store(self, temp_path: Path, key: str) -> None:
+        """
+        Uploads the finished temp-file, then removes it; a failed upload leaves it for the reaper.
+        """
+        with metrics.OBJECT_STORE_SECONDS.time(operation='upload'):
+            method: str = self.client.put_file(temp_path, self.object_key(key))
+        metrics.OBJECT_STORE_BYTES.inc(temp_path.stat().st_size, operation='upload')
+        temp_path.unlink()
+        log.debug(f'uploaded ``{key}`` via ``{method}`` put')
+
+    def touch(self, key: str) -> None:
+        """
+        Resets the object's last-modified time, so the reaper's grace-period counts from the latest use.
+        """
+        self.client.refresh(self.object_key(key))
+
+    def modified(self, key: str) -> float | None:
+        result: tuple[int, float] | None = self.client.stat(self.object_key(key))
+        return result[1] if result else None
+
+    def list_keys(self, page_size: int = 1000) -> Iterator[tuple[str, int, float]]:
+        """
+        Yields every key under the prefix, with its size and last-modified timestamp.
+        """
+        for object_key, size, modified in self.client.list_objects(self.prefix, page_size):
+            yield (object_key.removeprefix(self.prefix), size, modified)
+
+    def read(self, key: str) -> bytes | None:
+        return self.client.get(self.object_key(key))
+
+    def fetch(self, key: str, target_path: Path) -> None:
+        with metrics.OBJECT_STORE_SECONDS.time(operation='download'):
+            self.client.download(self.object_key(key), target_path)
+        metrics.OBJECT_STORE_BYTES.inc(target_path.stat().st_size, operation='download')
+
+    def delete(self, key: str) -> None:
+        self.client.delete(self.object_key(key))
+
+
+## one S3Backend (and so one connection-pool) per distinct configuration
+_s3_backends: dict[tuple, S3Backend] = {}
+_s3_backends_lock = threading.Lock()
+
+
+def get_backend() -> FilesystemBackend | S3Backend:
+    """
+    Returns the configured backend.
+    """
+    backend_name: str = getattr(settings, 'STAGING_BACKEND', 'filesystem') or 'filesystem'
+    if backend_name == 'filesystem':
+        return FilesystemBackend(Path(settings.MEDIA_ROOT))
+    if backend_name != 's3':
+        raise ImproperlyConfigured(f'unknown STAGING_BACKEND, ``{backend_name}``; use `filesystem` or `s3`')
+    config: tuple = (
+        settings.STAGING_S3_ENDPOINT_URL,
+        settings.STAGING_S3_BUCKET,
+        settings.STAGING_S3_ACCESS_KEY_ID,
+        settings.STAGING_S3_SECRET_ACCESS_KEY,
+        settings.STAGING_S3_REGION,
+        settings.STAGING_S3_PREFIX,
+        settings.STAGING_S3_PART_SIZE_MB,
+        settings.STAGING_S3_WORKERS,
+    )
+    with _s3_backends_lock:
+        if config not in _s3_backends:
+            (endpoint_url, bucket, access_key, secret_key, region, prefix, part_size_mb, workers) = config
+            if not (endpoint_url and bucket):
+                raise ImproperlyConfigured('STAGING_BACKEND `s3` needs STAGING_S3_ENDPOINT_URL and STAGING_S3_BUCKET')
+            client = S3Client(
+                endpoint_url,
+                bucket,
+                access_key,
+                secret_key,
+                region=region,
+                part_size=int(part_size_mb * 2**20),
+                workers=workers,
+            )
+            _s3_backends[config] = S3Backend(client, prefix)
+        return _s3_backends[config]
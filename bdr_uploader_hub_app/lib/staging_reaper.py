@@ -0,0 +1,252 @@
+"""
+Removes staged files that are no longer needed, so the shared staging volume doesn't slowly fill.
+
+A staged file is removed when it's older than the grace-period (by mtime, or an object's last-modified time;
+the staging-store refreshes either on every re-use), and either:
+- no Submission references it, as its primary or a supplementary file (an abandoned confirm, or a replaced upload
+  after "Edit"), or
+- every Submission referencing it is `ingested`, and the latest of them was updated more than
+  `retention_days` ago (when `retention_days` is None, ingested files are kept indefinitely).
+Removed files' derivatives (see lib/derivative_maker.py), and expired files' hand-off copies
+(see lib/handoff_handler.py), are removed with them.
+Leftover `.part` temp-files older than the grace-period are removed, too.
+
+Only file-names the staging-store could have written -- in the sharded layout, or flat in MEDIA_ROOT from before
+sharding -- are considered, so other files in MEDIA_ROOT are never touched.
+
+With object-storage staging (see lib/staging_backends.py), MEDIA_ROOT holds only this node's temp-files; the bucket
+is then listed, a page at a time, and its staged objects -- keys in the sharded layout only -- get the same
+batched reference-check, grace-period, and re-check before removal.
+
+Called by the `reap_staging` management command.
+"""
+
+import datetime
+import logging
+import os
+import re
+import time
+from dataclasses import dataclass, field
+from itertools import chain
+from pathlib import Path
+from typing import Iterator
+
+from django.utils import timezone
+
+from bdr_uploader_hub_app.lib import handoff_handler, metrics, staging_backends, staging_store
+from bdr_uploader_hub_app.models import Submission, SubmissionFile
+
+log = logging.getLogger(__name__)
+
+## `sha256.ext` (staging-store), `uuid4hex.ext` (pre-staging-store), and `.uuid4hex.part` (in-progress temp-files)
+STAGED_NAME_PATTERN = re.compile(r'^(?:[0-9a-f]{64}|[0-9a-f]{32})(?:\.[A-Za-z0-9]{1,16})?$')
+TEMP_NAME_PATTERN = re.compile(r'^\.[0-9a-f]{32}\.part$')
+SHARD_DIR_PATTERN = re.compile(r'^[0-9a-f]{2}$')
+
+DEFAULT_BATCH_SIZE: int = 500
+
+
+@dataclass
+class ReapSummary:
+    scanned: int = 0
+    orphaned: int = 0
+    expired: int = 0
+    temp_files: int = 0
+    bytes_freed: int = 0
+    removed: list[str] = field(default_factory=list)
+
+
+def iter_staged_entries(staging_dir: Path, depth: int = 0) -> Iterator[os.DirEntry]:
+    """
+    Yields the staging-directory's staged and temp files, descending into the two levels of shard-directories.
+    os.scandir() returns type and (on most platforms) stat info with the listing, so there's no per-file stat-call.
+    """
+    with os.scandir(staging_dir) as entries:
+        for entry in entries:
+            if depth < 2 and SHARD_DIR_PATTERN.match(entry.name) and entry.is_dir(follow_symlinks=False):
+                yield from iter_staged_entries(Path(entry.path), depth + 1)
+            elif not (STAGED_NAME_PATTERN.match(entry.name) or TEMP_NAME_PATTERN.match(entry.name)):
+                continue
+            elif entry.is_file(follow_symlinks=False):
+                yield entry
+
+
+def iter_staged_objects(backend: staging_backends.S3Backend, page_size: int) -> Iterator[tuple[str, int, float]]:
+    """
+    Yields the bucket's staged objects' names, sizes and last-modified timestamps; derivatives, and any keys
+    outside the sharded layout, are skipped.
+    """
+    for key, size, modified in backend.list_keys(page_size):
+        name: str = key.rpartition('/')[2]
+        if STAGED_NAME_PATTERN.match(name) and key == staging_store.blob_key(name):
+            yield (name, size, modified)
+
+
+def _batched(entries: Iterator, size: int) -> Iterator[list]:
+    batch: list = []
+    for entry in entries:
+        batch.append(entry)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def lookup_references(names: list[str]) -> dict[str, dict]:
+    """
+    Returns, for each referenced name, whether any referencing Submission is still un-ingested,
+    and the latest `updated_at` among them -- in two queries per batch: primary files, then supplementary files
+    (which count as their Submission's).
+    """
+    references: dict[str, dict] = {}
+    rows = chain(
+        Submission.objects.filter(staged_file_name__in=names).values_list('staged_file_name', 'status', 'updated_at'),
+        SubmissionFile.objects.filter(staged_file_name__in=names).values_list(
+            'staged_file_name', 'submission__status', 'submission__updated_at'
+        ),
+    )
+    for name, status, updated_at in rows:
+        reference = references.setdefault(name, {'active': False, 'latest_update': updated_at})
+        reference['active'] = reference['active'] or status != 'ingested'
+        reference['latest_update'] = max(reference['latest_update'], updated_at)
+    return references
+
+
+def _reason(reference: dict | None, retention_cutoff: datetime.datetime | None) -> str | None:
+    """
+    Returns why an old-enough staged file should go -- `orphaned` or `expired` -- or None to keep it.
+    """
+    if reference is None:
+        return 'orphaned'
+    if retention_cutoff is not None and not reference['active'] and reference['latest_update'] <= retention_cutoff:
+        return 'expired'
+    return None
+
+
+def _remove_handoff_copies(name: str) -> None:
+    """
+    Removes the BDR-API's copy, if it's not the staged file; sharded, or flat from before sharding.
+    """
+    if handoff_dir := handoff_handler.get_handoff_dir():
+        (handoff_dir / staging_store.shard_relative_path(name)).unlink(missing_ok=True)
+        (handoff_dir / name).unlink(missing_ok=True)
+
+
+def _record(name: str, size: int, reason: str, summary: ReapSummary, dry_run: bool) -> None:
+    if not dry_run:
+        metrics.STAGING_REAPED_FILES.inc(reason=reason)
+        metrics.STAGING_REAPED_BYTES.inc(size)
+    setattr(summary, reason, getattr(summary, reason) + 1)
+    summary.bytes_freed += size
+    summary.removed.append(name)
+    log.info(f'{"would remove" if dry_run else "removed"} ``{name}``; reason, ``{reason}``')
+
+
+def _remove(entry: os.DirEntry, reason: str, grace_cutoff: float, summary: ReapSummary, dry_run: bool) -> None:
+    """
+    Re-checks the mtime just before deleting, in case an upload re-used the file since the scan.
+    """
+    try:
+        stat_result = os.stat(entry.path)
+    except FileNotFoundError:
+        return
+    if stat_result.st_mtime > grace_cutoff:
+        log.debug(f'``{entry.name}`` was re-used during the scan; keeping')
+        return
+    if not dry_run:
+        Path(entry.path).unlink(missing_ok=True)
+        for suffix in staging_store.DERIVATIVE_SUFFIXES if reason != 'temp_files' else ():  # beside the sharded path
+            Path(f'{staging_store.blob_path(entry.name)}{suffix}').unlink(missing_ok=True)
+        if reason == 'expired':
+            _remove_handoff_copies(entry.name)
+    _record(entry.name, stat_result.st_size, reason, summary, dry_run)
+
+
+def _remove_object(
+    backend: staging_backends.S3Backend,
+    name: str,
+    size: int,
+    reason: str,
+    grace_cutoff: float,
+    summary: ReapSummary,
+    dry_run: bool,
+) -> None:
+    """
+    Re-checks the last-modified time just before deleting, in case an upload re-used the object since the listing.
+    """
+    modified: float | None = backend.modified(staging_store.blob_key(name))
+    if modified is None:
+        return
+    if modified > grace_cutoff:
+        log.debug(f'``{name}`` was re-used during the scan; keeping')
+        return
+    if not dry_run:
+        backend.delete(staging_store.blob_key(name))
+        for suffix in staging_store.DERIVATIVE_SUFFIXES:
+            backend.delete(staging_store.derivative_key(name, suffix))
+        if reason == 'expired':
+            _remove_handoff_copies(name)
+    _record(name, size, reason, summary, dry_run)
+
+
+def reap_objects(
+    backend: staging_backends.S3Backend,
+    grace_cutoff: float,
+    retention_cutoff: datetime.datetime | None,
+    batch_size: int,
+    summary: ReapSummary,
+    dry_run: bool,
+) -> None:
+    """
+    Lists the bucket once, looking up references in batches, and removes the objects no longer needed.
+    """
+    for batch in _batched(iter_staged_objects(backend, min(batch_size, 1000)), batch_size):
+        summary.scanned += len(batch)
+        old_objects: list[tuple[str, int, float]] = [item for item in batch if item[2] <= grace_cutoff]
+        if not old_objects:
+            continue
+        references: dict[str, dict] = lookup_references([name for name, _size, _modified in old_objects])
+        for name, size, _modified in old_objects:
+            if reason := _reason(references.get(name), retention_cutoff):
+                _remove_object(backend, name, size, reason, grace_cutoff, summary, dry_run)
+
+
+def reap(
+    grace_hours: float,
+    retention_days: float | None,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    dry_run: bool = False,
+) -> ReapSummary:
+    """
+    Walks the staging directory (and, with object-storage, the bucket) once, looking up references in batches,
+    and removes what's no longer needed.
+    """
+    summary = ReapSummary()
+    grace_cutoff: float = time.time() - grace_hours * 3600
+    retention_cutoff: datetime.datetime | None = (
+        timezone.now() - datetime.timedelta(days=retention_days) if retention_days is not None else None
+    )
+    staging_dir: Path = staging_store.get_staging_dir()
+    log.info(f'reaping ``{staging_dir}``; grace_hours, ``{grace_hours}``; retention_days, ``{retention_days}``')
+    for batch in _batched(iter_staged_entries(staging_dir), batch_size):
+        summary.scanned += len(batch)
+        old_entries: list[os.DirEntry] = [entry for entry in batch if entry.stat().st_mtime <= grace_cutoff]
+        for entry in [entry for entry in old_entries if TEMP_NAME_PATTERN.match(entry.name)]:
+            _remove(entry, 'temp_files', grace_cutoff, summary, dry_run)
+        staged_entries: list[os.DirEntry] = [entry for entry in old_entries if STAGED_NAME_PATTERN.match(entry.name)]
+        if not staged_entries:
+            continue
+        references: dict[str, dict] = lookup_references([entry.name for entry in staged_entries])
+        for entry in staged_entries:
+            if reason := _reason(references.get(entry.name), retention_cutoff):
+                _remove(entry, reason, grace_cutoff, summary, dry_run)
+    backend = staging_backends.get_backend()
+    if not backend.is_local:
+        log.info(f'reaping the bucket; prefix, ``{backend.prefix}``')
+        reap_objects(backend, grace_cutoff, retention_cutoff, batch_size, summary, dry_run)
+    log.info(
+        f'scanned, ``{summary.scanned}``; orphaned, ``{summary.orphaned}``; expired, ``{summary.expired}``; '
+        f'temp_files, ``{summary.temp_files}``; bytes_freed, ``{summary.bytes_freed}``'
+    )
+    return summary
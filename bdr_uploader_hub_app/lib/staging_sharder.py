@@ -0,0 +1,125 @@
+"""
+Relocates staged files from the flat, pre-sharding MEDIA_ROOT layout into the staging-store's sharded layout
+(`9f/86/9f86d0...0f00a08.pdf`; see lib/staging_store.py).
+
+Flow:
+- rewrite_submissions() walks the Submissions in batches; for each one whose `primary_file` is still flat, it moves
+  the file into its shard, then the batch's `primary_file` (and any blank `staged_file_name`) is bulk-updated.
+  `updated_at` is left alone, so the staging-reaper's retention-clock isn't reset.
+- relocate_remaining() then moves the flat files nothing's `primary_file` points to: supplementary files (which are
+  referenced by bare `staged_file_name`, so need no rewrite), and orphans awaiting the reaper.
+- Moves are renames within MEDIA_ROOT, so they're atomic and keep mtimes. Until a file is moved,
+  staging_store.find_blob() still finds it at its flat path.
+- Re-running is safe; already-sharded files and rewritten rows are skipped.
+
+Hand-off copies (see lib/handoff_handler.py) are left where they are; new hand-offs are sharded, and the reaper
+removes expired copies from either layout.
+
+Called by the `shard_staging` management command.
+"""
+
+import logging
+import os
+from dataclasses import dataclass
+from pathlib import Path
+
+from bdr_uploader_hub_app.lib import staging_store
+from bdr_uploader_hub_app.lib.staging_reaper import STAGED_NAME_PATTERN
+from bdr_uploader_hub_app.models import Submission
+
+log = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE: int = 500
+
+
+@dataclass
+class ShardSummary:
+    relocated: int = 0
+    duplicates: int = 0
+    rewritten: int = 0
+
+
+def relocate(name: str, summary: ShardSummary, dry_run: bool) -> None:
+    """
+    Moves a flat staged file into its shard; if the shard already has it (same name, so same content),
+    the flat copy is dropped.
+    """
+    legacy_path: Path = staging_store.legacy_blob_path(name)
+    if not legacy_path.is_file():
+        return
+    target_path: Path = staging_store.blob_path(name)
+    if target_path.exists():
+        if not dry_run:
+            legacy_path.unlink()
+        summary.duplicates += 1
+        log.debug(f'``{name}`` already sharded; {"would drop" if dry_run else "dropped"} the flat copy')
+        return
+    if not dry_run:
+        target_path.parent.mkdir(parents=True, exist_ok=True)
+        os.replace(legacy_path, target_path)
+    summary.relocated += 1
+    log.debug(f'{"would relocate" if dry_run else "relocated"} ``{name}``')
+
+
+def _save(batch: list[Submission], summary: ShardSummary, dry_run: bool) -> None:
+    if not dry_run:
+        Submission.objects.bulk_update(batch, ['primary_file', 'staged_file_name'])
+    summary.rewritten += len(batch)
+    log.info(f'{"would rewrite" if dry_run else "rewrote"} ``{len(batch)}`` submissions')
+
+
+def rewrite_submissions(summary: ShardSummary, batch_size: int, dry_run: bool) -> set[str]:
+    """
+    Relocates each flat primary-file and rewrites its Submission's `primary_file`, a batch at a time.
+    Returns the names handled.
+    """
+    staging_dir: Path = staging_store.get_staging_dir().resolve()
+    submissions = (
+        Submission.objects.exclude(primary_file='')
+        .only('id', 'primary_file', 'staged_file_name')
+        .order_by('pk')
+        .iterator(chunk_size=batch_size)
+    )
+    batch: list[Submission] = []
+    handled: set[str] = set()
+    for submission in submissions:
+        name: str = submission.staged_file_name or Path(submission.primary_file.name).name
+        if not STAGED_NAME_PATTERN.match(name):
+            continue
+        if (staging_dir / submission.primary_file.name).resolve() != staging_dir / name:
+            continue  # already sharded, or not a staged file
+        if name not in handled:  # submissions can share a staged file
+            relocate(name, summary, dry_run)
+            handled.add(name)
+        submission.primary_file = str(staging_store.blob_path(name))
+        submission.staged_file_name = name
+        batch.append(submission)
+        if len(batch) >= batch_size:
+            _save(batch, summary, dry_run)
+            batch = []
+    if batch:
+        _save(batch, summary, dry_run)
+    return handled
+
+
+def relocate_remaining(summary: ShardSummary, dry_run: bool, handled: set[str]) -> None:
+    """
+    Relocates the flat staged files left in MEDIA_ROOT's top level; `handled` ones are skipped (on a dry-run,
+    they're still there).
+    """
+    with os.scandir(staging_store.get_staging_dir()) as entries:
+        names: list[str] = [
+            entry.name for entry in entries if STAGED_NAME_PATTERN.match(entry.name) and entry.is_file(follow_symlinks=False)
+        ]
+    for name in names:
+        if name not in handled:
+            relocate(name, summary, dry_run)
+
+
+def shard(batch_size: int = DEFAULT_BATCH_SIZE, dry_run: bool = False) -> ShardSummary:
+    summary = ShardSummary()
+    log.info(f'sharding ``{staging_store.get_staging_dir()}``; batch_size, ``{batch_size}``; dry_run, ``{dry_run}``')
+    handled: set[str] = rewrite_submissions(summary, batch_size, dry_run)
+    relocate_remaining(summary, dry_run, handled)
+    log.info(f'relocated, ``{summary.relocated}``; duplicates, ``{summary.duplicates}``; rewritten, ``{summary.rewritten}``')
+    return summary
@@ -0,0 +1,235 @@
+"""
+Content-addressed staging store for uploaded files.
+
+Staged files are named by content -- `<sha256><.ext>` -- so a student re-submitting the same file after an "Edit",
+or uploading the same file to two apps, re-uses the one staged copy rather than leaving a duplicate behind.
+
+Notes:
+- Staged files are sharded by their name's leading hex-chars -- `9f/86/9f86d0...0f00a08.pdf` -- so no directory
+  grows past a few hundred entries. `staged_file_name` stays the bare name; blob_path() derives the shard from it.
+  Files staged before sharding are found at their flat path by find_blob(), until the `shard_staging` management
+  command relocates them (see lib/staging_sharder.py).
+- The files themselves are kept by a pluggable backend: MEDIA_ROOT, or an S3-compatible object-store, where the
+  sharded path is the object-key (see lib/staging_backends.py). Callers record staged_location(): the local path,
+  or, with object-storage, the key.
+- New content is first written to a hidden `.<uuid>.part` temp-file in the staging directory, then atomically
+  renamed into place by adopt(); if the content is already staged, the temp-file is dropped instead.
+- A staged file may be referenced by several Submissions and SubmissionFiles (via `staged_file_name`); reference_count() and
+  release() let cleanup code delete a file only when nothing references it.
+- Local files (eg, bulk-imports) are reflinked (copy-on-write) where the filesystem supports it; otherwise copied
+  via the kernel. They're never hardlinked, since a later edit to the source would silently change the staged file.
+"""
+
+import hashlib
+import logging
+import os
+import shutil
+import uuid
+from pathlib import Path
+
+from django.conf import settings
+
+from bdr_uploader_hub_app.lib import metrics, staging_backends
+from bdr_uploader_hub_app.lib.s3_client import S3Error
+
+log = logging.getLogger(__name__)
+
+HASH_CHUNK_SIZE: int = 8 * 2**20  # 8MB
+TEMP_PREFIX: str = '.'
+TEMP_SUFFIX: str = '.part'
+FICLONE: int = 0x40049409  # linux ioctl for a copy-on-write clone (btrfs, xfs, etc.)
+DERIVATIVE_SUFFIXES: tuple[str, ...] = ('.preview.png', '.txt')  # kept beside the staged file; see lib/derivative_maker.py
+
+
+def get_staging_dir() -> Path:
+    staging_dir = Path(settings.MEDIA_ROOT)
+    staging_dir.mkdir(parents=True, exist_ok=True)
+    return staging_dir
+
+
+def blob_name(sha256: str, extension: str) -> str:
+    """
+    Returns the content-addressed file-name, eg `9f86d0...0f00a08.pdf`.
+    """
+    return f'{sha256}{extension.lower()}'
+
+
+def shard_relative_path(name: str) -> Path:
+    """
+    Returns the name's place in the sharded layout, eg `9f/86/9f86d0...0f00a08.pdf`.
+    """
+    return Path(name[0:2], name[2:4], name)
+
+
+def blob_key(name: str) -> str:
+    """
+    Returns the backend's key for the name, eg `9f/86/9f86d0...0f00a08.pdf`.
+    """
+    return shard_relative_path(name).as_posix()
+
+
+def derivative_key(name: str, suffix: str) -> str:
+    """
+    Returns the backend's key for one of the staged file's derivatives, eg `9f/86/9f86d0...0f00a08.pdf.preview.png`.
+    """
+    return f'{blob_key(name)}{suffix}'
+
+
+def blob_path(name: str) -> Path:
+    return get_staging_dir() / shard_relative_path(name)
+
+
+def legacy_blob_path(name: str) -> Path:
+    """
+    Returns the flat, pre-sharding path.
+    """
+    return get_staging_dir() / name
+
+
+def find_blob(name: str) -> Path:
+    """
+    Returns the staged file's sharded path, or its flat path if it hasn't been relocated yet.
+    """
+    path: Path = blob_path(name)
+    if not path.exists() and (legacy_path := legacy_blob_path(name)).exists():
+        return legacy_path
+    return path
+
+
+def staged_location(name: str) -> Path:
+    """
+    Returns what callers record as the staged file's path: its local path, or, with object-storage, its key.
+    """
+    return find_blob(name) if staging_backends.get_backend().is_local else Path(blob_key(name))
+
+
+def is_staged(name: str) -> bool:
+    backend = staging_backends.get_backend()
+    return backend.exists(blob_key(name)) or (backend.is_local and legacy_blob_path(name).exists())
+
+
+def reuse(name: str, size: int) -> bool:
+    """
+    Returns True, and counts the dedup-hit, if the content is already staged.
+    Its age (a local file's mtime, or an object's last-modified time) is refreshed, so orphan-cleanup grace-periods
+    count from the latest use; an object that can't be refreshed is treated as not staged, and so re-uploaded.
+    """
+    backend = staging_backends.get_backend()
+    if backend.is_local:
+        path: Path = find_blob(name)
+        if not path.exists():
+            return False
+        os.utime(path)
+    elif not backend.exists(blob_key(name)):
+        return False
+    else:
+        try:
+            backend.touch(blob_key(name))
+        except S3Error as e:  # eg, an object over S3's 5GB copy-limit
+            log.warning(f'could not refresh ``{name}``; re-uploading; {e}')
+            return False
+    metrics.STAGING_DEDUP_HITS.inc()
+    metrics.STAGING_DEDUP_BYTES.inc(size)
+    return True
+
+
+def new_temp_path() -> Path:
+    """
+    Returns a hidden, unique temp-path inside the staging directory (so adopt()'s rename stays on one filesystem).
+    """
+    return get_staging_dir() / f'{TEMP_PREFIX}{uuid.uuid4().hex}{TEMP_SUFFIX}'
+
+
+def is_temp_name(name: str) -> bool:
+    return name.startswith(TEMP_PREFIX) and name.endswith(TEMP_SUFFIX)
+
+
+def compute_digests(path: Path) -> dict:
+    """
+    Returns md5 (what the BDR-API uses), sha256 (the store's key) and size, from a single streaming read.
+    """
+    md5_hasher = hashlib.md5()
+    sha256_hasher = hashlib.sha256()
+    size: int = 0
+    with open(path, 'rb') as f:
+        while chunk := f.read(HASH_CHUNK_SIZE):
+            md5_hasher.update(chunk)
+            sha256_hasher.update(chunk)
+            size += len(chunk)
+    return {'md5': md5_hasher.hexdigest(), 'sha256': sha256_hasher.hexdigest(), 'size': size}
+
+
+def adopt(temp_path: Path, sha256: str, extension: str) -> Path:
+    """
+    Hands a fully-written temp-file to the backend under its content-addressed name (a rename, on the filesystem),
+    or drops it if that content is already staged. Returns the staged location.
+    Called by uploaded_file_handler.stage_uploaded_file() and store_local_file().
+    """
+    name: str = blob_name(sha256, extension)
+    if reuse(name, temp_path.stat().st_size):
+        temp_path.unlink()
+        log.debug(f'content already staged as ``{name}``; dropped duplicate')
+    else:
+        staging_backends.get_backend().store(temp_path, blob_key(name))
+        log.debug(f'staged new content as ``{name}``')
+    return staged_location(name)
+
+
+def clone_or_copy(source_path: Path, target_path: Path) -> str:
+    """
+    Reflinks source to target where supported (no data written); otherwise copies via the kernel.
+    Returns `reflink` or `copy`.
+    """
+    try:
+        import fcntl
+
+        with open(source_path, 'rb') as src, open(target_path, 'wb') as dst:
+            fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+        return 'reflink'
+    except (ImportError, OSError):
+        shutil.copyfile(source_path, target_path)  # uses sendfile on linux
+        return 'copy'
+
+
+def store_local_file(source_path: Path) -> tuple[Path, dict]:
+    """
+    Stages a file already on the server; if its content is already staged, nothing is written.
+    Returns the staged path and the digests (md5, sha256, size).
+    """
+    digests: dict = compute_digests(source_path)
+    name: str = blob_name(digests['sha256'], source_path.suffix)
+    if reuse(name, digests['size']):
+        log.debug(f'``{source_path}`` already staged as ``{name}``')
+        return (staged_location(name), digests)
+    temp_path: Path = new_temp_path()
+    method: str = clone_or_copy(source_path, temp_path)
+    log.debug(f'staged ``{source_path}`` via ``{method}``')
+    return (adopt(temp_path, digests['sha256'], source_path.suffix), digests)
+
+
+def reference_count(name: str) -> int:
+    """
+    Returns the number of Submissions and supplementary SubmissionFiles referencing the staged file.
+    """
+    from bdr_uploader_hub_app.models import Submission, SubmissionFile
+
+    return (
+        Submission.objects.filter(staged_file_name=name).count()
+        + SubmissionFile.objects.filter(staged_file_name=name).count()
+    )
+
+
+def release(name: str) -> bool:
+    """
+    Deletes the staged file, and its derivatives, if nothing references it; returns True if deleted.
+    """
+    if reference_count(name) > 0:
+        log.debug(f'not releasing ``{name}``; still referenced')
+        return False
+    backend = staging_backends.get_backend()
+    backend.delete(blob_key(name))
+    for suffix in DERIVATIVE_SUFFIXES:
+        backend.delete(derivative_key(name, suffix))
+    legacy_blob_path(name).unlink(missing_ok=True)
+    log.info(f'released staged file ``{name}``')
+    return True
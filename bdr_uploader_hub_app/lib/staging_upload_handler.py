@@ -0,0 +1,135 @@
+"""
+Upload-handler that streams multipart file-data straight into the staging directory.
+
+Django's default handlers hold small uploads in memory, and spool larger ones to a temp-file under /tmp, which
+handle_uploaded_file() then read back and re-wrote into MEDIA_ROOT. This handler instead writes each incoming chunk
+to a `.<uuid>.part` temp-file inside the staging directory, hashing (md5, sha256, and the browser-checkable
+upload-digest; see upload_digest.py) as it goes, so staging an
+upload is just staging_store.adopt()'s rename -- one write per byte, and no re-read to checksum.
+
+Installed only by views.upload_slug(), via `request.upload_handlers`, before the request body is read.
+Temp-files not adopted by the end of the request (an invalid form, an interrupted upload) are removed;
+any left by a crashed worker are removed by the staging-reaper.
+
+Also enforces the app's upload-policy as data arrives (see upload_policy.py): a disallowed extension, a first-bytes
+mismatch, or too many bytes stops the upload there, without reading the rest of the request; the rejection is left
+on `handler.rejection` for the view.
+"""
+
+import hashlib
+import logging
+from pathlib import Path
+
+from django.core.files.uploadedfile import UploadedFile
+from django.core.files.uploadhandler import FileUploadHandler, StopUpload
+
+from bdr_uploader_hub_app.lib import metrics, staging_store
+from bdr_uploader_hub_app.lib.upload_digest import SliceHasher
+from bdr_uploader_hub_app.lib.upload_policy import SNIFF_BYTES, TYPE_CHECKED_FIELDS, Rejection, UploadPolicy
+
+log = logging.getLogger(__name__)
+
+
+class StagedUploadedFile(UploadedFile):
+    """
+    An upload already written to a staging temp-file, with its digests (md5, sha256, slices_sha256, size).
+    `staged_path` is set once uploaded_file_handler.stage_uploaded_file() adopts it.
+    """
+
+    def __init__(self, temp_path: Path, name, content_type, size, charset, content_type_extra, digests: dict):
+        super().__init__(open(temp_path, 'rb'), name, content_type, size, charset, content_type_extra)
+        self.temp_path: Path = temp_path
+        self.digests: dict = digests
+        self.staged_path: Path | None = None
+
+    def temporary_file_path(self) -> str:
+        return str(self.temp_path)
+
+    def close(self):
+        try:
+            return self.file.close()
+        finally:
+            if self.staged_path is None:  # never adopted; called when django closes the request's files
+                self.temp_path.unlink(missing_ok=True)
+
+
+class StagingUploadHandler(FileUploadHandler):
+    chunk_size: int = 2**20  # 1MB reads from the request-stream; django's default is 64KB
+
+    def __init__(self, request=None, policy: UploadPolicy | None = None):
+        super().__init__(request)
+        self.policy: UploadPolicy = policy or UploadPolicy()
+        self.rejection: Rejection | None = None
+        self.file_count: int = 0
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.temp_path: Path = staging_store.new_temp_path()
+        self.file = open(self.temp_path, 'wb')
+        self.md5_hasher = hashlib.md5()
+        self.sha256_hasher = hashlib.sha256()
+        self.slice_hasher = SliceHasher()
+        self.head: bytes = b''
+        self.head_checked: bool = self.field_name not in TYPE_CHECKED_FIELDS  # others aren't type-checked
+        self.file_count += 1
+        log.debug(f'streaming ``{self.file_name}`` to ``{self.temp_path.name}``')
+        self.enforce(
+            self.policy.check_count(self.file_count)
+            or (self.policy.check_name(self.file_name) if not self.head_checked else None)
+            or self.policy.check_size(self.content_length)
+        )
+
+    def receive_data_chunk(self, raw_data: bytes, start: int) -> None:
+        if not self.head_checked:
+            self.head += raw_data[: SNIFF_BYTES - len(self.head)]
+            if len(self.head) >= SNIFF_BYTES:
+                self.check_head()
+        self.enforce(self.policy.check_size(start + len(raw_data)))
+        self.file.write(raw_data)
+        self.md5_hasher.update(raw_data)
+        self.sha256_hasher.update(raw_data)
+        self.slice_hasher.update(raw_data)
+        return None  # consumed; no later handler sees the data
+
+    def check_head(self) -> None:
+        self.head_checked = True
+        self.enforce(self.policy.check_head(self.file_name, self.head))
+
+    def enforce(self, rejection: Rejection | None) -> None:
+        """
+        Stops the upload on a rejection, leaving the rest of the request unread.
+        """
+        if rejection is None:
+            return
+        self.rejection = rejection
+        self.file.close()  # the parser closes `self.file` again on StopUpload; closed, so it must not be None
+        self.temp_path.unlink(missing_ok=True)
+        metrics.UPLOAD_REJECTIONS.inc(reason=rejection.reason)
+        log.info(f'rejected upload ``{self.file_name}``; reason, ``{rejection.reason}``')
+        raise StopUpload(connection_reset=True)
+
+    def file_complete(self, file_size: int) -> StagedUploadedFile:
+        if not self.head_checked:  # smaller than SNIFF_BYTES
+            self.check_head()
+        self.file.close()
+        digests: dict = {
+            'md5': self.md5_hasher.hexdigest(),
+            'sha256': self.sha256_hasher.hexdigest(),
+            'slices_sha256': self.slice_hasher.hexdigest(),
+            'size': file_size,
+        }
+        return StagedUploadedFile(
+            self.temp_path,
+            self.file_name,
+            self.content_type,
+            file_size,
+            self.charset,
+            self.content_type_extra,
+            digests,
+        )
+
+    def upload_interrupted(self):
+        if getattr(self, 'file', None) and not self.file.closed:
+            self.file.close()
+            self.temp_path.unlink(missing_ok=True)
+            log.debug(f'upload interrupted; removed ``{self.temp_path.name}``')
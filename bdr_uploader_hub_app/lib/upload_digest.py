@@ -0,0 +1,113 @@
+"""
+The upload-digest the browser computes before sending a file, and the server re-computes as the file streams in.
+
+Format: the sha256 of the concatenated (binary) sha256-digests of the file's successive 4MB slices; an empty file
+is the sha256 of nothing. Web Crypto's digest() can only hash a whole buffer, so the browser hashes one slice at a
+time (see js/student_form.js) -- memory stays at one slice, whatever the file's size.
+
+Notes:
+- A mismatch means the bytes changed between the browser and the server, so the upload is rejected before anything
+  is staged (see verify()); uploads sent without a digest (no javascript, or no Web Crypto -- it needs https) are
+  accepted as before.
+- The digest also lets the form skip re-sending a main-file this session already staged, eg after "Edit" on the
+  confirmation page; see remember() and find_staged(). Only the session's own uploads are matched, so a digest
+  can't be used to probe for, or claim, anyone else's file.
+
+Called by lib/staging_upload_handler.py, lib/uploaded_file_handler.py and views.py.
+"""
+
+import hashlib
+import logging
+import re
+
+from bdr_uploader_hub_app.lib import staging_store
+
+log = logging.getLogger(__name__)
+
+SLICE_SIZE: int = 4 * 2**20  # 4MB; must match js/student_form.js
+DIGEST_PATTERN = re.compile(r'^[0-9a-f]{64}$')
+SESSION_KEY: str = 'staged_uploads'
+MAX_REMEMBERED: int = 10
+
+
+class SliceHasher:
+    """
+    Computes the upload-digest incrementally, from chunks of any size.
+    """
+
+    def __init__(self):
+        self.slice_hasher = hashlib.sha256()
+        self.slice_filled: int = 0
+        self.slice_digests = hashlib.sha256()
+
+    def update(self, data: bytes) -> None:
+        view = memoryview(data)
+        while view:
+            take: int = min(SLICE_SIZE - self.slice_filled, len(view))
+            self.slice_hasher.update(view[:take])
+            self.slice_filled += take
+            view = view[take:]
+            if self.slice_filled == SLICE_SIZE:
+                self.slice_digests.update(self.slice_hasher.digest())
+                self.slice_hasher = hashlib.sha256()
+                self.slice_filled = 0
+
+    def hexdigest(self) -> str:
+        final = self.slice_digests.copy()
+        if self.slice_filled:
+            final.update(self.slice_hasher.digest())
+        return final.hexdigest()
+
+
+def parse_digests(value: str) -> list[str]:
+    """
+    Returns the comma-separated digests, lowercased; blank entries (files the browser couldn't hash) stay blank.
+    """
+    return [digest.strip().lower() for digest in value.split(',')] if value.strip() else []
+
+
+def verify(post, files) -> list[str]:
+    """
+    Returns the names of uploaded files whose server-side digest doesn't match the browser's.
+    Digests come in `main_file_digest`, and `supplementary_files_digests` (comma-separated, in upload order).
+    """
+    mismatched: list[str] = []
+    for field_name, digest_field in (
+        ('main_file', 'main_file_digest'),
+        ('supplementary_files', 'supplementary_files_digests'),
+    ):
+        expected: list[str] = parse_digests(post.get(digest_field, ''))
+        for uploaded_file, expected_digest in zip(files.getlist(field_name), expected):
+            actual_digest: str | None = getattr(uploaded_file, 'digests', {}).get('slices_sha256')
+            if expected_digest and actual_digest and expected_digest != actual_digest:
+                log.warning(
+                    f'digest mismatch for ``{uploaded_file.name}``; '
+                    f'browser, ``{expected_digest}``; server, ``{actual_digest}``'
+                )
+                mismatched.append(uploaded_file.name)
+    return mismatched
+
+
+def remember(session, digest: str, entry: dict) -> None:
+    """
+    Records a staged main-file's details under its upload-digest, keeping the latest few.
+    """
+    remembered: dict = session.get(SESSION_KEY, {})
+    remembered.pop(digest, None)
+    remembered[digest] = entry
+    session[SESSION_KEY] = dict(list(remembered.items())[-MAX_REMEMBERED:])
+
+
+def find_staged(session, digest: str, size: int | None = None) -> dict | None:
+    """
+    Returns the details of the session's staged file with that upload-digest (and size, if given), if it's
+    still staged.
+    """
+    if not DIGEST_PATTERN.match(digest or ''):
+        return None
+    entry: dict | None = session.get(SESSION_KEY, {}).get(digest)
+    if entry is None or (size is not None and entry['size'] != size):
+        return None
+    if not staging_store.is_staged(entry['staged_file_name']):
+        return None
+    return entry
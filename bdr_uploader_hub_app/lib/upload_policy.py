@@ -0,0 +1,185 @@
+"""
+Per-app upload-policy: a maximum upload-size, and the allowed file-types.
+
+Set on the staff config-form (`max_upload_mb`, `allowed_file_types`), so stored in `AppConfig.temp_config_json`;
+either left blank means no limit. The size-limit is per file; the file-types apply to the main file only, since
+supplementary files (eg, datasets) are whatever the research produced.
+Enforced as the upload arrives, so a bad upload is rejected without being received:
+- views.upload_slug() checks the request's Content-Length before reading the body.
+- StagingUploadHandler checks each file's extension when its part starts, its first bytes against the file-type's
+  magic-numbers, and its running size as chunks arrive.
+"""
+
+import logging
+from dataclasses import dataclass
+from pathlib import Path
+
+from django.conf import settings
+
+log = logging.getLogger(__name__)
+
+SNIFF_BYTES: int = 512  # enough for every signature below
+MAX_SUPPLEMENTARY_FILES: int = 100
+TYPE_CHECKED_FIELDS: tuple[str, ...] = ('main_file',)
+
+
+@dataclass(frozen=True)
+class FileType:
+    label: str
+    extensions: tuple[str, ...]
+    signatures: tuple[tuple[int, bytes], ...]  # (offset, magic-bytes); empty means "text": no NUL bytes
+
+
+## `RIFF....WEBP`-style signatures are checked at their offset
+FILE_TYPES: dict[str, FileType] = {
+    'pdf': FileType('PDF', ('.pdf',), ((0, b'%PDF-'),)),
+    'image': FileType(
+        'Images',
+        ('.jpg', '.jpeg', '.png', '.gif', '.tif', '.tiff', '.webp'),
+        (
+            (0, b'\xff\xd8\xff'),
+            (0, b'\x89PNG\r\n\x1a\n'),
+            (0, b'GIF87a'),
+            (0, b'GIF89a'),
+            (0, b'II*\x00'),
+            (0, b'MM\x00*'),
+            (8, b'WEBP'),
+        ),
+    ),
+    'audio': FileType(
+        'Audio',
+        ('.mp3', '.wav', '.flac', '.ogg', '.m4a'),
+        (
+            (0, b'ID3'),
+            (0, b'\xff\xfb'),
+            (0, b'\xff\xf3'),
+            (0, b'\xff\xf2'),
+            (8, b'WAVE'),
+            (0, b'fLaC'),
+            (0, b'OggS'),
+            (4, b'ftyp'),
+        ),
+    ),
+    'video': FileType(
+        'Video',
+        ('.mp4', '.mov', '.m4v', '.webm', '.mkv', '.avi'),
+        ((4, b'ftyp'), (0, b'\x1aE\xdf\xa3'), (8, b'AVI ')),
+    ),
+    'archive': FileType(
+        'Archives',
+        ('.zip', '.gz', '.tgz', '.7z'),
+        ((0, b'PK\x03\x04'), (0, b'PK\x05\x06'), (0, b'\x1f\x8b'), (0, b"7z\xbc\xaf'\x1c")),
+    ),
+    'office': FileType(
+        'Office documents',
+        ('.docx', '.xlsx', '.pptx', '.doc', '.xls', '.ppt', '.odt', '.ods', '.odp'),
+        ((0, b'PK\x03\x04'), (0, b'\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1')),
+    ),
+    'text': FileType('Plain text and data', ('.txt', '.csv', '.tsv', '.md', '.json', '.xml', '.tex'), ()),
+}
+FILE_TYPE_CHOICES: list[tuple[str, str]] = [(key, file_type.label) for key, file_type in FILE_TYPES.items()]
+
+
+@dataclass(frozen=True)
+class Rejection:
+    status: int  # 413 for too large, 415 for a disallowed type
+    reason: str  # metric-label
+    message: str  # for the student
+
+
+@dataclass(frozen=True)
+class UploadPolicy:
+    max_bytes: int | None = None
+    file_types: tuple[str, ...] = ()
+    max_files: int = 1
+
+    @classmethod
+    def from_config(cls, config_data: dict) -> 'UploadPolicy':
+        """
+        Builds the policy from an AppConfig's `temp_config_json`.
+        Called by views.upload_slug(), and forms.student_form.make_student_form_class().
+        """
+        max_upload_mb = config_data.get('max_upload_mb')
+        file_types: tuple[str, ...] = tuple(key for key in config_data.get('allowed_file_types') or () if key in FILE_TYPES)
+        return cls(
+            max_bytes=int(max_upload_mb) * 1024 * 1024 if max_upload_mb else None,
+            file_types=file_types,
+            max_files=1 + MAX_SUPPLEMENTARY_FILES if config_data.get('invite_supplementary_files') else 1,
+        )
+
+    def check_content_length(self, content_length: str | int | None) -> Rejection | None:
+        """
+        Rejects a request whose body couldn't fit within the limit, before it's read.
+        Other form-fields are allowed for, up to django's DATA_UPLOAD_MAX_MEMORY_SIZE, which caps them anyway.
+        Called by views.upload_slug().
+        """
+        try:
+            length: int = int(content_length or 0)
+        except ValueError:
+            return None  # django's request-parsing handles a malformed header
+        field_allowance: int = settings.DATA_UPLOAD_MAX_MEMORY_SIZE or 0
+        if self.max_bytes is not None and length > self.max_bytes * self.max_files + field_allowance:
+            return self.too_large()
+        return None
+
+    def check_size(self, size: int | None) -> Rejection | None:
+        """
+        Called by StagingUploadHandler, with a part's declared size, and with the running size as chunks arrive.
+        """
+        if self.max_bytes is not None and size is not None and size > self.max_bytes:
+            return self.too_large()
+        return None
+
+    def check_count(self, file_count: int) -> Rejection | None:
+        """
+        Called by StagingUploadHandler as each file's part starts.
+        """
+        if file_count > self.max_files:
+            return Rejection(413, 'count', f'Too many files; this form accepts at most {self.max_files}.')
+        return None
+
+    def check_name(self, file_name: str) -> Rejection | None:
+        """
+        Called by StagingUploadHandler when a file's part starts.
+        """
+        if self.file_types and not self.file_type_for(file_name):
+            extension: str = Path(file_name).suffix.lower() or 'extension-less'
+            return Rejection(415, 'extension', f"`{extension}` files aren't accepted; {self.describe_types()}.")
+        return None
+
+    def check_head(self, file_name: str, head: bytes) -> Rejection | None:
+        """
+        Checks a file's first bytes against its extension's file-type.
+        Called by StagingUploadHandler once it has SNIFF_BYTES (or the whole file, if smaller).
+        """
+        file_type: FileType | None = self.file_type_for(file_name)
+        if file_type is None:  # no type-restrictions
+            return None
+        if file_type.signatures:
+            matched: bool = any(head[offset : offset + len(magic)] == magic for (offset, magic) in file_type.signatures)
+        else:
+            matched = b'\x00' not in head
+        if not matched:
+            log.debug(f'head of ``{file_name}`` does not match ``{file_type.label}``; head, ``{head[:16]!r}``')
+            return Rejection(415, 'content', f"The file's content doesn't look like its `{Path(file_name).suffix}` type.")
+        return None
+
+    def file_type_for(self, file_name: str) -> FileType | None:
+        extension: str = Path(file_name).suffix.lower()
+        for key in self.file_types:
+            if extension in FILE_TYPES[key].extensions:
+                return FILE_TYPES[key]
+        return None
+
+    def accept_attribute(self) -> str:
+        """
+        Returns the file-input's `accept` value, so the browser's file-picker offers only allowed files.
+        Called by forms.student_form.make_student_form_class().
+        """
+        return ','.join(extension for key in self.file_types for extension in FILE_TYPES[key].extensions)
+
+    def describe_types(self) -> str:
+        return 'accepted: ' + ', '.join(FILE_TYPES[key].label for key in self.file_types)
+
+    def too_large(self) -> Rejection:
+        return Rejection(413, 'size', f"The file is larger than this form's limit of {self.max_bytes // (1024 * 1024)}MB.")
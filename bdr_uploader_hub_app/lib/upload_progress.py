@@ -0,0 +1,110 @@
+"""
+Server-side progress for student-form uploads, so a student watching a large upload sees it moving (and doesn't
+re-submit it).
+
+Flow:
+- js/student_form.js gives each submission a random upload-id, posts the form with `?upload_id=<id>`, and polls
+  views.hlpr_upload_progress() with the same id until the post's response arrives.
+- views.upload_slug() installs UploadProgressHandler ahead of the StagingUploadHandler; it counts the bytes
+  passing through, and records them in the default cache under the student's user-id and the upload-id.
+- hlpr_upload_progress() reads that record back: `uploading` (with bytes received so far, of the Content-Length),
+  `received` (the body's all in; the server's staging it), or `unknown`.
+
+Notes:
+- Writes are throttled to one per `UPLOAD_PROGRESS_WRITE_INTERVAL_SECONDS` per upload, plus the first and last --
+  a 1GB upload arrives in ~1000 chunks, but costs only a handful of cache-writes.
+- The cache must be shared between the server's processes (eg memcached, redis, or the database-cache), since
+  the poll may be answered by a different worker than the one receiving the upload; with the `locmem` or `dummy`
+  backends, polls just report `unknown`.
+- Cache-errors are logged, and stop further progress-writes for that upload; they never fail the upload itself.
+- Keys include the user-id, so one student can't read another's progress by guessing an upload-id.
+
+Called by views.upload_slug() and views.hlpr_upload_progress().
+"""
+
+import logging
+import re
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.uploadhandler import FileUploadHandler
+
+from bdr_uploader_hub_app.lib import metrics
+
+log = logging.getLogger(__name__)
+
+UPLOAD_ID_PATTERN = re.compile(r'^[0-9A-Za-z-]{8,64}$')
+CACHE_SECONDS: int = 60 * 60  # the longest an upload's progress is kept
+
+
+def cache_key(user_id, upload_id: str) -> str:
+    return f'upload_progress:{user_id}:{upload_id}'
+
+
+def get_progress(user_id, upload_id: str) -> dict:
+    """
+    Returns the upload's progress, like {'state': 'uploading', 'received': 1048576, 'size': 8388608};
+    `state` is `unknown` for an invalid, expired, or not-yet-started upload-id.
+    """
+    if not UPLOAD_ID_PATTERN.match(upload_id or ''):
+        return {'state': 'unknown'}
+    return cache.get(cache_key(user_id, upload_id)) or {'state': 'unknown'}
+
+
+def describe(progress: dict) -> str:
+    """
+    Returns the progress as a short sentence, for the htmx poll.
+    """
+    if progress['state'] == 'received':
+        return 'Upload received; processing…'
+    if progress['state'] == 'uploading' and progress.get('size'):
+        percent: int = min(100, int(100 * progress['received'] / progress['size']))
+        return f'Uploading… {percent}% ({progress["received"] / 2**20:.1f} of {progress["size"] / 2**20:.1f} MB)'
+    return ''
+
+
+class UploadProgressHandler(FileUploadHandler):
+    """
+    Counts the upload's bytes as they pass through to the next handler, and records them in the cache.
+    Does nothing for a request without a valid `upload_id`.
+    """
+
+    def __init__(self, request=None):
+        super().__init__(request)
+        upload_id: str = request.GET.get('upload_id', '') if request else ''
+        self.key: str | None = cache_key(request.user.pk, upload_id) if UPLOAD_ID_PATTERN.match(upload_id) else None
+        self.interval: float = settings.UPLOAD_PROGRESS_WRITE_INTERVAL_SECONDS
+        self.size: int = 0
+        self.received: int = 0
+        self.last_write: float = 0.0
+
+    def write(self, state: str) -> None:
+        if self.key is None:
+            return
+        try:
+            cache.set(self.key, {'state': state, 'received': self.received, 'size': self.size}, CACHE_SECONDS)
+        except Exception as e:  # progress is a courtesy; a cache-outage mustn't fail the upload
+            log.warning(f'could not record upload-progress; {e}')
+            self.key = None
+            return
+        self.last_write = time.monotonic()
+        metrics.UPLOAD_PROGRESS_WRITES.inc()
+
+    def handle_raw_input(self, input_data, META, content_length, boundary, encoding=None):
+        self.size = content_length
+        self.write('uploading')
+        return None  # the parser still does the parsing
+
+    def receive_data_chunk(self, raw_data: bytes, start: int) -> bytes:
+        self.received += len(raw_data)
+        if time.monotonic() - self.last_write >= self.interval:
+            self.write('uploading')
+        return raw_data  # passed on to the staging-handler
+
+    def file_complete(self, file_size: int) -> None:
+        return None  # the staging-handler returns the file
+
+    def upload_complete(self) -> None:
+        self.received = self.size
+        self.write('received')
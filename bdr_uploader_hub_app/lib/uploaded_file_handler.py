@@ -1,73 +1,114 @@
 import hashlib
 import logging
-import uuid
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
-from django.core.files.base import ContentFile
-
-# from django.core.files.storage import default_storage
-from django.core.files.storage import FileSystemStorage
+from django.conf import settings
 from django.core.files.uploadedfile import UploadedFile
 
+from bdr_uploader_hub_app.lib import metrics, staging_store
+from bdr_uploader_hub_app.lib.staging_upload_handler import StagedUploadedFile
+from bdr_uploader_hub_app.lib.upload_digest import SliceHasher
+
 log = logging.getLogger(__name__)
 
-fs_storage = FileSystemStorage()
+CHECKSUM_CHUNK_SIZE: int = 8 * 2**20  # 8MB; keeps memory flat for multi-GB files
 
 
-def handle_uploaded_file(file_field: UploadedFile) -> Path:
+def stage_uploaded_file(file_field: UploadedFile) -> tuple[Path, dict]:
     """
     Called by views.upload_slug() on student-form submit, if form is valid.
 
-    Apparently it's good to go through the relative-path rigamarole below
-    because using default_storage.save() is supposed to be good, and it needs a relative path.  🤔
+    Stages the upload in the content-addressed staging-store, which names it `sha256.ext` --
+    or drops it, if that content is already staged (eg, a re-upload after "Edit").
+    Returns the staged path, and the digests (md5, sha256, slices_sha256, size), so the upload needn't be re-read
+    to checksum it.
+    - An upload streamed in by StagingUploadHandler is already written and hashed; staging it is a rename.
+    - Otherwise (eg, django's default handlers), the chunks are streamed to a staging temp-file, hashing as they go.
+    """
+    start_time: float = time.perf_counter()
+    extension: str = Path(file_field.name).suffix
+    if isinstance(file_field, StagedUploadedFile):
+        digests: dict = file_field.digests
+        final_path: Path = staging_store.adopt(file_field.temp_path, digests['sha256'], extension)
+        file_field.staged_path = final_path
+    else:
+        temp_path: Path = staging_store.new_temp_path()
+        log.debug(f'temp_path, ``{temp_path}``')
+        md5_hasher = hashlib.md5()
+        sha256_hasher = hashlib.sha256()
+        slice_hasher = SliceHasher()
+        size: int = 0
+        try:
+            with open(temp_path, 'wb') as f:
+                for chunk in file_field.chunks(CHECKSUM_CHUNK_SIZE):
+                    md5_hasher.update(chunk)
+                    sha256_hasher.update(chunk)
+                    slice_hasher.update(chunk)
+                    f.write(chunk)
+                    size += len(chunk)
+            digests = {
+                'md5': md5_hasher.hexdigest(),
+                'sha256': sha256_hasher.hexdigest(),
+                'slices_sha256': slice_hasher.hexdigest(),
+                'size': size,
+            }
+            final_path = staging_store.adopt(temp_path, digests['sha256'], extension)
+        except Exception:
+            temp_path.unlink(missing_ok=True)
+            raise
+    log.debug(f'final_path, ``{final_path}``')
+    metrics.UPLOAD_SECONDS.observe(time.perf_counter() - start_time)
+    metrics.UPLOAD_BYTES.observe(digests['size'])
+    return (final_path, digests)
 
-    From reading django docs, there are nice some things django automatically does
-    based on the uploaded size of the file (like saving to disk or memory).
-    I can't remember if those features are active here, but am using standard approaches.
 
-    But it still feels unnecessaryily messy. TODO: review and possibly refactor.
+def stage_uploaded_files(file_fields: list[UploadedFile]) -> list[tuple[Path, dict]]:
     """
+    Called by views.upload_slug() on student-form submit, for the supplementary files.
 
-    ## use storage directory directly since MEDIA_ROOT includes it
-    # staging_dir: Path = Path(default_storage.location)
-    staging_dir: Path = Path(fs_storage.location)
-    staging_dir.mkdir(parents=True, exist_ok=True)
-    log.debug(f'staging_dir, ``{staging_dir}``')
+    Stages the files concurrently, on a pool bounded by `settings.STAGING_WORKERS`: hashing and writing release
+    the GIL, so a dataset's dozens of files needn't wait on each other. Returns results in the files' order.
+    """
+    if len(file_fields) <= 1:
+        return [stage_uploaded_file(file_field) for file_field in file_fields]
+    with ThreadPoolExecutor(max_workers=max(settings.STAGING_WORKERS, 1)) as executor:
+        return list(executor.map(stage_uploaded_file, file_fields))
 
-    ## generate unique filename with original extension
-    extension: str = Path(file_field.name).suffix
-    filename: str = f'{uuid.uuid4().hex}{extension}'
-    file_path: Path = staging_dir / filename
-    log.debug(f'file_path, ``{file_path}``')
-
-    ## compute relative path (since MEDIA_ROOT is the base, this is just the filename)
-    relative_path: Path = file_path.relative_to(staging_dir)
-    log.debug(f'relative_path, ``{relative_path}``')
-
-    ## read file content and wrap in ContentFile
-    file_content: bytes = file_field.read()
-    content_file: ContentFile = ContentFile(file_content)
-
-    ## convert the relative path to string for default_storage.save
-    relative_path_str: str = str(relative_path)
-    ## save the file using the default storage and get the saved path
-    # saved_path: str = default_storage.save(relative_path_str, content_file)
-    saved_path: str = fs_storage.save(relative_path_str, content_file)
-    log.debug(f'saved_path, ``{saved_path}``')
-
-    ## return the absolute, resolved path to the saved file
-    final_path: Path = (staging_dir / saved_path).resolve()
-    log.debug(f'final_path, ``{final_path}``')
-    return final_path
+
+def handle_uploaded_file(file_field: UploadedFile) -> Path:
+    """
+    Stages the upload; returns only the staged path. See stage_uploaded_file().
+    """
+    return stage_uploaded_file(file_field)[0]
+
+
+def stage_local_file(source_path: Path) -> tuple[Path, dict]:
+    """
+    Stages a file already on the server (eg, from a bulk-import drop-directory) into the content-addressed
+    staging-store; returns the staged path, and the digests (md5, sha256, size) computed while staging,
+    so callers needn't re-read the file to checksum it.
+    Called by manifest_importer.stage_row_file().
+    """
+    start_time: float = time.perf_counter()
+    (final_path, digests) = staging_store.store_local_file(source_path)
+    log.debug(f'staged ``{source_path}`` to ``{final_path}``')
+    metrics.UPLOAD_SECONDS.observe(time.perf_counter() - start_time)
+    metrics.UPLOAD_BYTES.observe(digests['size'])
+    return (final_path, digests)
 
 
 def make_checksum(saved_path: Path) -> tuple[str, str]:
     """
-    Called by views.upload_slug() on student-form submit, if form is valid.
     Computes the checksum of the file-content and returns a tuple of the checksum_type and checksum.
+    Reads in chunks, so memory-use doesn't grow with file-size.
     """
-    with open(saved_path, 'rb') as f:
-        file_content = f.read()
-    checksum = hashlib.md5(file_content).hexdigest()
+    with metrics.CHECKSUM_SECONDS.time():
+        hasher = hashlib.md5()
+        with open(saved_path, 'rb') as f:
+            while chunk := f.read(CHECKSUM_CHUNK_SIZE):
+                hasher.update(chunk)
+        checksum = hasher.hexdigest()
     checksum_type = 'md5'
     return checksum_type, checksum
@@ -0,0 +1,66 @@
+"""
+Bulk-creates Submissions from a CSV/JSON manifest and a directory of files.
+
+Usage:
+    uv run ./manage.py import_manifest --app SLUG --manifest PATH --files-dir PATH [--report PATH] [--dry-run]
+
+Manifest columns: `file` (relative to --files-dir), `student_eppn`, `student_email`, plus any student-form fields
+(`title`, `abstract`, `authors`, `license_options`, `visibility_options`, etc.). Rows are validated against the app's
+staff-config; created Submissions are `ready_to_ingest` (or `scanning`, first, when malware-scanning is on),
+for the normal admin ingest-action.
+"""
+
+import logging
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from bdr_uploader_hub_app.lib import manifest_importer, metrics
+from bdr_uploader_hub_app.models import AppConfig
+
+log = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = 'Bulk-creates Submissions from a CSV/JSON manifest and a directory of files.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--app', required=True, help='slug of the target AppConfig')
+        parser.add_argument('--manifest', required=True, help='path to a .csv or .json manifest')
+        parser.add_argument('--files-dir', required=True, help='directory the manifest `file` column is relative to')
+        parser.add_argument('--report', help='path for the per-row csv report (default: print to stdout)')
+        parser.add_argument('--workers', type=int, default=manifest_importer.DEFAULT_WORKERS)
+        parser.add_argument('--batch-size', type=int, default=manifest_importer.DEFAULT_BATCH_SIZE)
+        parser.add_argument('--dry-run', action='store_true', help='validate only; stage nothing, create nothing')
+
+    def handle(self, *args, **options):
+        with metrics.publishing('import_manifest'):
+            try:
+                app_config: AppConfig = AppConfig.objects.get(slug=options['app'])
+            except AppConfig.DoesNotExist:
+                raise CommandError(f'no app with slug ``{options["app"]}``')
+            manifest_path = Path(options['manifest'])
+            files_dir = Path(options['files_dir'])
+            if not manifest_path.is_file():
+                raise CommandError(f'manifest not found, ``{manifest_path}``')
+            if not files_dir.is_dir():
+                raise CommandError(f'files-dir not found, ``{files_dir}``')
+            ## import ---------------------------------------------------
+            manifest_format: str = manifest_importer.guess_manifest_format(manifest_path.name)
+            rows: list[dict[str, str]] = manifest_importer.read_manifest(manifest_path.read_text(), manifest_format)
+            results = manifest_importer.import_manifest(
+                app_config,
+                rows,
+                files_dir,
+                workers=options['workers'],
+                batch_size=options['batch_size'],
+                dry_run=options['dry_run'],
+            )
+            ## report ---------------------------------------------------
+            report_csv: str = manifest_importer.make_report_csv(results)
+            if options['report']:
+                Path(options['report']).write_text(report_csv)
+            else:
+                self.stdout.write(report_csv)
+            summary: dict[str, int] = manifest_importer.summarize(results)
+            self.stderr.write(f'rows: {len(results)}; ' + '; '.join(f'{key}: {val}' for key, val in sorted(summary.items())))
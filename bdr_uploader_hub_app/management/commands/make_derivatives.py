@@ -0,0 +1,44 @@
+"""
+Makes first-page previews and extracted text for pending Submissions' staged files.
+
+Usage:
+    uv run ./manage.py make_derivatives [--batch-size N] [--workers N] [--interval SECONDS]
+
+Defaults come from setting `DERIVATIVE_WORKERS`. Run from cron, or pass `--interval` to keep it running as a
+simple daemon. See lib/derivative_maker.py.
+"""
+
+import logging
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from bdr_uploader_hub_app.lib import derivative_maker, metrics
+
+log = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = "Makes first-page previews and extracted text for pending Submissions' staged files."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=derivative_maker.DEFAULT_BATCH_SIZE)
+        parser.add_argument('--workers', type=int, default=None, help='tool-running processes; 0 runs in-process')
+        parser.add_argument('--interval', type=float, default=None, help='re-run every N seconds, until stopped')
+
+    def handle(self, *args, **options):
+        with metrics.publishing('make_derivatives'):
+            while True:
+                ## work through the pending submissions, a batch at a time
+                while True:
+                    try:
+                        summary: dict[str, int] = derivative_maker.make_pending(options['batch_size'], options['workers'])
+                    except derivative_maker.DerivativesUnavailable as e:
+                        raise CommandError(str(e)) from e
+                    if not summary:
+                        break
+                    self.stdout.write('; '.join(f'{key}: {val}' for key, val in sorted(summary.items())))
+                if options['interval'] is None:
+                    break
+                metrics.publish()
+                time.sleep(options['interval'])
@@ -0,0 +1,56 @@
+"""
+Ingest dry-run: renders and validates every BDR-API payload for the selected submissions, without posting.
+
+Usage:
+    uv run ./manage.py preview_ingest [--app SLUG] [--id UUID ...] [--workers N] [--verify-checksums]
+                                      [--format text|jsonl]
+
+Without `--id`, previews all `ready_to_ingest` submissions (optionally for one app). The report streams
+to stdout as results complete; the command exits non-zero if any submission would fail. See lib/ingest_preview.py.
+"""
+
+import logging
+
+from django.core.management.base import BaseCommand, CommandError
+
+from bdr_uploader_hub_app.lib import ingest_preview
+from bdr_uploader_hub_app.models import Submission
+
+log = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = 'Renders and validates every BDR-API payload for the selected submissions, without posting.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--app', help='slug of an AppConfig, to limit the selection')
+        parser.add_argument('--id', action='append', dest='ids', help='a submission id; may be repeated')
+        parser.add_argument('--workers', type=int, default=ingest_preview.DEFAULT_WORKERS)
+        parser.add_argument('--verify-checksums', action='store_true', help='also re-hash each staged file')
+        parser.add_argument('--format', choices=('text', 'jsonl'), default='text', dest='output_format')
+
+    def handle(self, *args, **options):
+        submissions = Submission.objects.all()
+        if options['ids']:
+            submissions = submissions.filter(id__in=options['ids'])
+        else:
+            submissions = submissions.filter(status='ready_to_ingest')
+        if options['app']:
+            submissions = submissions.filter(app__slug=options['app'])
+        results = ingest_preview.preview_submissions(
+            submissions, workers=options['workers'], verify_checksums=options['verify_checksums']
+        )
+        for line in ingest_preview.stream_report(self.count_errors(results), options['output_format']):
+            self.stdout.write(line, ending='')
+            self.stdout.flush()
+        if self.error_count:
+            raise CommandError(f'{self.error_count} submission(s) would fail to ingest')
+
+    def count_errors(self, results):
+        """
+        Passes results through, counting errors for the exit-status.
+        """
+        self.error_count: int = 0
+        for result in results:
+            self.error_count += result['status'] == 'error'
+            yield result
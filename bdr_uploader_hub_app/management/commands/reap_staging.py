@@ -0,0 +1,52 @@
+"""
+Removes orphaned, expired, and leftover-temp staged files from MEDIA_ROOT (and, with object-storage, the bucket).
+
+Usage:
+    uv run ./manage.py reap_staging [--grace-hours N] [--retention-days N] [--dry-run] [--interval SECONDS]
+
+Defaults come from settings `STAGING_ORPHAN_GRACE_HOURS` and `INGESTED_RETENTION_DAYS`.
+Run from cron, or pass `--interval` to keep it running as a simple daemon. See lib/staging_reaper.py.
+"""
+
+import logging
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from bdr_uploader_hub_app.lib import metrics, staging_reaper
+
+log = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = 'Removes orphaned, expired, and leftover-temp staged files from MEDIA_ROOT.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--grace-hours', type=float, default=None, help='minimum age of any removed file')
+        parser.add_argument('--retention-days', type=float, default=None, help='how long to keep ingested files')
+        parser.add_argument('--batch-size', type=int, default=staging_reaper.DEFAULT_BATCH_SIZE)
+        parser.add_argument('--dry-run', action='store_true', help='report what would be removed; remove nothing')
+        parser.add_argument('--interval', type=float, default=None, help='re-run every N seconds, until stopped')
+
+    def handle(self, *args, **options):
+        with metrics.publishing('reap_staging'):
+            grace_hours: float = (
+                options['grace_hours'] if options['grace_hours'] is not None else settings.STAGING_ORPHAN_GRACE_HOURS
+            )
+            retention_days: float | None = (
+                options['retention_days'] if options['retention_days'] is not None else settings.INGESTED_RETENTION_DAYS
+            )
+            if grace_hours < 1:
+                raise CommandError('--grace-hours must be at least 1, so in-progress uploads are never removed')
+            while True:
+                summary = staging_reaper.reap(grace_hours, retention_days, options['batch_size'], options['dry_run'])
+                self.stdout.write(
+                    f'scanned: {summary.scanned}; orphaned: {summary.orphaned}; expired: {summary.expired}; '
+                    f'temp_files: {summary.temp_files}; bytes_freed: {summary.bytes_freed}'
+                    + ('; (dry-run)' if options['dry_run'] else '')
+                )
+                if options['interval'] is None:
+                    break
+                metrics.publish()
+                time.sleep(options['interval'])
@@ -0,0 +1,43 @@
+"""
+Releases submissions left `ingesting` by an ingest that never finished (eg, a worker timeout or crash).
+
+Usage:
+    uv run ./manage.py release_stale_ingests [--older-than-minutes N]
+
+Those with a BDR pid become `ingested`; the rest go back to `ready_to_ingest`, to be re-ingested.
+Run from cron. See lib/ingest_status_handler.py.
+"""
+
+import logging
+
+from django.core.management.base import BaseCommand, CommandError
+
+from bdr_uploader_hub_app.lib import ingest_status_handler, metrics
+
+log = logging.getLogger(__name__)
+
+## A running ingest refreshes its remaining claims once per LOAD_CHUNK_SIZE submissions (see Ingester.load_claimed()),
+## so only one that's spent this long on a single chunk can lose claims to this command; and since each claim is
+## re-checked just before its post, a released one is skipped by the running ingest, not posted twice.
+MIN_STALE_MINUTES: float = 10
+
+
+class Command(BaseCommand):
+    help = 'Releases submissions left `ingesting` by an ingest that never finished.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--older-than-minutes',
+            type=float,
+            default=ingest_status_handler.DEFAULT_STALE_CLAIM_MINUTES,
+            help='minimum time since the submission was claimed',
+        )
+
+    def handle(self, *args, **options):
+        with metrics.publishing('release_stale_ingests'):
+            if options['older_than_minutes'] < MIN_STALE_MINUTES:
+                raise CommandError(
+                    f'--older-than-minutes must be at least {MIN_STALE_MINUTES:g}, so running ingests are left alone'
+                )
+            summary: dict[str, int] = ingest_status_handler.release_stale_claims(options['older_than_minutes'])
+            self.stdout.write('; '.join(f'{status}: {count}' for status, count in summary.items()))
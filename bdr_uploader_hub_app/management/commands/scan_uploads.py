@@ -0,0 +1,45 @@
+"""
+Malware-scans the files of `scanning` Submissions; clean ones become `ready_to_ingest`, others `quarantined`.
+
+Usage:
+    uv run ./manage.py scan_uploads [--batch-size N] [--workers N] [--interval SECONDS]
+
+Defaults come from setting `MALWARE_SCAN_WORKERS`. Run from cron, or pass `--interval` to keep it running as a
+simple daemon. See lib/malware_scanner.py.
+"""
+
+import logging
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from bdr_uploader_hub_app.lib import malware_scanner, metrics
+
+log = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = 'Malware-scans the files of `scanning` Submissions.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=malware_scanner.DEFAULT_BATCH_SIZE)
+        parser.add_argument('--workers', type=int, default=None, help='concurrent scans; 0 scans one at a time')
+        parser.add_argument('--interval', type=float, default=None, help='re-run every N seconds, until stopped')
+
+    def handle(self, *args, **options):
+        with metrics.publishing('scan_uploads'):
+            while True:
+                ## work through the waiting submissions, a batch at a time
+                while True:
+                    try:
+                        summary: dict[str, int] = malware_scanner.scan_pending(options['batch_size'], options['workers'])
+                    except malware_scanner.ScanningUnavailable as e:
+                        raise CommandError(str(e)) from e
+                    if summary:
+                        self.stdout.write('; '.join(f'{key}: {val}' for key, val in sorted(summary.items())))
+                    if not summary or summary.get('error'):
+                        break  # done, or the scanner is struggling; try again next interval
+                if options['interval'] is None:
+                    break
+                metrics.publish()
+                time.sleep(options['interval'])
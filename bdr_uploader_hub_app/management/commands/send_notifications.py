@@ -0,0 +1,40 @@
+"""
+Sends queued notification emails from the Notification outbox.
+
+Usage:
+    uv run ./manage.py send_notifications [--batch-size N] [--interval SECONDS]
+
+Run from cron, or pass `--interval` to keep it running as a simple daemon. See lib/notification_handler.py.
+"""
+
+import logging
+import time
+
+from django.core.management.base import BaseCommand
+
+from bdr_uploader_hub_app.lib import metrics, notification_handler
+
+log = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = 'Sends queued notification emails from the Notification outbox.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=notification_handler.DEFAULT_BATCH_SIZE)
+        parser.add_argument('--interval', type=float, default=None, help='re-run every N seconds, until stopped')
+
+    def handle(self, *args, **options):
+        with metrics.publishing('send_notifications'):
+            while True:
+                ## drain the outbox, a batch at a time ------------------
+                while True:
+                    summary: dict[str, int] = notification_handler.send_pending(options['batch_size'])
+                    if summary['sent'] or summary['failed']:
+                        self.stdout.write(f'sent: {summary["sent"]}; failed: {summary["failed"]}')
+                    if summary['sent'] + summary['failed'] == 0 or summary['failed']:
+                        break  # empty, or the mail-server is struggling; try again next interval
+                if options['interval'] is None:
+                    break
+                metrics.publish()
+                time.sleep(options['interval'])
@@ -0,0 +1,31 @@
+"""
+Relocates flat, pre-sharding staged files into MEDIA_ROOT's sharded layout, and rewrites `Submission.primary_file`.
+
+Usage:
+    uv run ./manage.py shard_staging [--batch-size N] [--dry-run]
+
+Safe to run while the app is up, and to re-run. See lib/staging_sharder.py.
+"""
+
+import logging
+
+from django.core.management.base import BaseCommand
+
+from bdr_uploader_hub_app.lib import staging_sharder
+
+log = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = "Relocates flat, pre-sharding staged files into MEDIA_ROOT's sharded layout."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=staging_sharder.DEFAULT_BATCH_SIZE)
+        parser.add_argument('--dry-run', action='store_true', help='report what would be moved; move nothing')
+
+    def handle(self, *args, **options):
+        summary = staging_sharder.shard(options['batch_size'], options['dry_run'])
+        self.stdout.write(
+            f'relocated: {summary.relocated}; duplicates: {summary.duplicates}; rewritten: {summary.rewritten}'
+            + ('; (dry-run)' if options['dry_run'] else '')
+        )
@@ -0,0 +1,45 @@
+"""
+Re-hashes staged files and flags Submissions whose file no longer matches the stored checksum.
+
+Usage:
+    uv run ./manage.py verify_fixity [--workers N] [--max-mb-per-second N] [--include-ingested]
+                                     [--not-verified-within-hours N]
+
+Defaults come from settings `FIXITY_WORKERS` and `FIXITY_MAX_MB_PER_SECOND`. Exits non-zero if any problems
+are found, so a nightly cron-job can alert. See lib/fixity_checker.py.
+"""
+
+import logging
+
+from django.core.management.base import BaseCommand, CommandError
+
+from bdr_uploader_hub_app.lib import fixity_checker, metrics
+
+log = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = 'Re-hashes staged files and flags Submissions whose file no longer matches the stored checksum.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=None, help='hashing processes; 0 hashes in-process')
+        parser.add_argument('--max-mb-per-second', type=float, default=None, help='total read-rate; 0 is unthrottled')
+        parser.add_argument('--include-ingested', action='store_true', help='also check ingested submissions')
+        parser.add_argument('--not-verified-within-hours', type=float, default=None, help='skip recently-verified')
+
+    def handle(self, *args, **options):
+        with metrics.publishing('verify_fixity'):
+            submissions = fixity_checker.select_submissions(
+                include_ingested=options['include_ingested'],
+                not_verified_within_hours=options['not_verified_within_hours'],
+            )
+            try:
+                summary: dict[str, int] = fixity_checker.verify_submissions(
+                    submissions, workers=options['workers'], max_mb_per_second=options['max_mb_per_second']
+                )
+            except fixity_checker.FixityUnavailable as e:
+                raise CommandError(str(e)) from e
+            summary_text: str = '; '.join(f'{key}: {val}' for key, val in sorted(summary.items())) or 'nothing to check'
+            self.stdout.write(summary_text)
+            if set(summary) - {'ok'}:
+                raise CommandError(f'fixity problems found; {summary_text}')
@@ -0,0 +1,47 @@
+"""
+Project middleware.
+Enabled via the `MIDDLEWARE` list in `config/settings.py`.
+"""
+
+import logging
+import time
+
+from bdr_uploader_hub_app.lib import metrics, profiling_handler
+
+log = logging.getLogger(__name__)
+
+
+class ViewTimingMiddleware:
+    """
+    Records per-view request durations into the `bdr_hub_view_seconds` histogram.
+    Cost is one perf_counter() pair and one histogram-observe per request.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        start = time.perf_counter()
+        response = self.get_response(request)
+        elapsed = time.perf_counter() - start
+        resolver_match = getattr(request, 'resolver_match', None)
+        view_name: str = resolver_match.view_name if resolver_match else 'unresolved'
+        metrics.VIEW_SECONDS.observe(elapsed, view=view_name, method=request.method, status=str(response.status_code))
+        return response
+
+
+class ProfilingMiddleware:
+    """
+    Opt-in, staff-only profiling of a single request, via `?profile=1` (or `?profile=pyinstrument`)
+    or an `X-Profile` header. Must come after AuthenticationMiddleware.
+    When not requested, the cost is two string-checks on request.META.
+    See lib/profiling_handler.py.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not profiling_handler.is_profiling_requested(request):
+            return self.get_response(request)
+        return profiling_handler.profile_request(request, self.get_response)
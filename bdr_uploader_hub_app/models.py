@@ -2,6 +2,7 @@ import uuid
 
 from django.conf import settings
 from django.db import models
+from django.db.models.functions import Lower
 
 
 class UserProfile(models.Model):
@@ -35,6 +36,13 @@ class AppConfig(models.Model):
     created_at = models.DateTimeField(auto_now_add=True, null=True)
     updated_at = models.DateTimeField(auto_now=True, null=True)
 
+    class Meta:
+        ## case-insensitive uniqueness; also the indexes behind config_new_helper's `LOWER(...) = ...` lookups
+        constraints = [
+            models.UniqueConstraint(Lower('name'), name='appconfig_name_lower_unique'),
+            models.UniqueConstraint(Lower('slug'), name='appconfig_slug_lower_unique'),
+        ]
+
     def __str__(self):
         """
         Showing full slug so it appears correctly in admin form-view.
@@ -50,10 +58,27 @@ class Submission(models.Model):
     """
 
     STATUS_CHOICES = (
+        ('scanning', 'Scanning'),  # waiting for the malware-scan; see lib/malware_scanner.py
+        ('quarantined', 'Quarantined'),  # malware found
+        ('scan_failed', 'Scan Failed'),  # couldn't be scanned, after MALWARE_SCAN_MAX_ATTEMPTS tries
         ('ready_to_ingest', 'Ready to Ingest'),
+        ('ingesting', 'Ingesting'),  # claimed by a running ingest
         ('ingested', 'Ingested'),  # fully ingested
         ('ingest_error', 'Ingestion Error'),
     )
+    FIXITY_CHOICES = (
+        ('ok', 'OK'),
+        ('mismatch', 'Checksum Mismatch'),
+        ('missing', 'File Missing'),
+        ('error', 'Read Error'),
+    )
+    DERIVATIVES_CHOICES = (
+        ('pending', 'Pending'),
+        ('ok', 'OK'),
+        ('unsupported', 'Unsupported File Type'),
+        ('missing', 'File Missing'),
+        ('failed', 'Failed'),
+    )
 
     ## non-form-data ------------------------------------------------
 
@@ -89,18 +114,28 @@ class Submission(models.Model):
     degrees = models.CharField(max_length=255, blank=True, null=True)
     ## file stuff -------------------------------
     primary_file = models.FileField(upload_to='primary_files/', blank=True, null=True)
-    supplementary_files = models.FileField(upload_to='supplementary_files/', blank=True, null=True)  # not currently used
     original_file_name = models.CharField(max_length=255, blank=True, null=True)
-    staged_file_name = models.CharField(max_length=255, blank=True, null=True)  # added field
+    staged_file_name = models.CharField(max_length=255, blank=True, null=True, db_index=True)  # added field
     checksum_type = models.CharField(max_length=100, blank=True, null=True)
     checksum = models.CharField(max_length=255, blank=True, null=True)
     ## form-data --------------------------------
     temp_submission_json = models.JSONField(default=dict, blank=True)
     ## ingestion stuff --------------------------
-    status = models.CharField(max_length=100, choices=STATUS_CHOICES, default='created')
+    status = models.CharField(max_length=100, choices=STATUS_CHOICES, default='created', db_index=True)
     staff_ingester = models.CharField(max_length=100, blank=True, null=True)  # email address
     ingest_error_message = models.TextField(blank=True, null=True)
     bdr_pid = models.CharField(max_length=20, blank=True, null=True, verbose_name='BDR PID')
+    ## fixity stuff -----------------------------
+    fixity_status = models.CharField(max_length=20, choices=FIXITY_CHOICES, blank=True, null=True)
+    fixity_checked_at = models.DateTimeField(blank=True, null=True)
+    ## malware-scan (see lib/malware_scanner.py)
+    scanned_at = models.DateTimeField(blank=True, null=True)
+    scan_message = models.TextField(blank=True, null=True)
+    scan_attempts = models.PositiveIntegerField(default=0)  # failed tries, since the last clean or infected result
+    scan_next_at = models.DateTimeField(blank=True, null=True)  # backing off until then, after a failed try
+    ## derivatives (see lib/derivative_maker.py)
+    derivatives_status = models.CharField(max_length=20, choices=DERIVATIVES_CHOICES, default='pending', db_index=True)
+    derivatives_made_at = models.DateTimeField(blank=True, null=True)
     ## (end of main fields)
 
     @property
@@ -117,3 +152,84 @@ class Submission(models.Model):
         return title_short
 
     ## end class Submission()
+
+
+class SubmissionFile(models.Model):
+    """
+    This model represents a supplementary file of a submission; the primary file's details stay on the Submission.
+    Staged files are shared via the staging-store, so `staged_file_name` counts as a reference, like Submission's.
+    """
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    submission = models.ForeignKey(Submission, on_delete=models.CASCADE, related_name='supplementary_files')
+    position = models.PositiveSmallIntegerField(default=0)  # upload-order, so content-streams post in that order
+    original_file_name = models.CharField(max_length=255)
+    staged_file_name = models.CharField(max_length=255, db_index=True)
+    checksum_type = models.CharField(max_length=100)
+    checksum = models.CharField(max_length=255)
+    size = models.BigIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['position']
+
+    def __str__(self):
+        return self.original_file_name
+
+    ## end class SubmissionFile()
+
+
+class Notification(models.Model):
+    """
+    This model is an outbox of emails, sent by the `send_notifications` worker rather than during requests.
+    Staff notifications are digested per recipient and app; see lib/notification_handler.py.
+    """
+
+    KIND_CHOICES = (
+        ('ingest_success', 'Ingest Success (student)'),
+        ('submission_received', 'Submission Received (staff digest)'),
+    )
+    STATUS_CHOICES = (
+        ('pending', 'Pending'),
+        ('sending', 'Sending'),  # claimed by a running send_pending(); see lib/notification_handler.py
+        ('sent', 'Sent'),
+        ('failed', 'Failed'),
+    )
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    kind = models.CharField(max_length=50, choices=KIND_CHOICES)
+    app = models.ForeignKey(AppConfig, on_delete=models.CASCADE, null=True, blank=True)
+    submission = models.ForeignKey(Submission, on_delete=models.SET_NULL, null=True, blank=True)
+    recipient = models.CharField(max_length=255)
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveSmallIntegerField(default=0)
+    last_error = models.TextField(blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    claimed_at = models.DateTimeField(blank=True, null=True)
+    sent_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['status', 'created_at'])]
+
+    def __str__(self):
+        return f'{self.kind} to {self.recipient}'
+
+    ## end class Notification()
+
+
+class WorkerMetrics(models.Model):
+    """
+    This model holds a management command's published counters and histograms, one row per command and host,
+    so the web process's `/metrics/` includes them; see lib/metrics.py.
+    """
+
+    source = models.CharField(max_length=255, primary_key=True)  # eg `scan_uploads@worker-1`
+    data = models.JSONField(default=dict)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return self.source
+
+    ## end class WorkerMetrics()
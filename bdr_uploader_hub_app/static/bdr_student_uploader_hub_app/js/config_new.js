@@ -0,0 +1,38 @@
+/*
+  Client-side slug-generation for config_new.html, so typing an app-name costs no server round-trips.
+
+  slugify() mirrors django.utils.text.slugify() (allow_unicode=False):
+  - NFKD-normalize, then drop non-ascii
+  - lowercase, then drop anything that isn't a word-character, whitespace, or hyphen
+  - collapse runs of hyphens/whitespace to one hyphen, then strip leading/trailing hyphens and underscores
+  (python's `\s` also matches \x1c-\x1f, so they're included explicitly.)
+
+  Once staff edit the slug by hand, the name no longer overwrites it.
+*/
+
+function slugify(value) {
+    value = String(value).normalize('NFKD').replace(/[^\x00-\x7F]/g, '');
+    value = value.toLowerCase().replace(/[^\w\s\x1c-\x1f-]/g, '');
+    return value.replace(/[-\s\x1c-\x1f]+/g, '-').replace(/^[-_]+|[-_]+$/g, '');
+}
+
+document.addEventListener('DOMContentLoaded', function () {
+    const nameInput = document.getElementById('new-app-name');
+    const slugInput = document.getElementById('url-slug');
+    const DEBOUNCE_MS = 250;
+    let timer = null;
+
+    slugInput.addEventListener('input', function () {
+        slugInput.dataset.edited = slugInput.value ? 'true' : '';
+    });
+
+    nameInput.addEventListener('input', function () {
+        clearTimeout(timer);
+        timer = setTimeout(function () {
+            if (!slugInput.dataset.edited) {
+                slugInput.value = slugify(nameInput.value);
+                slugInput.dispatchEvent(new Event('change', { bubbles: true }));  // re-check availability
+            }
+        }, DEBOUNCE_MS);
+    });
+});
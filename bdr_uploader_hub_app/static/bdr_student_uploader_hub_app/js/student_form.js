@@ -0,0 +1,127 @@
+/*
+  Client-side upload-digests for student_form.html, so the server can catch a file corrupted in transit.
+
+  On submit, each chosen file is hashed before it's sent: Web Crypto's digest() only takes a whole buffer, so the
+  file is read a 4MB slice at a time, each slice is sha256'd, and the digest is the sha256 of the concatenated
+  slice-digests -- memory stays at one slice, whatever the file's size. The server computes the same digest as
+  the upload streams in, and rejects a mismatch (see lib/upload_digest.py; SLICE_SIZE must match).
+
+  If this session already staged the main-file (eg, after "Edit" on the confirmation page), the server says so,
+  and the file isn't re-sent.
+
+  Without Web Crypto (it needs https), or on any error, the form is submitted as before, without digests.
+
+  While the form posts, the upload's progress is polled from the server, via htmx (see lib/upload_progress.py):
+  the post carries a random `upload_id`, and #upload-progress fetches that upload's progress every second, until
+  the server answers 286 (all received) or the response page replaces this one.
+*/
+
+const SLICE_SIZE = 4 * 1024 * 1024;
+
+function toHex(buffer) {
+    return Array.from(new Uint8Array(buffer), (byte) => byte.toString(16).padStart(2, '0')).join('');
+}
+
+async function uploadDigest(file) {
+    const sliceDigests = new Uint8Array(Math.ceil(file.size / SLICE_SIZE) * 32);
+    for (let offset = 0, index = 0; offset < file.size; offset += SLICE_SIZE, index++) {
+        const slice = await file.slice(offset, offset + SLICE_SIZE).arrayBuffer();
+        sliceDigests.set(new Uint8Array(await crypto.subtle.digest('SHA-256', slice)), index * 32);
+    }
+    return toHex(await crypto.subtle.digest('SHA-256', sliceDigests));
+}
+
+function newUploadId() {
+    return Date.now().toString(36) + '-' + Math.random().toString(36).slice(2);  // needn't be secret; keys are per-user
+}
+
+function startProgress(form) {
+    const progress = document.getElementById('upload-progress');
+    if (!window.htmx || !progress) {
+        return;
+    }
+    const uploadId = newUploadId();
+    const action = new URL(form.action, window.location.href);
+    action.searchParams.set('upload_id', uploadId);
+    form.action = action.toString();
+    progress.setAttribute('hx-get', `${form.dataset.uploadProgressUrl}?upload_id=${uploadId}`);
+    progress.setAttribute('hx-trigger', 'every 1s');
+    htmx.process(progress);
+}
+
+async function isStaged(checkUrl, digest, size) {
+    const params = new URLSearchParams({ digest: digest, size: String(size) });
+    const response = await fetch(`${checkUrl}?${params}`, { credentials: 'same-origin' });
+    return response.ok && (await response.json()).staged === true;
+}
+
+document.addEventListener('DOMContentLoaded', function () {
+    const form = document.getElementById('student-upload-form');
+    const mainInput = document.getElementById('id_main_file');
+    const supplementaryInput = document.getElementById('id_supplementary_files');
+    const status = document.getElementById('upload-digest-status');
+    const submitButton = form.querySelector('input[type="submit"]');
+    const field = (name) => form.querySelector(`input[name="${name}"]`);
+
+    window.addEventListener('pageshow', function () {  // eg, back from the confirmation page
+        delete form.dataset.digested;
+        submitButton.disabled = false;
+        status.textContent = '';
+        const progress = document.getElementById('upload-progress');  // a fresh copy, so any old polling stops
+        const freshProgress = progress.cloneNode(false);
+        freshProgress.removeAttribute('hx-get');
+        freshProgress.removeAttribute('hx-trigger');
+        progress.replaceWith(freshProgress);
+    });
+
+    form.addEventListener('submit', async function (event) {
+        if (form.dataset.digested) {
+            return;
+        }
+        if (!(window.crypto && crypto.subtle)) {
+            form.dataset.digested = 'true';
+            startProgress(form);
+            return;  // submitted as-is
+        }
+        event.preventDefault();  // validation has passed; hash, then submit for real
+        for (const name of ['main_file_digest', 'main_file_staged_digest', 'main_file_staged_name', 'supplementary_files_digests']) {
+            field(name).value = '';  // eg, left from before "back"
+        }
+        submitButton.disabled = true;
+        status.textContent = 'Preparing files for upload…';
+        try {
+            const values = {};  // filled in only once everything's hashed
+            const mainFile = mainInput.files[0];
+            let skipMainFile = false;
+            if (mainFile) {
+                const digest = await uploadDigest(mainFile);
+                skipMainFile = await isStaged(form.dataset.checkStagedUrl, digest, mainFile.size);
+                if (skipMainFile) {
+                    values.main_file_staged_digest = digest;
+                    values.main_file_staged_name = mainFile.name;
+                } else {
+                    values.main_file_digest = digest;
+                }
+            }
+            if (supplementaryInput && supplementaryInput.files.length) {
+                const digests = [];
+                for (const file of supplementaryInput.files) {
+                    digests.push(await uploadDigest(file));
+                }
+                values.supplementary_files_digests = digests.join(',');
+            }
+            for (const [name, value] of Object.entries(values)) {
+                field(name).value = value;
+            }
+            if (skipMainFile) {
+                mainInput.value = '';  // already on the server; don't send it again
+            }
+        } catch (error) {
+            console.warn('could not compute upload-digests; submitting without them', error);
+        }
+        status.textContent = 'Uploading…';
+        form.dataset.digested = 'true';
+        startProgress(form);
+        form.submit();  // doesn't re-fire this handler
+    });
+});
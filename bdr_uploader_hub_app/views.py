@@ -11,17 +11,40 @@ from django import forms as django_forms
 from django.conf import settings as project_settings
 from django.contrib import auth
 from django.contrib.auth.decorators import login_required
-from django.http import HttpResponse, HttpResponseForbidden, HttpResponseNotFound, HttpResponseRedirect, JsonResponse
+from django.db import transaction
+from django.http import (
+    FileResponse,
+    HttpResponse,
+    HttpResponseForbidden,
+    HttpResponseNotFound,
+    HttpResponseRedirect,
+    JsonResponse,
+)
 from django.shortcuts import get_object_or_404, redirect, render
 from django.urls import reverse
 from django.utils import text
+from django.views.decorators.cache import never_cache
+from django.views.decorators.csrf import csrf_exempt, csrf_protect
 
 from bdr_uploader_hub_app.forms.staff_form import StaffForm
 from bdr_uploader_hub_app.forms.student_form import make_student_form_class
-from bdr_uploader_hub_app.lib import config_new_helper, uploaded_file_handler, version_helper
+from bdr_uploader_hub_app.lib import (
+    config_new_helper,
+    malware_scanner,
+    metrics,
+    notification_handler,
+    profiling_handler,
+    staging_store,
+    upload_digest,
+    upload_progress,
+    uploaded_file_handler,
+    version_helper,
+)
 from bdr_uploader_hub_app.lib.shib_handler import shib_decorator
+from bdr_uploader_hub_app.lib.staging_upload_handler import StagingUploadHandler
+from bdr_uploader_hub_app.lib.upload_policy import Rejection, UploadPolicy
 from bdr_uploader_hub_app.lib.version_helper import GatherCommitAndBranchData
-from bdr_uploader_hub_app.models import AppConfig, Submission
+from bdr_uploader_hub_app.models import AppConfig, Submission, SubmissionFile
 
 log = logging.getLogger(__name__)
 
@@ -192,10 +215,10 @@ def config_new(request) -> HttpResponse:
     apps_data: list = config_new_helper.get_configs()
     log.debug(f'apps_data, ``{pprint.pformat(apps_data)}``')
     hlpr_check_name_and_slug_url = reverse('hlpr_check_name_and_slug_url')
-    hlpr_generate_slug_url = reverse('hlpr_generate_slug_url')
+    hlpr_check_availability_url = reverse('hlpr_check_availability_url')
     context = {
         'hlpr_check_name_and_slug_url': hlpr_check_name_and_slug_url,
-        'hlpr_generate_slug_url': hlpr_generate_slug_url,
+        'hlpr_check_availability_url': hlpr_check_availability_url,
         'recent_apps': apps_data,
         'username': request.user.first_name,
     }
@@ -405,29 +428,75 @@ def upload(request) -> HttpResponse:
 
 
 @login_required
+@csrf_exempt
 def upload_slug(request, slug) -> HttpResponse | HttpResponseRedirect:
     """
     Displays the student-upload-form.
+    Installs the StagingUploadHandler, so the upload streams straight into staging -- behind the
+    UploadProgressHandler, which records progress for hlpr_upload_progress(); that must happen before the
+    request-body is read -- which CsrfViewMiddleware would do -- so csrf is checked by the inner view instead.
+    A post whose Content-Length is over the app's upload-policy limit is rejected here, unread; nothing is stored,
+    so there's nothing for the csrf-check to protect.
     """
     log.debug('\n\nstarting upload_slug()')
     log.debug(f'slug, ``{slug}``')
-
-    ## load staff-config data ---------------------------------------
     app_config: AppConfig = get_object_or_404(AppConfig, slug=slug)
+    policy: UploadPolicy = UploadPolicy.from_config(app_config.temp_config_json)
+    if request.method == 'POST':
+        rejection: Rejection | None = policy.check_content_length(request.META.get('CONTENT_LENGTH'))
+        if rejection:
+            metrics.UPLOAD_REJECTIONS.inc(reason=rejection.reason)
+            log.info(f'rejected upload from Content-Length, ``{request.META.get("CONTENT_LENGTH")}``')
+            form = make_student_form_class(app_config.temp_config_json)()
+            return render_student_form(request, app_config, form, rejection)
+    handler = StagingUploadHandler(request, policy)
+    request.upload_handlers = [upload_progress.UploadProgressHandler(request), handler]
+    return _upload_slug(request, app_config, handler)
+
+
+@csrf_protect
+def _upload_slug(request, app_config: AppConfig, handler: StagingUploadHandler) -> HttpResponse | HttpResponseRedirect:
+    """
+    Called by upload_slug(), once the upload-handler is installed.
+    """
     config_data: dict = app_config.temp_config_json
 
-    ## prep other form data -----------------------------------------
-    depositor_fullname: str = f'{request.user.first_name} {request.user.last_name}'
-    depositor_email: str = request.user.email
-    deposit_iso_date: str = datetime.datetime.now().isoformat()
-
     ## build form based on staff-config data ------------------------
     StudentUploadForm: django_forms.forms.DeclarativeFieldsMetaclass = make_student_form_class(config_data)
 
     ## handle POST and GET ------------------------------------------
     if request.method == 'POST':
         log.debug('handling POST')
-        form = StudentUploadForm(request.POST, request.FILES)
+        form = StudentUploadForm(request.POST, request.FILES)  # reads the request-body, through the handler
+        if handler.rejection:
+            ## upload stopped by the upload-policy; redisplay whatever fields arrived before it
+            form = StudentUploadForm(initial=request.POST.dict())
+            return render_student_form(request, app_config, form, handler.rejection)
+        ## check the browser's upload-digests against the ones computed as the files streamed in
+        mismatched: list[str] = upload_digest.verify(request.POST, request.FILES)
+        if mismatched:
+            rejection = Rejection(400, 'digest_mismatch', f'{", ".join(mismatched)} changed in transit; please try again.')
+            metrics.UPLOAD_REJECTIONS.inc(reason=rejection.reason)
+            form = StudentUploadForm(initial=request.POST.dict())
+            return render_student_form(request, app_config, form, rejection)
+        ## a main-file this session already staged needn't have been re-sent; see lib/upload_digest.py
+        staged_entry: dict | None = None
+        if not request.FILES.get('main_file') and request.POST.get('main_file_staged_digest'):
+            staged_entry = upload_digest.find_staged(request.session, request.POST['main_file_staged_digest'])
+            if staged_entry:
+                staged_entry = {  # a copy; the session's entry keeps the name it was first uploaded as
+                    **staged_entry,
+                    'original_file_name': Path(request.POST.get('main_file_staged_name', '')).name
+                    or staged_entry['original_file_name'],
+                }
+                rejection = handler.policy.check_name(staged_entry['original_file_name']) or handler.policy.check_size(
+                    staged_entry['size']
+                )
+                if rejection:
+                    metrics.UPLOAD_REJECTIONS.inc(reason=rejection.reason)
+                    form = StudentUploadForm(initial=request.POST.dict())
+                    return render_student_form(request, app_config, form, rejection)
+                form.fields['main_file'].required = False
 
         if form.is_valid():
             cleaned_data = form.cleaned_data.copy()
@@ -436,18 +505,47 @@ def upload_slug(request, slug) -> HttpResponse | HttpResponseRedirect:
             log.debug(f'type(uploaded_file), ``{type(uploaded_file)}``')
             if uploaded_file:
                 cleaned_data['original_file_name'] = uploaded_file.name  # for confirmation-display
-                ## save uploaded main-file --------------------------
-                saved_path: Path = uploaded_file_handler.handle_uploaded_file(uploaded_file)  # path like `uuid4hex.ext`
-                ## make checksum ------------------------------------
-                result: tuple[str, str] = uploaded_file_handler.make_checksum(saved_path)
-                (checksum_type, checksum) = result
-                cleaned_data['checksum_type'] = checksum_type
-                cleaned_data['checksum'] = checksum
-                ## store uuid-path, not file-obj, in session --------
+                ## stage uploaded main-file; its md5 was computed as it streamed in
+                (saved_path, digests) = uploaded_file_handler.stage_uploaded_file(uploaded_file)  # path like `sha256.ext`
+                cleaned_data['checksum_type'] = 'md5'
+                cleaned_data['checksum'] = digests['md5']
+                ## store staged-path, not file-obj, in session --------
                 cleaned_data['staged_file_path'] = str(saved_path)  # for Submission record, not for confirmation-display
                 del cleaned_data['main_file']  # remove the file-obj from the cleaned_data
+                upload_digest.remember(
+                    request.session,
+                    digests['slices_sha256'],
+                    {
+                        'staged_file_name': saved_path.name,
+                        'original_file_name': uploaded_file.name,
+                        'md5': digests['md5'],
+                        'size': digests['size'],
+                    },
+                )
+            elif staged_entry:
+                log.debug(f're-using staged ``{staged_entry["staged_file_name"]}``; the transfer was skipped')
+                staging_store.reuse(staged_entry['staged_file_name'], staged_entry['size'])  # refreshes its mtime
+                cleaned_data['original_file_name'] = staged_entry['original_file_name']
+                cleaned_data['checksum_type'] = 'md5'
+                cleaned_data['checksum'] = staged_entry['md5']
+                cleaned_data['staged_file_path'] = str(staging_store.staged_location(staged_entry['staged_file_name']))
+                del cleaned_data['main_file']
+            supplementary_files: list = cleaned_data.pop('supplementary_files', None) or []
+            if supplementary_files:
+                ## stage supplementary files concurrently; store their details, not file-objs, in session
+                staged: list[tuple[Path, dict]] = uploaded_file_handler.stage_uploaded_files(supplementary_files)
+                cleaned_data['supplementary_files'] = [
+                    {
+                        'original_file_name': supplementary_file.name,
+                        'staged_file_path': str(staged_path),
+                        'checksum_type': 'md5',
+                        'checksum': digests['md5'],
+                        'size': digests['size'],
+                    }
+                    for supplementary_file, (staged_path, digests) in zip(supplementary_files, staged)
+                ]
             request.session['student_form_data'] = cleaned_data
-            resp = redirect(reverse('student_confirm_url', kwargs={'slug': slug}))
+            return redirect(reverse('student_confirm_url', kwargs={'slug': app_config.slug}))
 
     else:  # GET
         ## see if there's form session data to pre-populate the form
@@ -462,29 +560,43 @@ def upload_slug(request, slug) -> HttpResponse | HttpResponseRedirect:
         log.debug(f'license options choices: {pprint.pformat(form.fields["license_options"].choices)}')
         log.debug(f'visibility options choices: {pprint.pformat(form.fields["visibility_options"].choices)}')
         request.session['student_form_data'] = {}  # clear the session data
-        ## prepare 'back' link
-        if request.user.is_staff:
-            back_url: str = reverse('staff_config_new_url')
-            back_url_text: str = 'back to staff config page'
-        else:
-            back_url: str = reverse('student_upload_url')
-            back_url_text: str = 'back to student-landing page'
-        ## render the form
-        resp: HttpResponse = render(
-            request,
-            'student_form.html',
-            {
-                'form': form,
-                'slug': slug,
-                'username': request.user.first_name,
-                'depositor_fullname': depositor_fullname,
-                'depositor_email': depositor_email,
-                'deposit_iso_date': deposit_iso_date,
-                'app_name': app_config.name,
-                'back_url': back_url,
-                'back_url_text': back_url_text,
-            },
-        )
+    return render_student_form(request, app_config, form)
+
+
+def render_student_form(request, app_config: AppConfig, form, rejection: Rejection | None = None) -> HttpResponse:
+    """
+    Renders the student-upload-form; with the upload-policy's rejection, if there is one, and its status-code.
+    Called by upload_slug() and _upload_slug().
+    """
+    ## prep other form data -----------------------------------------
+    depositor_fullname: str = f'{request.user.first_name} {request.user.last_name}'
+    depositor_email: str = request.user.email
+    deposit_iso_date: str = datetime.datetime.now().isoformat()
+    ## prepare 'back' link
+    if request.user.is_staff:
+        back_url: str = reverse('staff_config_new_url')
+        back_url_text: str = 'back to staff config page'
+    else:
+        back_url: str = reverse('student_upload_url')
+        back_url_text: str = 'back to student-landing page'
+    ## render the form
+    resp: HttpResponse = render(
+        request,
+        'student_form.html',
+        {
+            'form': form,
+            'slug': app_config.slug,
+            'username': request.user.first_name,
+            'depositor_fullname': depositor_fullname,
+            'depositor_email': depositor_email,
+            'deposit_iso_date': deposit_iso_date,
+            'app_name': app_config.name,
+            'back_url': back_url,
+            'back_url_text': back_url_text,
+            'upload_rejection': rejection.message if rejection else '',
+        },
+        status=rejection.status if rejection else 200,
+    )
     return resp
 
 
@@ -515,41 +627,11 @@ def student_confirm(request, slug):
         if 'confirm' in request.POST:
             ## confirmed, so create Submission record
             app_config = get_object_or_404(AppConfig, slug=slug)
-            submission = Submission.objects.create(
-                ## basics -------------------------------------------
-                app=app_config,
-                student_eppn=request.user.username,
-                student_email=request.user.email,
-                title=student_data.get('title'),
-                abstract=student_data.get('abstract'),
-                ## collaborators ------------------------------------
-                advisors_and_readers=student_data.get('advisors_and_readers'),
-                team_members=student_data.get('team_members'),
-                faculty_mentors=student_data.get('faculty_mentors'),
-                authors=student_data.get('authors'),
-                ## departments/programs ------------------------------
-                department=student_data.get('department'),
-                research_program=student_data.get('research_program'),
-                ## access and visibility -----------------------------
-                license_options=student_data.get('license_options'),
-                visibility_options=student_data.get('visibility_options'),
-                ## other --------------------------------------------
-                keywords=student_data.get('keywords'),
-                concentrations=student_data.get('concentrations'),
-                degrees=student_data.get('degrees'),
-                ## file-stuff ---------------------------------------
-                primary_file=student_data.get('staged_file_path'),
-                supplementary_files=student_data.get('supplementary_files'),
-                original_file_name=student_data.get('original_file_name'),
-                staged_file_name=student_data.get('staged_file_path').split('/')[-1],
-                checksum_type=student_data.get('checksum_type'),
-                checksum=student_data.get('checksum'),
-                ## form-data ----------------------------------------
-                temp_submission_json=student_data,
-                ## status -------------------------------------------
-                status='ready_to_ingest',  # initial status
-            )
+            with transaction.atomic():
+                submission = create_submission(request, app_config, student_data)
             log.debug(f'submission created-and-saved successfully, ``{submission}``')
+            metrics.record_status_transition(None, submission.status)
+            notification_handler.queue_submissions_received(app_config, [submission])  # emailed later, as a digest
             ## clear the session data after processing
             del request.session['student_form_data']
             redirect_resp = redirect('upload_successful_url')  # redirect to student-form success page
@@ -566,6 +648,60 @@ def student_confirm(request, slug):
     ## end def student_confirm()
 
 
+def create_submission(request, app_config: AppConfig, student_data: dict) -> Submission:
+    """
+    Creates the Submission, and a SubmissionFile per supplementary file, from the confirmed session-data.
+    Called by student_confirm(), in a transaction.
+    """
+    submission = Submission.objects.create(
+        ## basics -------------------------------------------
+        app=app_config,
+        student_eppn=request.user.username,
+        student_email=request.user.email,
+        title=student_data.get('title'),
+        abstract=student_data.get('abstract'),
+        ## collaborators ------------------------------------
+        advisors_and_readers=student_data.get('advisors_and_readers'),
+        team_members=student_data.get('team_members'),
+        faculty_mentors=student_data.get('faculty_mentors'),
+        authors=student_data.get('authors'),
+        ## departments/programs ------------------------------
+        department=student_data.get('department'),
+        research_program=student_data.get('research_program'),
+        ## access and visibility -----------------------------
+        license_options=student_data.get('license_options'),
+        visibility_options=student_data.get('visibility_options'),
+        ## other --------------------------------------------
+        keywords=student_data.get('keywords'),
+        concentrations=student_data.get('concentrations'),
+        degrees=student_data.get('degrees'),
+        ## file-stuff ---------------------------------------
+        primary_file=student_data.get('staged_file_path'),
+        original_file_name=student_data.get('original_file_name'),
+        staged_file_name=student_data.get('staged_file_path').split('/')[-1],
+        checksum_type=student_data.get('checksum_type'),
+        checksum=student_data.get('checksum'),
+        ## form-data ----------------------------------------
+        temp_submission_json=student_data,
+        ## status -------------------------------------------
+        status=malware_scanner.initial_status(),  # `scanning`, unless scanning is off
+    )
+
+    SubmissionFile.objects.bulk_create(
+        SubmissionFile(
+            submission=submission,
+            position=position,
+            original_file_name=file_data['original_file_name'],
+            staged_file_name=Path(file_data['staged_file_path']).name,
+            checksum_type=file_data['checksum_type'],
+            checksum=file_data['checksum'],
+            size=file_data['size'],
+        )
+        for position, file_data in enumerate(student_data.get('supplementary_files') or [])
+    )
+    return submission
+
+
 def upload_successful(request) -> HttpResponse:
     """
     Displays a success message after a student form is submitted and redirects to appropriate view.
@@ -594,6 +730,7 @@ def upload_successful(request) -> HttpResponse:
 def hlpr_generate_slug(request) -> HttpResponse:
     """
     Generates a url slug for given incoming text.
+    No longer triggered by config_new.html, which slugifies client-side (see js/config_new.js); kept for other callers.
     """
     log.debug('\n\nstarting hlpr_generate_slug()')
     app_name = request.POST.get('new_app_name', '')
@@ -609,9 +746,51 @@ def hlpr_generate_slug(request) -> HttpResponse:
     return HttpResponse(html)
 
 
+def hlpr_check_availability(request) -> HttpResponse:
+    """
+    Reports whether the incoming app-name and slug are taken, in one (cached) query.
+    Triggered on field-change, not per keystroke; the slug itself is generated client-side.
+    """
+    log.debug('\n\nstarting hlpr_check_availability()')
+    app_name: str = request.GET.get('new_app_name', '').strip()
+    slug: str = request.GET.get('url_slug', '').strip()
+    if not app_name or not slug:
+        return HttpResponse('')
+    conflicts: dict[str, bool] = config_new_helper.check_availability(app_name, slug)
+    return HttpResponse(config_new_helper.describe_conflicts(conflicts))
+
+
+@login_required
+def hlpr_check_staged(request) -> JsonResponse:
+    """
+    Reports whether this session already staged a main-file with the given upload-digest and size, so the
+    student-form can skip re-sending it. Called by js/student_form.js; see lib/upload_digest.py.
+    """
+    try:
+        size: int = int(request.GET.get('size', ''))
+    except ValueError:
+        return JsonResponse({'staged': False})
+    entry: dict | None = upload_digest.find_staged(request.session, request.GET.get('digest', ''), size)
+    return JsonResponse({'staged': entry is not None})
+
+
+@login_required
+@never_cache
+def hlpr_upload_progress(request) -> HttpResponse | JsonResponse:
+    """
+    Reports the progress of the student's upload with the given `upload_id`; polled by js/student_form.js while
+    the form posts. Answers htmx-requests with a short sentence -- and, once the upload's all received, status 286,
+    which stops htmx's polling -- others with json. See lib/upload_progress.py.
+    """
+    progress: dict = upload_progress.get_progress(request.user.pk, request.GET.get('upload_id', ''))
+    if request.headers.get('HX-Request'):
+        return HttpResponse(upload_progress.describe(progress), status=286 if progress['state'] == 'received' else 200)
+    return JsonResponse(progress)
+
+
 def hlpr_check_name_and_slug(request) -> HttpResponse | JsonResponse:
     """
-    Validates that the incoming app-name and slug are unique.
+    Creates the app-config, if the incoming app-name and slug are unique; otherwise reports which is taken.
     """
     log.debug('\n\nstarting hlpr_check_name_and_slug()')
 
@@ -628,27 +807,15 @@ def hlpr_check_name_and_slug(request) -> HttpResponse | JsonResponse:
         log.debug(f'html, ``{html}``')
         return HttpResponse(html)
 
-    ## check for existing names and slugs
-    name_already_exists: bool = AppConfig.objects.filter(name__iexact=app_name).exists()
-    slug_already_exists: bool = AppConfig.objects.filter(slug__iexact=slug).exists()
-    name_problem: str = '' if not name_already_exists else 'Name already exists.'
-    slug_problem: str = '' if not slug_already_exists else 'Slug already exists.'
-
-    ## create html to show any problems
-    if name_problem or slug_problem:
-        html = f'{name_problem} {slug_problem}'
+    ## insert, or report the conflict; one atomic insert, backed by case-insensitive unique constraints
+    result: tuple[AppConfig | None, dict[str, bool]] = config_new_helper.create_app_config(app_name, slug)
+    (app_config, conflicts) = result
+    if app_config is None:
+        html = config_new_helper.describe_conflicts(conflicts) or 'Problem saving; please try again.'
         log.debug(f'html, ``{html}``')
         return HttpResponse(html)
 
     ## getting here means life is good; use HX-Redirect to handle the redirection
-    log.debug('saving data')
-    try:
-        app_config = AppConfig(name=app_name, slug=slug)
-        app_config.save()
-    except Exception as e:
-        message = f'problem saving data, ``{e}``'
-        log.exception(message)
-        raise Exception(message)
     log.debug('returning redirect')
     # redirect_url = '/version/'
     redirect_url = reverse('staff_config_slug_url', args=[slug])
@@ -697,6 +864,37 @@ def version(request) -> HttpResponse:
     return HttpResponse(output, content_type='application/json; charset=utf-8')
 
 
+def metrics_view(request) -> HttpResponse:
+    """
+    Returns prometheus-style metrics (upload, checksum, mods, bdr-post, status-transitions, queue-depth, view-timings).
+    Only answers requests from `METRICS_ALLOWED_IPS`.
+    """
+    remote_ip: str = request.META.get('REMOTE_ADDR', '')
+    if remote_ip not in project_settings.METRICS_ALLOWED_IPS:
+        log.warning(f'metrics request from non-allowed ip, ``{remote_ip}``')
+        return HttpResponseForbidden('403 / Forbidden')
+    return HttpResponse(metrics.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+@login_required
+def profile_download(request, profile_id: str) -> HttpResponse | FileResponse:
+    """
+    Returns a stored per-request profile report; staff only.
+    `?format=prof` returns the cProfile dump, `?format=html` the pyinstrument page.
+    """
+    log.debug('\n\nstarting profile_download()')
+    if not request.user.is_staff:
+        return HttpResponseForbidden('403 / Forbidden')
+    extension: str = request.GET.get('format', 'txt')
+    report_path: Path | None = profiling_handler.get_report_path(profile_id, extension)
+    if not report_path:
+        return HttpResponseNotFound('<div>404 / Not Found</div>')
+    content_type: str = {'txt': 'text/plain; charset=utf-8', 'html': 'text/html; charset=utf-8'}.get(
+        extension, 'application/octet-stream'
+    )
+    return FileResponse(open(report_path, 'rb'), content_type=content_type, as_attachment=(extension == 'prof'))
+
+
 # def version(request) -> HttpResponse:
 #     """
 #     Returns basic branch and commit data.
@@ -0,0 +1,31 @@
+"""
+Micro-benchmarks for the app's hot paths.
+
+Each `bench_*.py` module can be run directly, eg `uv run python -m benchmarks.bench_ingest_params`,
+and exposes `run() -> dict[str, float]` (benchmark-name -> seconds per operation).
+Benchmarks use `config.settings_run_tests`, so no .env or database is needed.
+"""
+
+import os
+
+
+def setup_django() -> None:
+    """
+    Configures django with the test-settings, quietly.
+    """
+    import logging
+
+    import django
+
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings_run_tests')
+    django.setup()
+    logging.disable(logging.CRITICAL)  # log-calls still run (and cost what they cost), but nothing is emitted
+
+
+def time_per_call(func, number: int, repeat: int = 5) -> float:
+    """
+    Returns the best-of-`repeat` seconds per call, the least-noisy estimate of the true cost.
+    """
+    import timeit
+
+    return min(timeit.repeat(func, number=number, repeat=repeat)) / number
@@ -0,0 +1,35 @@
+"""
+Times make_checksum() over several file-sizes; reads are from the page-cache after the first pass,
+so this measures hashing and read-loop overhead, not disk.
+
+Usage:
+    uv run python -m benchmarks.bench_checksum
+"""
+
+import os
+import tempfile
+from pathlib import Path
+
+from benchmarks import setup_django, time_per_call
+
+FILE_SIZES: dict[str, int] = {'64kb': 64 * 1024, '1mb': 1024**2, '16mb': 16 * 1024**2}
+CALIBRATED: bool = False  # hashing is C-bound; run_benchmarks' pure-python calibration doesn't track it
+
+
+def run() -> dict[str, float]:
+    from bdr_uploader_hub_app.lib.uploaded_file_handler import make_checksum
+
+    results: dict[str, float] = {}
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for label, size in FILE_SIZES.items():
+            path = Path(tmp_dir) / f'{label}.bin'
+            path.write_bytes(os.urandom(size))
+            number: int = max(1, (64 * 1024**2) // size // 4)  # ~16MB hashed per timing-run
+            results[f'make_checksum_{label}'] = time_per_call(lambda path=path: make_checksum(path), number=number)
+    return results
+
+
+if __name__ == '__main__':
+    setup_django()
+    for name, seconds in run().items():
+        print(f'{name:<40} {seconds * 1e6:>10.1f} µs')
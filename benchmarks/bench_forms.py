@@ -0,0 +1,66 @@
+"""
+Times the form hot-paths: building the per-app student-form class, and validating the staff-form
+(with the collection-lookup's http-call stubbed, so only the app's own work is timed).
+
+Usage:
+    uv run python -m benchmarks.bench_forms
+"""
+
+from unittest import mock
+
+from benchmarks import setup_django, time_per_call
+
+STAFF_CONFIG: dict = {
+    'collection_pid': 'test:coll',
+    'collection_title': 'Bench Collection',
+    'staff_to_notify': 'a@example.edu | b@example.edu',
+    'authorized_student_emails': 'student1@example.edu | student2@example.edu | student3@example.edu',
+    'authorized_student_groups': 'the:group',
+    'offer_advisors_and_readers': True,
+    'advisors_and_readers_required': True,
+    'offer_team_members': True,
+    'offer_faculty_mentors': True,
+    'offer_authors': True,
+    'authors_required': True,
+    'offer_department': True,
+    'offer_research_program': True,
+    'offer_license_options': True,
+    'license_options': ['CC_BY'],
+    'license_default': 'CC_BY',
+    'offer_visibility_options': True,
+    'visibility_options': ['public', 'private'],
+    'visibility_default': 'public',
+    'ask_for_keywords': True,
+    'ask_for_concentrations': True,
+    'ask_for_degrees': True,
+    'invite_supplementary_files': True,
+}
+
+
+class _FormStub:
+    def add_error(self, field, error):
+        pass
+
+
+def run() -> dict[str, float]:
+    import httpx
+
+    from bdr_uploader_hub_app.forms import staff_form_validation
+    from bdr_uploader_hub_app.forms.student_form import make_student_form_class
+
+    stub_client = mock.Mock()
+    stub_client.get.return_value = httpx.Response(200, json={'name': 'Bench Collection'})
+    with mock.patch.object(staff_form_validation, 'get_http_client', return_value=stub_client):
+        validate_seconds: float = time_per_call(
+            lambda: staff_form_validation.validate_staff_form(_FormStub(), dict(STAFF_CONFIG)), number=500
+        )
+    return {
+        'make_student_form_class': time_per_call(lambda: make_student_form_class(STAFF_CONFIG), number=500),
+        'validate_staff_form': validate_seconds,
+    }
+
+
+if __name__ == '__main__':
+    setup_django()
+    for name, seconds in run().items():
+        print(f'{name:<40} {seconds * 1e6:>10.1f} µs')
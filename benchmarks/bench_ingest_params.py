@@ -0,0 +1,70 @@
+"""
+Compares per-item ingest param-building: the original prepare_*() + parameterize() path,
+versus the memoized build_params() used by manage_ingest().
+Both are timed with the module's debug-logging `pprint.pformat()` calls stubbed out -- those f-strings are built
+even with logging disabled, and only the original path has them -- so the comparison is of the param-building.
+
+Usage:
+    uv run python -m benchmarks.bench_ingest_params
+"""
+
+from types import SimpleNamespace
+from unittest import mock
+
+from benchmarks import setup_django, time_per_call
+
+BATCH_SIZE: int = 200
+
+
+def make_batch():
+    from bdr_uploader_hub_app.models import AppConfig, Submission
+
+    app_config = AppConfig(name='Bench App', slug='bench-app', temp_config_json={'collection_pid': 'test:coll'})
+    return [
+        Submission(
+            app=app_config,
+            title=f'Title {index}',
+            student_eppn=f'student{index}@brown.edu',
+            student_email=f'student{index}@brown.edu',
+            visibility_options=('public', 'private', 'brown_only_discoverable')[index % 3],
+        )
+        for index in range(BATCH_SIZE)
+    ]
+
+
+def run() -> dict[str, float]:
+    from bdr_uploader_hub_app.lib.ingester_handler import Ingester
+
+    submissions = make_batch()
+    file_data = {'checksum_type': 'md5', 'checksum': '0' * 32, 'file_name': 'thesis.pdf', 'path': '/tmp/x.pdf'}
+    mods = '<mods:mods xmlns:mods="http://www.loc.gov/mods/v3"><mods:titleInfo/></mods:mods>'
+
+    def per_item_original():
+        ingester = Ingester()
+        ingester.mods, ingester.file_data = mods, file_data
+        for submission in submissions:
+            ingester.rights = ingester.prepare_rights(submission.student_eppn, submission.visibility_options)
+            ingester.ir = ingester.prepare_ir(submission.student_eppn, submission.student_email)
+            ingester.rels = ingester.prepare_rels(submission.app.temp_config_json)
+            ingester.parameterize()
+
+    def per_item_memoized():
+        ingester = Ingester()  # fresh per batch, as in manage_ingest()
+        ingester.mods, ingester.file_data = mods, file_data
+        for submission in submissions:
+            ingester.build_params(submission)
+
+    with mock.patch('bdr_uploader_hub_app.lib.ingester_handler.pprint', SimpleNamespace(pformat=lambda *a, **kw: '')):
+        return {
+            'ingest_params_original_per_item': time_per_call(per_item_original, number=5) / BATCH_SIZE,
+            'ingest_params_memoized_per_item': time_per_call(per_item_memoized, number=5) / BATCH_SIZE,
+        }
+
+
+if __name__ == '__main__':
+    setup_django()
+    results = run()
+    for name, seconds in results.items():
+        print(f'{name:<40} {seconds * 1e6:>10.1f} µs')
+    speedup = results['ingest_params_original_per_item'] / results['ingest_params_memoized_per_item']
+    print(f'{"speedup":<40} {speedup:>10.1f} x')
@@ -0,0 +1,39 @@
+"""
+Times ModsMaker.prepare_mods(): template-render, well-formedness check, and pretty-printing.
+
+Usage:
+    uv run python -m benchmarks.bench_mods
+"""
+
+from benchmarks import setup_django, time_per_call
+
+
+def run() -> dict[str, float]:
+    from django.utils import timezone
+
+    from bdr_uploader_hub_app.lib.mods_handler import ModsMaker
+    from bdr_uploader_hub_app.models import AppConfig, Submission
+
+    submission = Submission(
+        app=AppConfig(name='Bench App', slug='bench-app', temp_config_json={}),
+        title='A Study of Benchmarks & Their <Discontents>',
+        abstract='An abstract. ' * 100,
+        authors='Author One | Author Two | Author Three',
+        advisors_and_readers='Advisor One | Reader One',
+        keywords='alpha | beta | gamma | delta',
+        concentrations='Computer Science',
+        degrees='Sc.B.',
+        department='Computer Science | Applied Mathematics, Brown University',
+        faculty_mentors='Mentor One',
+        team_members='Member One | Member Two',
+        license_options='CC_BY',
+        created_at=timezone.now(),
+    )
+    maker = ModsMaker(submission)
+    return {'prepare_mods': time_per_call(maker.prepare_mods, number=200)}
+
+
+if __name__ == '__main__':
+    setup_django()
+    for name, seconds in run().items():
+        print(f'{name:<40} {seconds * 1e6:>10.1f} µs')
@@ -0,0 +1,37 @@
+"""
+Times the shib-login path: extracting shib-metadata from the request's META, and provisioning the user
+(an update_or_create() and a profile-save, against a throwaway test-database).
+
+Usage:
+    uv run python -m benchmarks.bench_shib
+"""
+
+from benchmarks import setup_django, time_per_call
+
+SHIB_META: dict = {
+    'Shibboleth-eppn': 'bench@example.edu',
+    'Shibboleth-mail': 'bench@example.edu',
+    'Shibboleth-givenName': 'Bench',
+    'Shibboleth-sn': 'Mark',
+    'Shibboleth-isMemberOf': ';'.join(f'group:{index}' for index in range(40)),
+}
+
+
+def run() -> dict[str, float]:
+    from bdr_uploader_hub_app.lib import shib_handler
+    from loadtest import throwaway_database
+
+    request_meta: dict = {f'HTTP_HEADER_{index}': 'value' for index in range(60)} | SHIB_META
+    results: dict[str, float] = {
+        'prep_shib_meta': time_per_call(lambda: shib_handler.prep_shib_meta(request_meta, 'bench.example.edu'), number=2000)
+    }
+    with throwaway_database():
+        shib_handler.provision_user(SHIB_META)  # first call creates; time the common, returning-user case
+        results['provision_user'] = time_per_call(lambda: shib_handler.provision_user(SHIB_META), number=50)
+    return results
+
+
+if __name__ == '__main__':
+    setup_django()
+    for name, seconds in run().items():
+        print(f'{name:<40} {seconds * 1e6:>10.1f} µs')
@@ -67,6 +67,8 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'bdr_uploader_hub_app.middleware.ViewTimingMiddleware',
+    'bdr_uploader_hub_app.middleware.ProfilingMiddleware',
 ]
 
 ROOT_URLCONF = 'config.urls'
@@ -149,6 +151,8 @@ The two settings below prevent django from auto-running chmod on uploaded files
 """
 FILE_UPLOAD_PERMISSIONS = None
 FILE_UPLOAD_DIRECTORY_PERMISSIONS = None
+## a student-upload is the main file plus up to upload_policy.MAX_SUPPLEMENTARY_FILES; django's default of 100 is one short
+DATA_UPLOAD_MAX_NUMBER_FILES = 101
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.2/ref/settings/#default-auto-field
@@ -252,3 +256,64 @@ MOUNT_POINT: str = os.environ['MOUNT_POINT']
 
 ## for "you don't have permissions" messages
 PROBLEM_EMAIL: str = os.environ['PROBLEM_EMAIL']
+
+## for the prometheus-style `/metrics/` endpoint
+METRICS_ALLOWED_IPS: list[str] = json.loads(os.environ.get('METRICS_ALLOWED_IPS_JSON', '["127.0.0.1"]'))
+
+## for staff-only per-request profiling (`?profile=1`)
+PROFILE_OUTPUT_DIR: str = os.environ.get('PROFILE_OUTPUT_DIR', '/tmp/bdr_uploader_hub_profiles/')
+
+## server-side drop-directory for admin bulk manifest-imports (admin import is disabled when empty)
+MANIFEST_IMPORT_ROOT: str = os.environ.get('MANIFEST_IMPORT_ROOT', '')
+
+## staging-reaper (`manage.py reap_staging`); an empty INGESTED_RETENTION_DAYS keeps ingested files indefinitely
+STAGING_ORPHAN_GRACE_HOURS: float = float(os.environ.get('STAGING_ORPHAN_GRACE_HOURS', '48'))
+INGESTED_RETENTION_DAYS: float | None = (
+    float(os.environ['INGESTED_RETENTION_DAYS']) if os.environ.get('INGESTED_RETENTION_DAYS') else None
+)
+
+## this server's path to the directory the BDR-API reads as BDR_API_FILE_PATH_ROOT; empty if it's MEDIA_ROOT's share
+BDR_API_HANDOFF_DIR: str = os.environ.get('BDR_API_HANDOFF_DIR', '')
+
+## fixity-checks (`manage.py verify_fixity`); the read-rate is the total across workers, 0 for unthrottled
+FIXITY_WORKERS: int = int(os.environ.get('FIXITY_WORKERS', '2'))
+FIXITY_MAX_MB_PER_SECOND: float = float(os.environ.get('FIXITY_MAX_MB_PER_SECOND', '50'))
+
+## bdr-post retries, for connection-errors and 503s only; backoff doubles per retry
+BDR_POST_RETRIES: int = int(os.environ.get('BDR_POST_RETRIES', '2'))
+BDR_POST_RETRY_BACKOFF_SECONDS: float = float(os.environ.get('BDR_POST_RETRY_BACKOFF_SECONDS', '1'))
+
+## thread-pool size for staging, and handing off, a submission's supplementary files
+STAGING_WORKERS: int = int(os.environ.get('STAGING_WORKERS', '4'))
+
+## where staged files are kept, `filesystem` (MEDIA_ROOT) or `s3`; with `s3`, MEDIA_ROOT is only per-node scratch-space
+STAGING_BACKEND: str = os.environ.get('STAGING_BACKEND', 'filesystem')
+STAGING_S3_ENDPOINT_URL: str = os.environ.get('STAGING_S3_ENDPOINT_URL', '')
+STAGING_S3_BUCKET: str = os.environ.get('STAGING_S3_BUCKET', '')
+STAGING_S3_REGION: str = os.environ.get('STAGING_S3_REGION', 'us-east-1')
+STAGING_S3_ACCESS_KEY_ID: str = os.environ.get('STAGING_S3_ACCESS_KEY_ID', '')
+STAGING_S3_SECRET_ACCESS_KEY: str = os.environ.get('STAGING_S3_SECRET_ACCESS_KEY', '')
+STAGING_S3_PREFIX: str = os.environ.get('STAGING_S3_PREFIX', '')
+STAGING_S3_PART_SIZE_MB: float = float(os.environ.get('STAGING_S3_PART_SIZE_MB', '16'))
+STAGING_S3_WORKERS: int = int(os.environ.get('STAGING_S3_WORKERS', '4'))
+
+## derivatives (`manage.py make_derivatives`): first-page preview and extracted text, via the poppler-utils tools;
+## the time- and memory-limits are per tool-run
+DERIVATIVE_WORKERS: int = int(os.environ.get('DERIVATIVE_WORKERS', '2'))
+DERIVATIVE_TIMEOUT_SECONDS: float = float(os.environ.get('DERIVATIVE_TIMEOUT_SECONDS', '120'))
+DERIVATIVE_MAX_MEMORY_MB: int = int(os.environ.get('DERIVATIVE_MAX_MEMORY_MB', '1024'))
+DERIVATIVE_PREVIEW_SIZE: int = int(os.environ.get('DERIVATIVE_PREVIEW_SIZE', '600'))
+DERIVATIVE_PDFTOPPM_PATH: str = os.environ.get('DERIVATIVE_PDFTOPPM_PATH', 'pdftoppm')
+DERIVATIVE_PDFTOTEXT_PATH: str = os.environ.get('DERIVATIVE_PDFTOTEXT_PATH', 'pdftotext')
+
+## malware-scanning (`manage.py scan_uploads`): `clamd` or `none`; the address is a unix-socket path, or `tcp://host:port`
+MALWARE_SCANNER: str = os.environ.get('MALWARE_SCANNER', 'none')
+MALWARE_SCAN_CLAMD_ADDRESS: str = os.environ.get('MALWARE_SCAN_CLAMD_ADDRESS', '/var/run/clamav/clamd.ctl')
+MALWARE_SCAN_WORKERS: int = int(os.environ.get('MALWARE_SCAN_WORKERS', '4'))
+MALWARE_SCAN_TIMEOUT_SECONDS: float = float(os.environ.get('MALWARE_SCAN_TIMEOUT_SECONDS', '120'))
+## a submission whose files can't be scanned is retried after RETRY_MINUTES, doubling each time; then `scan_failed`
+MALWARE_SCAN_MAX_ATTEMPTS: int = int(os.environ.get('MALWARE_SCAN_MAX_ATTEMPTS', '8'))
+MALWARE_SCAN_RETRY_MINUTES: float = float(os.environ.get('MALWARE_SCAN_RETRY_MINUTES', '5'))
+
+## upload-progress: the least time between an upload's progress-writes to the (shared) cache
+UPLOAD_PROGRESS_WRITE_INTERVAL_SECONDS: float = float(os.environ.get('UPLOAD_PROGRESS_WRITE_INTERVAL_SECONDS', '1'))
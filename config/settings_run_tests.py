@@ -56,6 +56,8 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'bdr_uploader_hub_app.middleware.ViewTimingMiddleware',
+    'bdr_uploader_hub_app.middleware.ProfilingMiddleware',
 ]
 
 ROOT_URLCONF = 'config.urls'
@@ -142,6 +144,8 @@ The two settings below prevent django from auto-running chmod on uploaded files
 """
 FILE_UPLOAD_PERMISSIONS = None
 FILE_UPLOAD_DIRECTORY_PERMISSIONS = None
+## a student-upload is the main file plus up to upload_policy.MAX_SUPPLEMENTARY_FILES; django's default of 100 is one short
+DATA_UPLOAD_MAX_NUMBER_FILES = 101
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.2/ref/settings/#default-auto-field
@@ -241,3 +245,61 @@ BDR_PUBLIC_STUDIO_ITEM_ROOT_URL: str = 'http://localhost:8000/studio/items/'
 
 ## for mount check on version-url call
 MOUNT_POINT: str = 'FOO'
+
+## for the prometheus-style `/metrics/` endpoint
+METRICS_ALLOWED_IPS: list[str] = ['127.0.0.1']
+
+## for staff-only per-request profiling (`?profile=1`)
+PROFILE_OUTPUT_DIR: str = '/tmp/bdr_uploader_hub_profiles/'
+
+## server-side drop-directory for admin bulk manifest-imports (admin import is disabled when empty)
+MANIFEST_IMPORT_ROOT: str = '/tmp/'
+
+## staging-reaper (`manage.py reap_staging`); None keeps ingested files indefinitely
+STAGING_ORPHAN_GRACE_HOURS: float = 48
+INGESTED_RETENTION_DAYS: float | None = 30
+
+## this server's path to the directory the BDR-API reads as BDR_API_FILE_PATH_ROOT; empty if it's MEDIA_ROOT's share
+BDR_API_HANDOFF_DIR: str = ''
+
+## fixity-checks (`manage.py verify_fixity`); the read-rate is the total across workers, 0 for unthrottled
+FIXITY_WORKERS: int = 0
+FIXITY_MAX_MB_PER_SECOND: float = 0
+
+## bdr-post retries, for connection-errors and 503s only; backoff doubles per retry
+BDR_POST_RETRIES: int = 2
+BDR_POST_RETRY_BACKOFF_SECONDS: float = 0
+
+## thread-pool size for staging, and handing off, a submission's supplementary files
+STAGING_WORKERS: int = 4
+
+## where staged files are kept, `filesystem` (MEDIA_ROOT) or `s3`; with `s3`, MEDIA_ROOT is only per-node scratch-space
+STAGING_BACKEND: str = 'filesystem'
+STAGING_S3_ENDPOINT_URL: str = ''
+STAGING_S3_BUCKET: str = ''
+STAGING_S3_REGION: str = 'us-east-1'
+STAGING_S3_ACCESS_KEY_ID: str = ''
+STAGING_S3_SECRET_ACCESS_KEY: str = ''
+STAGING_S3_PREFIX: str = ''
+STAGING_S3_PART_SIZE_MB: float = 16
+STAGING_S3_WORKERS: int = 4
+
+## derivatives (`manage.py make_derivatives`): first-page preview and extracted text, via the poppler-utils tools;
+## the time- and memory-limits are per tool-run
+DERIVATIVE_WORKERS: int = 0
+DERIVATIVE_TIMEOUT_SECONDS: float = 30
+DERIVATIVE_MAX_MEMORY_MB: int = 1024
+DERIVATIVE_PREVIEW_SIZE: int = 600
+DERIVATIVE_PDFTOPPM_PATH: str = 'pdftoppm'
+DERIVATIVE_PDFTOTEXT_PATH: str = 'pdftotext'
+
+## malware-scanning (`manage.py scan_uploads`): `clamd` or `none`; the address is a unix-socket path, or `tcp://host:port`
+MALWARE_SCANNER: str = 'none'
+MALWARE_SCAN_CLAMD_ADDRESS: str = '/var/run/clamav/clamd.ctl'
+MALWARE_SCAN_WORKERS: int = 4
+MALWARE_SCAN_TIMEOUT_SECONDS: float = 30
+MALWARE_SCAN_MAX_ATTEMPTS: int = 8
+MALWARE_SCAN_RETRY_MINUTES: float = 5
+
+## upload-progress: the least time between an upload's progress-writes to the (shared) cache
+UPLOAD_PROGRESS_WRITE_INTERVAL_SECONDS: float = 1
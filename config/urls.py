@@ -21,9 +21,14 @@ urlpatterns = [
     ## htmx helpers -------------------------------------------------
     path('hlpr_generate_slug/', views.hlpr_generate_slug, name='hlpr_generate_slug_url'),
     path('hlpr_check_name_and_slug/', views.hlpr_check_name_and_slug, name='hlpr_check_name_and_slug_url'),
+    path('hlpr_check_availability/', views.hlpr_check_availability, name='hlpr_check_availability_url'),
+    path('hlpr_check_staged/', views.hlpr_check_staged, name='hlpr_check_staged_url'),
+    path('hlpr_upload_progress/', views.hlpr_upload_progress, name='hlpr_upload_progress_url'),
     ## other --------------------------------------------------------
     path('', views.root, name='root_url'),
     path('admin/', admin.site.urls),
     path('error_check/', views.error_check, name='error_check_url'),
     path('version/', views.version, name='version_url'),
+    path('metrics/', views.metrics_view, name='metrics_url'),
+    path('profile_download/<str:profile_id>/', views.profile_download, name='profile_download_url'),
 ]
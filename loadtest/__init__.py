@@ -0,0 +1,80 @@
+"""
+Load- and integration-testing tools; not used by the running app.
+
+- `bdr_api_standin`: a local stand-in for the BDR private ingest-API and public collection-API.
+- `s3_standin`: a local stand-in for an S3-compatible object-store, for the `s3` staging-backend.
+- `clamd_standin`: a local stand-in for a clamd malware-scanning daemon, for the scanning stage.
+- `ingest_load`: drives ingest and staff-form validation against the stand-in, and reports throughput.
+- `upload_funnel`: drives concurrent synthetic students through upload -> upload_slug -> student_confirm,
+  and reports per-stage latency, throughput and RSS.
+
+Harnesses use `config.settings_run_tests` (unless DJANGO_SETTINGS_MODULE is set), and a throwaway test-database.
+"""
+
+import os
+from contextlib import contextmanager
+from typing import Iterator
+
+
+def setup_django() -> None:
+    """
+    Configures django, quietly.
+    """
+    import logging
+
+    import django
+
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings_run_tests')
+    django.setup()
+    logging.disable(logging.CRITICAL)  # log-calls still run (and cost what they cost), but nothing is emitted
+
+
+@contextmanager
+def throwaway_database(file_path: str | None = None) -> Iterator[None]:
+    """
+    Creates a throwaway test-database for the duration of the block.
+    Pass `file_path` to use a file-backed sqlite database for concurrent writer-threads; its transactions take
+    the write-lock up front and wait for it, rather than failing with `database is locked` on lock-upgrade.
+    (Other databases, eg the production mysql, get a `test_` database on the same server, unchanged.)
+    """
+    from django.db import connection
+    from django.test.utils import setup_test_environment, teardown_test_environment
+
+    if file_path and connection.vendor == 'sqlite':
+        connection.settings_dict.setdefault('TEST', {})['NAME'] = file_path
+        connection.settings_dict.setdefault('OPTIONS', {}).update({'transaction_mode': 'IMMEDIATE', 'timeout': 30})
+    setup_test_environment()
+    old_db_name: str = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_db_name, verbosity=0)
+        teardown_test_environment()
+
+
+def percentile(values: list[float], pct: float) -> float:
+    """
+    Returns the nearest-rank percentile; 0.0 for no values.
+    """
+    if not values:
+        return 0.0
+    ordered: list[float] = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def current_rss_mb() -> float:
+    """
+    Returns this process's resident-set-size, in MB; on non-linux platforms, the peak RSS so far.
+    """
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    import resource
+    import sys
+
+    peak: int = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
@@ -0,0 +1,171 @@
+"""
+Local stand-in for the BDR private ingest-API and the public collection-API, for load and integration testing.
+
+- `POST <any path>`: checks the ingest params are present, then returns `{"pid": "<prefix>:<n>"}`
+  (or a 500 / 503, at the configured rates).
+- `GET .../collections/<pid>/`: returns `{"name": "<title>"}`, or a 404 for pids in `missing_pids`.
+- `GET /_stats/`: returns request, response and connection counts -- `connections` well below `requests`
+  means clients are re-using keep-alive connections.
+
+Speaks HTTP/1.1 with keep-alive, on a thread per connection. Standard-library only.
+
+Usage:
+    uv run python -m loadtest.bdr_api_standin --port 8765 --latency-ms 50 --jitter-ms 20 --error-rate 0.02
+then point `BDR_PRIVATE_API_ROOT_URL` at `http://127.0.0.1:8765/api/private/items/`
+and `BDR_PUBLIC_API_COLLECTION_ROOT_URL` at `http://127.0.0.1:8765/api/collections/`.
+"""
+
+import argparse
+import itertools
+import json
+import random
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+REQUIRED_INGEST_PARAMS: tuple[str, ...] = ('mods', 'rights', 'ir', 'rels', 'content_streams')
+
+
+@dataclass
+class StandinConfig:
+    latency_ms: float = 0
+    jitter_ms: float = 0
+    error_rate: float = 0  # 500s; an item *might* have been created, so clients shouldn't retry
+    unavailable_rate: float = 0  # 503s; nothing was created, so clients may retry
+    pid_prefix: str = 'test'
+    collection_title: str = 'Test Collection'
+    missing_pids: set[str] = field(default_factory=set)
+    seed: int | None = None
+
+
+class StandinStats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counts: Counter = Counter()
+
+    def incr(self, key: str) -> None:
+        with self.lock:
+            self.counts[key] += 1
+
+    def snapshot(self) -> dict[str, int]:
+        with self.lock:
+            return dict(self.counts)
+
+
+class StandinHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # keep-alive
+
+    def setup(self):
+        super().setup()
+        self.server.stats.incr('connections')
+
+    def log_message(self, format, *args):  # quiet; stats are available at /_stats/
+        pass
+
+    def send_json(self, status_code: int, data: dict) -> None:
+        body: bytes = json.dumps(data).encode()
+        self.send_response(status_code)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+        self.server.stats.incr(f'responses_{status_code}')
+
+    def simulate_latency(self) -> None:
+        config: StandinConfig = self.server.config
+        delay_ms: float = config.latency_ms + self.server.random.uniform(-config.jitter_ms, config.jitter_ms)
+        if delay_ms > 0:
+            time.sleep(delay_ms / 1000)
+
+    def do_GET(self):
+        self.server.stats.incr('requests')
+        if self.path.rstrip('/') == '/_stats':
+            self.send_json(200, self.server.stats.snapshot())
+            return
+        self.simulate_latency()
+        pid: str = self.path.rstrip('/').split('/')[-1]
+        if '/collections/' not in self.path or pid in self.server.config.missing_pids:
+            self.send_json(404, {'error': f'not found: {pid}'})
+        else:
+            self.send_json(200, {'pid': pid, 'name': self.server.config.collection_title})
+
+    def do_POST(self):
+        self.server.stats.incr('requests')
+        length: int = int(self.headers.get('Content-Length') or 0)
+        params: dict = parse_qs(self.rfile.read(length).decode())
+        self.simulate_latency()
+        config: StandinConfig = self.server.config
+        roll: float = self.server.random.random()
+        missing: list[str] = [param for param in REQUIRED_INGEST_PARAMS if param not in params]
+        if missing:
+            self.send_json(400, {'error': f'missing params: {", ".join(missing)}'})
+        elif roll < config.unavailable_rate:
+            self.send_json(503, {'error': 'service unavailable'})
+        elif roll < config.unavailable_rate + config.error_rate:
+            self.send_json(500, {'error': 'internal server error'})
+        else:
+            self.send_json(200, {'pid': f'{config.pid_prefix}:{next(self.server.pid_counter)}'})
+
+
+class StandinServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address: tuple[str, int], config: StandinConfig):
+        super().__init__(address, StandinHandler)
+        self.config: StandinConfig = config
+        self.stats = StandinStats()
+        self.pid_counter = itertools.count(1)
+        self.random = random.Random(config.seed)
+
+    @property
+    def base_url(self) -> str:
+        (host, port) = self.server_address[:2]
+        return f'http://{host}:{port}'
+
+
+def start_in_thread(config: StandinConfig | None = None, port: int = 0) -> StandinServer:
+    """
+    Starts the stand-in on a background thread (port 0 picks a free port); stop it with `server.shutdown()`.
+    """
+    server = StandinServer(('127.0.0.1', port), config or StandinConfig())
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Local stand-in for the BDR private and collection APIs.')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency-ms', type=float, default=0)
+    parser.add_argument('--jitter-ms', type=float, default=0)
+    parser.add_argument('--error-rate', type=float, default=0, help='fraction of posts answered with a 500')
+    parser.add_argument('--unavailable-rate', type=float, default=0, help='fraction of posts answered with a 503')
+    parser.add_argument('--pid-prefix', default='test')
+    parser.add_argument('--collection-title', default='Test Collection')
+    parser.add_argument('--missing-pid', action='append', default=[], help='collection-pid to 404; may be repeated')
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args()
+    config = StandinConfig(
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate,
+        unavailable_rate=args.unavailable_rate,
+        pid_prefix=args.pid_prefix,
+        collection_title=args.collection_title,
+        missing_pids=set(args.missing_pid),
+        seed=args.seed,
+    )
+    server = StandinServer(('127.0.0.1', args.port), config)
+    print(f'bdr-api stand-in listening on {server.base_url}; stats at {server.base_url}/_stats/')
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,167 @@
+"""
+Local stand-in for a clamd malware-scanning daemon, for integration and load testing of the scanning stage
+(see lib/malware_scanner.py).
+
+- `zINSTREAM` / `nINSTREAM`: reads the length-prefixed chunks, and answers `stream: OK`, or
+  `stream: <name> FOUND` if a configured signature appears anywhere in the stream (including across chunks).
+  Streams over `max_stream_bytes` are refused with `INSTREAM size limit exceeded. ERROR`, as clamd does.
+- `zPING` / `nPING`: answers `PONG`.
+- `mb_per_second` throttles reading, to stand in for a real scanner's throughput.
+
+Listens on tcp, on a thread per connection. Standard-library only. Matches the EICAR test-file by default.
+
+Usage:
+    uv run python -m loadtest.clamd_standin --port 3310 --mb-per-second 50
+then set `MALWARE_SCANNER=clamd` and `MALWARE_SCAN_CLAMD_ADDRESS=tcp://127.0.0.1:3310`.
+"""
+
+import argparse
+import socketserver
+import struct
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+
+## the standard anti-malware test-string; split, so this file itself isn't flagged by real scanners
+EICAR: bytes = b'X5O!P%@AP[4\\PZX54(P^)7CC)7}$' + b'EICAR-STANDARD-ANTIVIRUS-TEST-FILE!$H+H*'
+
+
+@dataclass
+class ClamdStandinConfig:
+    signatures: dict[bytes, str] = field(default_factory=lambda: {EICAR: 'Eicar-Test-Signature'})
+    max_stream_bytes: int = 0  # 0 for unlimited
+    mb_per_second: float = 0  # 0 for unthrottled
+
+
+class ClamdStandinState:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counts: Counter = Counter()
+        self.active_scans: int = 0
+
+    def incr(self, key: str, amount: int = 1) -> None:
+        with self.lock:
+            self.counts[key] += amount
+
+    def snapshot(self) -> dict[str, int]:
+        with self.lock:
+            return dict(self.counts)
+
+
+class ClamdStandinHandler(socketserver.BaseRequestHandler):
+    def read_exactly(self, size: int) -> bytes:
+        data: bytes = b''
+        while len(data) < size:
+            chunk: bytes = self.request.recv(size - len(data))
+            if not chunk:
+                raise ConnectionError('client closed the stream')
+            data += chunk
+        return data
+
+    def read_command(self) -> tuple[str, bytes]:
+        """
+        Returns the command, and its terminator: null for `z`-prefixed commands, newline for `n`-prefixed.
+        """
+        command: bytes = b''
+        while True:
+            byte: bytes = self.request.recv(1)
+            if not byte or byte in (b'\0', b'\n') and command[:1] in (b'z', b'n'):
+                return (command[1:].decode(errors='replace'), b'\0' if command[:1] == b'z' else b'\n')
+            command += byte
+
+    def handle(self):
+        server: ClamdStandinServer = self.server
+        (command, terminator) = self.read_command()
+        if command == 'PING':
+            server.state.incr('ping')
+            self.request.sendall(b'PONG' + terminator)
+        elif command == 'INSTREAM':
+            self.request.sendall(self.instream().encode() + terminator)
+        else:
+            server.state.incr('unknown_command')
+            self.request.sendall(b'UNKNOWN COMMAND' + terminator)
+
+    def instream(self) -> str:
+        server: ClamdStandinServer = self.server
+        config: ClamdStandinConfig = server.config
+        overlap: int = max((len(signature) for signature in config.signatures), default=1) - 1
+        tail: bytes = b''
+        found: str | None = None
+        total: int = 0
+        start: float = time.monotonic()
+        with server.state.lock:
+            server.state.active_scans += 1
+            server.state.counts['max_concurrent_scans'] = max(
+                server.state.counts['max_concurrent_scans'], server.state.active_scans
+            )
+        try:
+            while length := struct.unpack('!L', self.read_exactly(4))[0]:
+                chunk: bytes = self.read_exactly(length)
+                total += length
+                if config.max_stream_bytes and total > config.max_stream_bytes:
+                    server.state.incr('size_limit_exceeded')
+                    return 'INSTREAM size limit exceeded. ERROR'
+                window: bytes = tail + chunk
+                if found is None:
+                    found = next((name for signature, name in config.signatures.items() if signature in window), None)
+                tail = window[-overlap:] if overlap else b''
+                if config.mb_per_second:
+                    ahead_by: float = total / (config.mb_per_second * 2**20) - (time.monotonic() - start)
+                    if ahead_by > 0:
+                        time.sleep(ahead_by)
+        finally:
+            with server.state.lock:
+                server.state.active_scans -= 1
+        server.state.incr('scanned')
+        server.state.incr('bytes', total)
+        if found:
+            server.state.incr('found')
+            return f'stream: {found} FOUND'
+        return 'stream: OK'
+
+
+class ClamdStandinServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, address: tuple[str, int], config: ClamdStandinConfig):
+        super().__init__(address, ClamdStandinHandler)
+        self.config: ClamdStandinConfig = config
+        self.state = ClamdStandinState()
+
+    @property
+    def address(self) -> str:
+        (host, port) = self.server_address[:2]
+        return f'tcp://{host}:{port}'
+
+
+def start_in_thread(config: ClamdStandinConfig | None = None, port: int = 0) -> ClamdStandinServer:
+    """
+    Starts the stand-in on a background thread (port 0 picks a free port); stop it with `server.shutdown()`.
+    """
+    server = ClamdStandinServer(('127.0.0.1', port), config or ClamdStandinConfig())
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Local stand-in for a clamd malware-scanning daemon.')
+    parser.add_argument('--port', type=int, default=3310)
+    parser.add_argument('--max-stream-mb', type=float, default=0, help='refuse longer streams; 0 for unlimited')
+    parser.add_argument('--mb-per-second', type=float, default=0, help='throttle reading; 0 for unthrottled')
+    args = parser.parse_args()
+    config = ClamdStandinConfig(max_stream_bytes=int(args.max_stream_mb * 2**20), mb_per_second=args.mb_per_second)
+    server = ClamdStandinServer(('127.0.0.1', args.port), config)
+    print(f'clamd stand-in listening on {server.address}')
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(server.state.snapshot())
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,213 @@
+"""
+Load-harness for ingest: drives Ingester.manage_ingest() and staff-form collection-validation against the local
+BDR-API stand-in (see loadtest/bdr_api_standin.py), and reports throughput, latency, retries and connection re-use.
+
+Runs against a throwaway test-database and a temp MEDIA_ROOT, using `config.settings_run_tests`, so no .env,
+real database, or real BDR-API is touched.
+
+Usage:
+    uv run python -m loadtest.ingest_load --submissions 500 --batch-size 100 --latency-ms 40 --unavailable-rate 0.05
+    uv run python -m loadtest.ingest_load --validations 200 --validation-workers 8 --latency-ms 40
+"""
+
+import argparse
+import hashlib
+import json
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from loadtest import bdr_api_standin, percentile, setup_django, throwaway_database
+
+
+def make_submissions(app_config, media_root: Path, count: int) -> list:
+    from bdr_uploader_hub_app.lib import staging_store
+    from bdr_uploader_hub_app.models import Submission
+
+    submissions: list = []
+    for index in range(count):
+        content: bytes = f'load-test content {index}\n'.encode() * 64
+        staged_path: Path = media_root / staging_store.shard_relative_path(f'{hashlib.sha256(content).hexdigest()}.pdf')
+        staged_path.parent.mkdir(parents=True, exist_ok=True)
+        staged_path.write_bytes(content)
+        submissions.append(
+            Submission(
+                app=app_config,
+                title=f'Load-test title {index}',
+                abstract='Load-test abstract',
+                student_eppn=f'student{index}@brown.edu',
+                student_email=f'student{index}@brown.edu',
+                visibility_options='public',
+                primary_file=str(staged_path),
+                staged_file_name=staged_path.name,
+                original_file_name=f'thesis_{index}.pdf',
+                checksum_type='md5',
+                checksum=hashlib.md5(content).hexdigest(),
+                status='ready_to_ingest',
+            )
+        )
+    return Submission.objects.bulk_create(submissions)
+
+
+def make_request(staff_user):
+    from django.contrib.messages.storage.fallback import FallbackStorage
+    from django.contrib.sessions.backends.db import SessionStore
+    from django.test import RequestFactory
+
+    request = RequestFactory().post('/admin/')
+    request.user = staff_user
+    request.session = SessionStore()
+    request._messages = FallbackStorage(request)
+    return request
+
+
+def run_ingest(submission_count: int, batch_size: int, media_root: Path) -> dict:
+    """
+    Ingests `submission_count` submissions, `batch_size` per manage_ingest() call, as the admin-action would.
+    """
+    from django.contrib.auth.models import User
+
+    from bdr_uploader_hub_app.lib import metrics
+    from bdr_uploader_hub_app.lib.ingester_handler import Ingester
+    from bdr_uploader_hub_app.models import AppConfig, Submission
+
+    app_config = AppConfig.objects.create(name='Load App', slug='load-app', temp_config_json={'collection_pid': 'test:coll'})
+    staff_user = User.objects.create_user(username='load-staff', email='load-staff@example.edu', is_staff=True)
+    submissions: list = make_submissions(app_config, media_root, submission_count)
+    retries_before: dict[str, float] = {
+        reason: metrics.BDR_POST_RETRIES.value(reason=reason) for reason in ('503', 'connect_error')
+    }
+    batch_seconds: list[float] = []
+    start: float = time.perf_counter()
+    for offset in range(0, len(submissions), batch_size):
+        batch_ids: list = [submission.id for submission in submissions[offset : offset + batch_size]]
+        batch_start: float = time.perf_counter()
+        Ingester().manage_ingest(make_request(staff_user), Submission.objects.filter(id__in=batch_ids))
+        batch_seconds.append(time.perf_counter() - batch_start)
+    elapsed: float = time.perf_counter() - start
+    statuses: dict[str, int] = {}
+    for status in Submission.objects.filter(app=app_config).values_list('status', flat=True):
+        statuses[status] = statuses.get(status, 0) + 1
+    return {
+        'submissions': submission_count,
+        'batches': len(batch_seconds),
+        'seconds': round(elapsed, 3),
+        'submissions_per_second': round(submission_count / elapsed, 1) if elapsed else 0,
+        'batch_seconds_p50': round(percentile(batch_seconds, 50), 3),
+        'batch_seconds_max': round(max(batch_seconds, default=0), 3),
+        'statuses': statuses,
+        'retries': {
+            reason: metrics.BDR_POST_RETRIES.value(reason=reason) - count for reason, count in retries_before.items()
+        },
+    }
+
+
+class _FormStandin:
+    """
+    Collects add_error() calls, so validate_staff_form() can be exercised without rendering a form.
+    """
+
+    def __init__(self):
+        self.errors: dict = {}
+
+    def add_error(self, field, error):
+        self.errors.setdefault(field, []).append(error)
+
+
+def run_validations(validation_count: int, workers: int, collection_title: str) -> dict:
+    """
+    Runs staff-form collection-validations concurrently, as simultaneous staff-members saving configs would.
+    """
+    from bdr_uploader_hub_app.forms.staff_form_validation import validate_staff_form
+
+    def validate_once(index: int) -> tuple[float, bool]:
+        cleaned_data: dict = {
+            'collection_pid': f'test:{index}',
+            'collection_title': collection_title,
+            'authorized_student_emails': 'student@brown.edu',
+            'license_options': ['CC BY'],
+            'visibility_options': ['public'],
+        }
+        form = _FormStandin()
+        start: float = time.perf_counter()
+        validate_staff_form(form, cleaned_data)
+        return (time.perf_counter() - start, 'collection_pid' not in form.errors)
+
+    start: float = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(workers, 1)) as executor:
+        results: list[tuple[float, bool]] = list(executor.map(validate_once, range(validation_count)))
+    elapsed: float = time.perf_counter() - start
+    latencies: list[float] = [latency for latency, _ in results]
+    return {
+        'validations': validation_count,
+        'workers': workers,
+        'seconds': round(elapsed, 3),
+        'validations_per_second': round(validation_count / elapsed, 1) if elapsed else 0,
+        'latency_ms_p50': round(percentile(latencies, 50) * 1000, 1),
+        'latency_ms_p95': round(percentile(latencies, 95) * 1000, 1),
+        'collection_ok': sum(1 for _, ok in results if ok),
+    }
+
+
+def run(
+    submissions: int = 100,
+    batch_size: int = 50,
+    validations: int = 0,
+    validation_workers: int = 4,
+    config: bdr_api_standin.StandinConfig | None = None,
+) -> dict:
+    """
+    Starts the stand-in, points the settings at it, runs the requested load, and returns the report.
+    Expects django to be set up.
+    """
+    from django.test.utils import override_settings
+
+    config = config or bdr_api_standin.StandinConfig()
+    server = bdr_api_standin.start_in_thread(config)
+    report: dict = {'standin': {key: value for key, value in vars(config).items() if key != 'missing_pids'}}
+    try:
+        with throwaway_database(), tempfile.TemporaryDirectory() as media_root:
+            with override_settings(
+                MEDIA_ROOT=media_root,
+                BDR_API_HANDOFF_DIR='',
+                BDR_PRIVATE_API_ROOT_URL=f'{server.base_url}/api/private/items/',
+                BDR_PUBLIC_API_COLLECTION_ROOT_URL=f'{server.base_url}/api/collections/',
+            ):
+                if submissions:
+                    report['ingest'] = run_ingest(submissions, batch_size, Path(media_root))
+                if validations:
+                    report['validation'] = run_validations(validations, validation_workers, config.collection_title)
+        report['standin_stats'] = server.stats.snapshot()
+    finally:
+        server.shutdown()
+        server.server_close()
+    return report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Ingest load-harness, against the local BDR-API stand-in.')
+    parser.add_argument('--submissions', type=int, default=100)
+    parser.add_argument('--batch-size', type=int, default=50, help='submissions per manage_ingest() call')
+    parser.add_argument('--validations', type=int, default=0, help='staff-form collection-validations to run')
+    parser.add_argument('--validation-workers', type=int, default=4)
+    parser.add_argument('--latency-ms', type=float, default=0)
+    parser.add_argument('--jitter-ms', type=float, default=0)
+    parser.add_argument('--error-rate', type=float, default=0, help='fraction of posts answered with a 500')
+    parser.add_argument('--unavailable-rate', type=float, default=0, help='fraction of posts answered with a 503')
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args()
+    setup_django()
+    config = bdr_api_standin.StandinConfig(
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate,
+        unavailable_rate=args.unavailable_rate,
+        seed=args.seed,
+    )
+    report: dict = run(args.submissions, args.batch_size, args.validations, args.validation_workers, config)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
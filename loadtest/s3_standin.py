@@ -0,0 +1,318 @@
+"""
+Local stand-in for an S3-compatible object-store (MinIO-style, path-style URLs), for integration and load testing
+of the `s3` staging-backend.
+
+- Checks each request's Signature V4 `Authorization` header (via lib/s3_client.sign_request()), and that the body
+  matches its signed `x-amz-content-sha256` -- answering 403 / 400 as S3 does.
+- `PUT`, `HEAD`, `GET`, `DELETE` `/<bucket>/<key>`: single objects; a `PUT` with `x-amz-copy-source` copies one.
+- `GET /<bucket>/?list-type=2`: ListObjectsV2, with `prefix`, `max-keys` and `continuation-token`.
+- `POST ?uploads`, `PUT ?partNumber=N&uploadId=X`, `POST ?uploadId=X`, `DELETE ?uploadId=X`: multipart uploads.
+- `GET /_stats/`: request counts per operation, and `max_concurrent_parts` -- above 1 means parts were sent in parallel.
+
+Objects, and their last-modified times (in `state.modified`, so tests can age them), are kept in memory.
+Speaks HTTP/1.1 with keep-alive, on a thread per connection. Standard-library only, apart from the signing-function.
+
+Usage:
+    uv run python -m loadtest.s3_standin --port 9000 --part-latency-ms 20
+then set `STAGING_BACKEND=s3`, `STAGING_S3_ENDPOINT_URL=http://127.0.0.1:9000`, `STAGING_S3_BUCKET=staging`,
+and the access-key / secret-key to the stand-in's (`standin` / `standin-secret`, by default).
+"""
+
+import argparse
+import datetime
+import email.utils
+import hashlib
+import json
+import threading
+import time
+import uuid
+from collections import Counter
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlsplit
+from xml.etree import ElementTree
+from xml.sax.saxutils import escape
+
+from bdr_uploader_hub_app.lib.s3_client import sign_request
+
+
+@dataclass
+class S3StandinConfig:
+    access_key: str = 'standin'
+    secret_key: str = 'standin-secret'
+    region: str = 'us-east-1'
+    bucket: str = 'staging'
+    part_latency_ms: float = 0  # per part-upload, so concurrency shows up in `max_concurrent_parts`
+
+
+class S3StandinState:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.objects: dict[str, bytes] = {}
+        self.modified: dict[str, float] = {}
+        self.uploads: dict[str, dict[int, bytes]] = {}
+        self.counts: Counter = Counter()
+        self.active_parts: int = 0
+
+    def incr(self, key: str, amount: int = 1) -> None:
+        with self.lock:
+            self.counts[key] += amount
+
+    def snapshot(self) -> dict[str, int]:
+        with self.lock:
+            return {**self.counts, 'objects': len(self.objects), 'open_uploads': len(self.uploads)}
+
+
+class S3StandinHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # keep-alive
+
+    def log_message(self, format, *args):  # quiet; stats are available at /_stats/
+        pass
+
+    def send(self, status_code: int, body: bytes = b'', headers: dict | None = None) -> None:
+        self.send_response(status_code)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if self.command != 'HEAD':
+            self.wfile.write(body)
+
+    def send_error_document(self, status_code: int, code: str) -> None:
+        self.server.state.incr(f'error_{code}')
+        self.send(status_code, f'<Error><Code>{code}</Code></Error>'.encode(), {'Content-Type': 'application/xml'})
+
+    def authorized_body(self) -> bytes | None:
+        """
+        Reads the body, and checks the signature and payload-hash; answers the error itself, and returns None, if bad.
+        """
+        body: bytes = self.rfile.read(int(self.headers.get('Content-Length') or 0))
+        config: S3StandinConfig = self.server.config
+        authorization: str = self.headers.get('Authorization', '')
+        try:
+            signed_names: list[str] = authorization.split('SignedHeaders=')[1].split(',')[0].split(';')
+        except IndexError:
+            self.send_error_document(403, 'AccessDenied')
+            return None
+        signed: dict[str, str] = {name: self.headers.get(name, '') for name in signed_names}
+        url: str = f'http://{self.headers.get("Host")}{self.path}'
+        expected: str = sign_request(self.command, url, signed, config.access_key, config.secret_key, config.region)
+        if authorization != expected:
+            self.send_error_document(403, 'SignatureDoesNotMatch')
+            return None
+        if hashlib.sha256(body).hexdigest() != self.headers.get('x-amz-content-sha256'):
+            self.send_error_document(400, 'XAmzContentSHA256Mismatch')
+            return None
+        return body
+
+    def parse(self) -> tuple[str | None, dict[str, str]]:
+        """
+        Returns the object-key (None for another bucket), and the query-params.
+        """
+        parts = urlsplit(self.path)
+        (bucket, _, key) = unquote(parts.path).lstrip('/').partition('/')
+        query: dict[str, str] = {name: values[0] for name, values in parse_qs(parts.query, keep_blank_values=True).items()}
+        return (key if bucket == self.server.config.bucket else None, query)
+
+    def do_GET(self):
+        if self.path.rstrip('/') == '/_stats':
+            body: bytes = json.dumps(self.server.state.snapshot()).encode()
+            self.send(200, body, {'Content-Type': 'application/json'})
+            return
+        self.handle_object()
+
+    def do_HEAD(self):
+        self.handle_object()
+
+    def do_PUT(self):
+        self.handle_object()
+
+    def do_POST(self):
+        self.handle_object()
+
+    def do_DELETE(self):
+        self.handle_object()
+
+    def handle_object(self) -> None:
+        body: bytes | None = self.authorized_body()
+        if body is None:
+            return
+        (key, query) = self.parse()
+        if key is None:
+            self.send_error_document(404, 'NoSuchBucket')
+            return
+        state: S3StandinState = self.server.state
+        if 'uploads' in query or 'uploadId' in query:
+            self.handle_multipart(key, query, body)
+            return
+        if self.command == 'GET' and 'list-type' in query:
+            self.handle_list(query)
+            return
+        if self.command == 'PUT' and self.headers.get('x-amz-copy-source'):
+            self.handle_copy(key)
+            return
+        state.incr(f'{self.command.lower()}_object')
+        with state.lock:
+            data: bytes | None = state.objects.get(key)
+            modified: float | None = state.modified.get(key)
+            if self.command == 'PUT':
+                state.objects[key] = body
+                state.modified[key] = time.time()
+            elif self.command == 'DELETE':
+                state.objects.pop(key, None)
+                state.modified.pop(key, None)
+        if self.command == 'PUT':
+            self.send(200, headers={'ETag': f'"{hashlib.md5(body).hexdigest()}"'})
+        elif self.command == 'DELETE':
+            self.send(204)
+        elif self.command in ('GET', 'HEAD') and data is not None:
+            last_modified: str = email.utils.formatdate(modified, usegmt=True)
+            if self.command == 'HEAD':  # Content-Length is the object's size, with no body
+                self.send_response(200)
+                self.send_header('Content-Length', str(len(data)))
+                self.send_header('Last-Modified', last_modified)
+                self.end_headers()
+            else:
+                self.send(200, data, {'Content-Type': 'application/octet-stream', 'Last-Modified': last_modified})
+        else:
+            self.send_error_document(404, 'NoSuchKey')
+
+    def handle_copy(self, key: str) -> None:
+        state: S3StandinState = self.server.state
+        (bucket, _, source_key) = unquote(self.headers['x-amz-copy-source']).lstrip('/').partition('/')
+        with state.lock:
+            data: bytes | None = state.objects.get(source_key) if bucket == self.server.config.bucket else None
+            if data is not None:
+                state.objects[key] = data
+                state.modified[key] = time.time()
+        if data is None:
+            self.send_error_document(404, 'NoSuchKey')
+            return
+        state.incr('copy_object')
+        self.send(200, f'<CopyObjectResult><ETag>"{hashlib.md5(data).hexdigest()}"</ETag></CopyObjectResult>'.encode())
+
+    def handle_list(self, query: dict[str, str]) -> None:
+        """
+        ListObjectsV2; the continuation-token is just the last key of the previous page.
+        """
+        state: S3StandinState = self.server.state
+        (prefix, max_keys, after) = (
+            query.get('prefix', ''),
+            int(query.get('max-keys', 1000)),
+            query.get('continuation-token', ''),
+        )
+        with state.lock:
+            keys: list[str] = sorted(key for key in state.objects if key.startswith(prefix) and key > after)
+            page: list[tuple[str, int, float]] = [
+                (key, len(state.objects[key]), state.modified[key]) for key in keys[:max_keys]
+            ]
+        truncated: bool = len(keys) > max_keys
+        contents: str = ''.join(
+            f'<Contents><Key>{escape(key)}</Key><Size>{size}</Size>'
+            f'<LastModified>{datetime.datetime.fromtimestamp(modified, datetime.UTC).isoformat()}</LastModified></Contents>'
+            for key, size, modified in page
+        )
+        token: str = f'<NextContinuationToken>{escape(page[-1][0])}</NextContinuationToken>' if truncated else ''
+        state.incr('list_objects')
+        self.send(
+            200,
+            f'<ListBucketResult><IsTruncated>{str(truncated).lower()}</IsTruncated>{contents}{token}</ListBucketResult>'.encode(),
+            {'Content-Type': 'application/xml'},
+        )
+
+    def handle_multipart(self, key: str, query: dict[str, str], body: bytes) -> None:
+        state: S3StandinState = self.server.state
+        upload_id: str = query.get('uploadId', '')
+        if self.command == 'POST' and 'uploads' in query:
+            upload_id = uuid.uuid4().hex
+            with state.lock:
+                state.uploads[upload_id] = {}
+            state.incr('create_multipart')
+            self.send(
+                200,
+                f'<InitiateMultipartUploadResult><UploadId>{upload_id}</UploadId></InitiateMultipartUploadResult>'.encode(),
+            )
+            return
+        if upload_id not in state.uploads:
+            self.send_error_document(404, 'NoSuchUpload')
+            return
+        if self.command == 'PUT':
+            with state.lock:
+                state.active_parts += 1
+                state.counts['max_concurrent_parts'] = max(state.counts['max_concurrent_parts'], state.active_parts)
+            try:
+                if self.server.config.part_latency_ms:
+                    time.sleep(self.server.config.part_latency_ms / 1000)
+                with state.lock:
+                    state.uploads[upload_id][int(query['partNumber'])] = body
+            finally:
+                with state.lock:
+                    state.active_parts -= 1
+            state.incr('put_part')
+            self.send(200, headers={'ETag': f'"{hashlib.md5(body).hexdigest()}"'})
+        elif self.command == 'POST':
+            numbers: list[int] = [int(element.text or 0) for element in ElementTree.fromstring(body).iter('PartNumber')]
+            with state.lock:
+                parts: dict[int, bytes] = state.uploads.pop(upload_id)
+                state.objects[key] = b''.join(parts[number] for number in numbers)
+                state.modified[key] = time.time()
+            state.incr('complete_multipart')
+            self.send(200, b'<CompleteMultipartUploadResult/>')
+        elif self.command == 'DELETE':
+            with state.lock:
+                state.uploads.pop(upload_id, None)
+            state.incr('abort_multipart')
+            self.send(204)
+
+
+class S3StandinServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address: tuple[str, int], config: S3StandinConfig):
+        super().__init__(address, S3StandinHandler)
+        self.config: S3StandinConfig = config
+        self.state = S3StandinState()
+
+    @property
+    def base_url(self) -> str:
+        (host, port) = self.server_address[:2]
+        return f'http://{host}:{port}'
+
+
+def start_in_thread(config: S3StandinConfig | None = None, port: int = 0) -> S3StandinServer:
+    """
+    Starts the stand-in on a background thread (port 0 picks a free port); stop it with `server.shutdown()`.
+    """
+    server = S3StandinServer(('127.0.0.1', port), config or S3StandinConfig())
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Local stand-in for an S3-compatible object-store.')
+    parser.add_argument('--port', type=int, default=9000)
+    parser.add_argument('--bucket', default='staging')
+    parser.add_argument('--access-key', default='standin')
+    parser.add_argument('--secret-key', default='standin-secret')
+    parser.add_argument('--region', default='us-east-1')
+    parser.add_argument('--part-latency-ms', type=float, default=0)
+    args = parser.parse_args()
+    config = S3StandinConfig(
+        access_key=args.access_key,
+        secret_key=args.secret_key,
+        region=args.region,
+        bucket=args.bucket,
+        part_latency_ms=args.part_latency_ms,
+    )
+    server = S3StandinServer(('127.0.0.1', args.port), config)
+    print(f's3 stand-in listening on {server.base_url}/{config.bucket}/; stats at {server.base_url}/_stats/')
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
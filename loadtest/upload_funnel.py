@@ -0,0 +1,301 @@
+"""
+Load-test for the student upload funnel: `upload` -> `upload_slug` (GET form, POST multipart upload)
+-> `student_confirm` (GET review, POST confirm), for concurrent synthetic students.
+
+Flow:
+- Synthetic students are built from `settings.TEST_SHIB_META_DCT`, with a unique eppn and email each,
+  and provisioned with shib_handler.provision_user(), as the shib-login would (timed as the `provision` stage).
+- Each student runs the funnel on its own django test-client, so the confirm steps use that student's session.
+- Upload sizes cycle through `--sizes`; content is unique per student, so the staging-store never dedups.
+- Reports, per stage: count, errors (by kind), p50/p95/p99 latency, throughput; and process RSS when the stage
+  started, and the peak sampled while it was in progress.
+
+Runs in-process (the views are called through django's WSGI handler, without a network hop), against a
+throwaway file-backed test-database and a temp MEDIA_ROOT, so no real database or staging volume is touched.
+RSS is this single process's, so it approximates one gunicorn worker handling `--concurrency` requests.
+
+Usage:
+    uv run python -m loadtest.upload_funnel --users 200 --concurrency 16 --sizes 1MB,25MB,100MB --seed 1
+"""
+
+import argparse
+import json
+import random
+import tempfile
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from loadtest import current_rss_mb, percentile, setup_django, throwaway_database
+
+STAGES: tuple[str, ...] = ('provision', 'landing', 'form', 'upload', 'review', 'confirm')
+APP_SLUG: str = 'load-test-app'
+SIZE_UNITS: dict[str, int] = {'KB': 1024, 'MB': 1024**2, 'GB': 1024**3}
+
+
+def parse_size(size: str) -> int:
+    """
+    Parses `512KB`, `25MB`, `1GB`, or a plain byte-count.
+    """
+    size = size.strip().upper()
+    for unit, multiplier in SIZE_UNITS.items():
+        if size.endswith(unit):
+            return int(float(size[: -len(unit)]) * multiplier)
+    return int(size)
+
+
+@dataclass
+class StageStats:
+    latencies: list[float] = field(default_factory=list)
+    errors: int = 0
+    error_kinds: Counter = field(default_factory=Counter)
+    started: float = 0.0
+    finished: float = 0.0
+    rss_before_mb: float = 0.0
+    rss_peak_mb: float = 0.0
+
+
+class StageRecorder:
+    """
+    Records stage-timings from the worker-threads, and samples RSS on a background thread,
+    attributing each sample to every stage that's in progress.
+    """
+
+    def __init__(self, stats: dict[str, StageStats], interval: float = 0.05):
+        self.stats = stats
+        self.interval = interval
+        self.active: dict[str, int] = {}
+        self.lock = threading.Lock()
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self.sample, daemon=True)
+
+    def enter(self, stage: str) -> None:
+        with self.lock:
+            if not self.active.get(stage):
+                stage_stats: StageStats = self.stats[stage]
+                if not stage_stats.started:
+                    stage_stats.started = time.perf_counter()
+                    stage_stats.rss_before_mb = current_rss_mb()
+            self.active[stage] = self.active.get(stage, 0) + 1
+
+    def exit(self, stage: str, latency: float, error_kind: str) -> None:
+        with self.lock:
+            self.active[stage] -= 1
+            stage_stats: StageStats = self.stats[stage]
+            stage_stats.finished = time.perf_counter()
+            stage_stats.latencies.append(latency)
+            if error_kind:
+                stage_stats.errors += 1
+                stage_stats.error_kinds[error_kind] += 1
+
+    def sample(self) -> None:
+        while not self.stopped.wait(self.interval):
+            rss: float = current_rss_mb()
+            with self.lock:
+                for stage, count in self.active.items():
+                    if count:
+                        self.stats[stage].rss_peak_mb = max(self.stats[stage].rss_peak_mb, rss)
+
+
+def make_shib_meta(index: int) -> dict:
+    """
+    Returns TEST_SHIB_META_DCT, made unique for synthetic student `index`.
+    """
+    from django.conf import settings
+
+    base: dict = dict(getattr(settings, 'TEST_SHIB_META_DCT', {}) or {})
+    (_, _, domain) = base.get('Shibboleth-eppn', 'student@brown.edu').partition('@')
+    base.update(
+        {
+            'Shibboleth-eppn': f'loadstudent{index}@{domain}',
+            'Shibboleth-mail': f'loadstudent{index}@{domain}',
+            'Shibboleth-givenName': f'Load{index}',
+            'Shibboleth-sn': 'Student',
+            'Shibboleth-isMemberOf': base.get('Shibboleth-isMemberOf') or 'load:test:students',
+        }
+    )
+    return base
+
+
+def make_app_config():
+    """
+    Creates the upload-app the synthetic students are authorized for, with the first configured license and
+    visibility options (the test-settings have none).
+    """
+    from django.conf import settings
+
+    from bdr_uploader_hub_app.models import AppConfig
+
+    license_keys: list[str] = [key for key, _ in settings.ALL_LICENSE_OPTIONS][:1]
+    visibility_keys: list[str] = [key for key, _ in settings.ALL_VISIBILITY_OPTIONS][:1]
+    return AppConfig.objects.create(
+        name='Load Test App',
+        slug=APP_SLUG,
+        temp_config_json={
+            'collection_pid': 'test:coll',
+            'authorized_student_groups': make_shib_meta(0)['Shibboleth-isMemberOf'],
+            'license_options': license_keys,
+            'license_default': license_keys[0] if license_keys else '',
+            'visibility_options': visibility_keys,
+            'visibility_default': visibility_keys[0] if visibility_keys else '',
+        },
+    )
+
+
+def write_upload(directory: Path, index: int, size: int, rng: random.Random) -> Path:
+    """
+    Writes a unique upload-file of `size` bytes: a per-student header, then a seeded random block, repeated.
+    """
+    path: Path = directory / f'upload_{index}.pdf'
+    block: bytes = rng.randbytes(min(size, 1024 * 1024)) if size else b''
+    with open(path, 'wb') as f:
+        header: bytes = f'%PDF-load-test student {index}\n'.encode()[:size]
+        f.write(header)
+        remaining: int = size - len(header)
+        while remaining > 0:
+            f.write(block[:remaining])
+            remaining -= min(remaining, len(block))
+    return path
+
+
+def run_student(index: int, upload_path: Path, recorder: StageRecorder) -> None:
+    """
+    Runs one synthetic student through the funnel; a stage's error ends that student's run.
+    """
+    from django.db import connection
+    from django.test import Client
+    from django.urls import reverse
+
+    from bdr_uploader_hub_app.lib import shib_handler
+
+    client = Client()
+    upload_url: str = reverse('student_upload_slug_url', kwargs={'slug': APP_SLUG})
+    confirm_url: str = reverse('student_confirm_url', kwargs={'slug': APP_SLUG})
+
+    def timed(stage: str, func, ok) -> bool:
+        recorder.enter(stage)
+        start: float = time.perf_counter()
+        error_kind: str = ''
+        try:
+            result = func()
+            if not ok(result):
+                error_kind = f'status_{getattr(result, "status_code", None)}'
+        except Exception as e:
+            error_kind = type(e).__name__
+        recorder.exit(stage, time.perf_counter() - start, error_kind)
+        return not error_kind
+
+    def provision():
+        user = shib_handler.provision_user(make_shib_meta(index))
+        if user:
+            client.force_login(user)
+        return user
+
+    def upload():
+        with open(upload_path, 'rb') as f:
+            data: dict = {
+                'title': f'Load-test title {index}',
+                'abstract': 'Load-test abstract',
+                'main_file': f,
+                'license_options': '',
+                'visibility_options': '',
+            }
+            return client.post(upload_url, data)
+
+    try:
+        steps = (
+            ('provision', provision, lambda user: user is not None),
+            ('landing', lambda: client.get(reverse('student_upload_url')), lambda resp: resp.status_code == 200),
+            ('form', lambda: client.get(upload_url), lambda resp: resp.status_code == 200),
+            ('upload', upload, lambda resp: resp.status_code == 302 and resp.url == confirm_url),
+            ('review', lambda: client.get(confirm_url), lambda resp: resp.status_code == 200),
+            ('confirm', lambda: client.post(confirm_url, {'confirm': 'confirm'}), lambda resp: resp.status_code == 302),
+        )
+        for stage, func, ok in steps:
+            if not timed(stage, func, ok):
+                break
+    finally:
+        connection.close()  # each worker-thread has its own db-connection
+
+
+def summarize(stats: dict[str, StageStats]) -> dict:
+    summary: dict = {}
+    for stage in STAGES:
+        stage_stats: StageStats = stats[stage]
+        latencies: list[float] = stage_stats.latencies
+        elapsed: float = stage_stats.finished - stage_stats.started
+        summary[stage] = {
+            'count': len(latencies),
+            'errors': stage_stats.errors,
+            'error_kinds': dict(stage_stats.error_kinds),
+            'p50_ms': round(percentile(latencies, 50) * 1000, 1),
+            'p95_ms': round(percentile(latencies, 95) * 1000, 1),
+            'p99_ms': round(percentile(latencies, 99) * 1000, 1),
+            'per_second': round(len(latencies) / elapsed, 1) if elapsed > 0 else 0,
+            'rss_before_mb': round(stage_stats.rss_before_mb, 1),
+            'rss_peak_mb': round(max(stage_stats.rss_peak_mb, stage_stats.rss_before_mb), 1),
+        }
+    return summary
+
+
+def run(users: int = 20, concurrency: int = 4, sizes: tuple[int, ...] = (1024 * 1024,), seed: int = 0) -> dict:
+    """
+    Runs the funnel for `users` synthetic students, `concurrency` at a time; returns the report.
+    Expects django to be set up.
+    """
+    from django.test.utils import override_settings
+
+    from bdr_uploader_hub_app.models import Submission
+
+    rng = random.Random(seed)
+    stats: dict[str, StageStats] = {stage: StageStats() for stage in STAGES}
+    with tempfile.TemporaryDirectory() as work_dir:
+        work_path = Path(work_dir)
+        (work_path / 'media').mkdir()
+        (work_path / 'uploads').mkdir()
+        upload_paths: list[Path] = [
+            write_upload(work_path / 'uploads', index, sizes[index % len(sizes)], rng) for index in range(users)
+        ]
+        with (
+            throwaway_database(str(work_path / 'load_test.db')),
+            override_settings(MEDIA_ROOT=str(work_path / 'media'), ALLOWED_HOSTS=['*']),
+        ):
+            make_app_config()
+            recorder = StageRecorder(stats)
+            recorder.thread.start()
+            start: float = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=max(concurrency, 1)) as executor:
+                for index in range(users):
+                    executor.submit(run_student, index, upload_paths[index], recorder)
+            elapsed: float = time.perf_counter() - start
+            recorder.stopped.set()
+            submissions_created: int = Submission.objects.count()
+    return {
+        'users': users,
+        'concurrency': concurrency,
+        'sizes_bytes': list(sizes),
+        'seed': seed,
+        'seconds': round(elapsed, 3),
+        'funnels_per_second': round(submissions_created / elapsed, 2) if elapsed else 0,
+        'submissions_created': submissions_created,
+        'stages': summarize(stats),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Load-test the student upload funnel.')
+    parser.add_argument('--users', type=int, default=20, help='synthetic students')
+    parser.add_argument('--concurrency', type=int, default=4, help='students in the funnel at once')
+    parser.add_argument('--sizes', default='1MB', help='comma-separated upload sizes, cycled, eg `512KB,25MB`')
+    parser.add_argument('--seed', type=int, default=0, help='seeds the upload content, for reproducible runs')
+    args = parser.parse_args()
+    setup_django()
+    sizes: tuple[int, ...] = tuple(parse_size(size) for size in args.sizes.split(','))
+    print(json.dumps(run(args.users, args.concurrency, sizes, args.seed), indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,191 @@
+"""
+Runs the micro-benchmarks in `benchmarks/`, and compares them to the stored baseline.
+
+Usage:
+    uv run ./run_benchmarks.py                      # compare; exits 1 if any benchmark regressed past its threshold
+    uv run ./run_benchmarks.py --update-baseline    # re-record the baseline (after an intended change, or on new hardware)
+    uv run ./run_benchmarks.py --only checksum      # run only `benchmarks/bench_checksum.py`
+
+Notes:
+- Timings are machine-specific; record the baseline on the machine that runs the comparison.
+- Each run also times a fixed pure-python calibration workload, several times before and after the benchmarks,
+  and takes the median. When that differs from the baseline's by more than CALIBRATION_TOLERANCE, results are
+  compared relative to it, so a machine that's uniformly slower right now (shared cpu, frequency-scaling)
+  doesn't read as a regression; smaller differences are calibration-noise, and results are compared as-is.
+- A pure-python workload doesn't track C-bound work (eg hashing); modules that set `CALIBRATED = False` are
+  always compared as-is.
+- A benchmark regresses when it's slower than `baseline * (1 + threshold)`. The default threshold is in
+  DEFAULT_THRESHOLD; per-benchmark thresholds, for noisier benchmarks, live in the baseline file's `thresholds`,
+  and are kept when the baseline is re-recorded.
+- Regressed benchmarks are re-run once, and fail only if the better of the two runs still regressed.
+- Benchmarks missing from the baseline are reported, but never fail the run.
+"""
+
+import os
+
+## set settings as early as possible --------------------------------
+os.environ['DJANGO_SETTINGS_MODULE'] = 'config.settings_run_tests'
+
+## back to normal imports -------------------------------------------
+import argparse  # noqa: E402 (ignoring import order linter warning due to need to set DJANGO_SETTINGS_MODULE early)
+import datetime  # noqa: E402
+import importlib  # noqa: E402
+import json  # noqa: E402
+import pkgutil  # noqa: E402
+import platform  # noqa: E402
+import statistics  # noqa: E402
+import sys  # noqa: E402
+from pathlib import Path  # noqa: E402
+
+import benchmarks  # noqa: E402
+
+BASELINE_PATH: Path = Path(__file__).parent / 'benchmarks' / 'baseline.json'
+DEFAULT_THRESHOLD: float = 0.25  # ie, fail at 25% slower than baseline
+CALIBRATION_SAMPLES: int = 5  # per calibration_samples() call; the median of before-and-after samples is used
+CALIBRATION_TOLERANCE: float = 0.15  # calibration changes within this are treated as noise, not a machine change
+
+
+def discover(only: list[str]) -> list[str]:
+    """
+    Returns the `benchmarks.bench_*` module-names, optionally filtered by `--only`.
+    """
+    names: list[str] = sorted(
+        module.name for module in pkgutil.iter_modules(benchmarks.__path__) if module.name.startswith('bench_')
+    )
+    if only:
+        names = [name for name in names if name.removeprefix('bench_') in only]
+    return [f'benchmarks.{name}' for name in names]
+
+
+def calibration_samples() -> list[float]:
+    """
+    Returns CALIBRATION_SAMPLES seconds-per-call timings of a fixed pure-python workload, so results can be compared
+    relative to this machine's speed right now -- which, on shared or frequency-scaling hardware, drifts between runs.
+    """
+
+    def workload() -> int:
+        total: int = 0
+        for index in range(20_000):
+            total += index * index % 7
+        return total
+
+    return [benchmarks.time_per_call(workload, number=20, repeat=3) for _ in range(CALIBRATION_SAMPLES)]
+
+
+def run_all(module_names: list[str]) -> tuple[dict[str, float], dict[str, str]]:
+    """
+    Returns (benchmark-name -> seconds, benchmark-name -> module-name).
+    """
+    results: dict[str, float] = {}
+    modules: dict[str, str] = {}
+    for module_name in module_names:
+        print(f'running {module_name}...', file=sys.stderr)
+        module_results: dict[str, float] = importlib.import_module(module_name).run()
+        results.update(module_results)
+        modules.update({name: module_name for name in module_results})
+    return (results, modules)
+
+
+def run_calibrated(module_names: list[str]) -> tuple[dict[str, float], dict[str, str], float]:
+    """
+    Runs the modules between two sets of calibration samples; returns results, modules, and the median calibration.
+    """
+    samples: list[float] = calibration_samples()
+    (results, modules) = run_all(module_names)
+    return (results, modules, statistics.median(samples + calibration_samples()))
+
+
+def uncalibrated_names(modules: dict[str, str]) -> set[str]:
+    """
+    Returns the names of benchmarks whose module sets `CALIBRATED = False`.
+    """
+    return {name for name, module_name in modules.items() if not getattr(sys.modules[module_name], 'CALIBRATED', True)}
+
+
+def get_speed_ratio(calibration: float, baseline: dict) -> float:
+    """
+    Returns this run's calibration relative to the baseline's; or 1.0 if within CALIBRATION_TOLERANCE.
+    """
+    ratio: float = calibration / baseline.get('calibration_seconds', calibration)
+    return ratio if abs(ratio - 1) > CALIBRATION_TOLERANCE else 1.0
+
+
+def load_baseline() -> dict:
+    if not BASELINE_PATH.exists():
+        return {'results': {}, 'thresholds': {}}
+    return json.loads(BASELINE_PATH.read_text())
+
+
+def compare(results: dict[str, float], calibration: float, baseline: dict, uncalibrated: set[str]) -> list[str]:
+    """
+    Prints a results-table; returns the names of regressed benchmarks.
+    `change` is calibration-adjusted (except for `uncalibrated` benchmarks): the benchmark's change beyond the
+    machine's change in speed.
+    """
+    regressed: list[str] = []
+    raw_ratio: float = calibration / baseline.get('calibration_seconds', calibration)
+    machine_ratio: float = get_speed_ratio(calibration, baseline)
+    adjustment: str = 'adjusting for it' if machine_ratio != 1.0 else 'within noise; not adjusting'
+    print(f"calibration: {calibration * 1e6:.1f} µs; {raw_ratio:.2f}x the baseline run's time; {adjustment}")
+    print(f'{"benchmark":<40} {"µs/op":>12} {"baseline":>12} {"change":>9}  status')
+    for name, seconds in results.items():
+        baseline_seconds: float | None = baseline['results'].get(name)
+        threshold: float = baseline.get('thresholds', {}).get(name, DEFAULT_THRESHOLD)
+        if baseline_seconds is None:
+            print(f'{name:<40} {seconds * 1e6:>12.1f} {"-":>12} {"-":>9}  new')
+            continue
+        speed_ratio: float = 1.0 if name in uncalibrated else machine_ratio
+        change: float = seconds / (baseline_seconds * speed_ratio) - 1
+        status: str = 'ok'
+        if change > threshold:
+            status = f'REGRESSED (threshold +{threshold:.0%})'
+            regressed.append(name)
+        print(f'{name:<40} {seconds * 1e6:>12.1f} {baseline_seconds * 1e6:>12.1f} {change:>+9.1%}  {status}')
+    return regressed
+
+
+def save_baseline(results: dict[str, float], calibration: float, baseline: dict, uncalibrated: set[str]) -> None:
+    """
+    Writes the results (merged over the old, for `--only` runs) and calibration, keeping the thresholds.
+    """
+    if baseline.get('calibration_seconds') and set(baseline['results']) - set(results):
+        ## rescale kept results to this run's calibration, so all results share one
+        scale: float = get_speed_ratio(calibration, baseline)
+        baseline['results'] = {
+            name: seconds if name in uncalibrated else seconds * scale for name, seconds in baseline['results'].items()
+        }
+    recorded: dict = {
+        'recorded_at': datetime.datetime.now().isoformat(timespec='seconds'),
+        'machine': f'{platform.machine()}; {platform.system()} {platform.release()}; python {platform.python_version()}',
+        'calibration_seconds': round(calibration, 9),
+        'results': {name: round(seconds, 9) for name, seconds in (baseline['results'] | results).items()},
+        'thresholds': baseline.get('thresholds', {}),
+    }
+    BASELINE_PATH.write_text(json.dumps(recorded, indent=2, sort_keys=True) + '\n')
+    print(f'baseline written to ``{BASELINE_PATH}``')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Runs the micro-benchmarks, and compares them to the baseline.')
+    parser.add_argument('--update-baseline', action='store_true', help='record these results as the new baseline')
+    parser.add_argument('--only', action='append', default=[], help='benchmark-module suffix, eg `checksum`; repeatable')
+    args = parser.parse_args()
+    benchmarks.setup_django()
+    (results, modules, calibration) = run_calibrated(discover(args.only))
+    uncalibrated: set[str] = uncalibrated_names(modules)
+    baseline: dict = load_baseline()
+    regressed: list[str] = compare(results, calibration, baseline, uncalibrated)
+    if regressed and not args.update_baseline:
+        ## confirm: re-run the regressed benchmarks' modules, and keep each benchmark's better run
+        print('\nre-running regressed benchmarks, to rule out noise...')
+        (rerun_results, _, rerun_calibration) = run_calibrated(sorted({modules[name] for name in regressed}))
+        for name in regressed:
+            scale: float = 1.0 if name in uncalibrated else calibration / rerun_calibration
+            results[name] = min(results[name], rerun_results[name] * scale)
+        regressed = compare({name: results[name] for name in regressed}, calibration, baseline, uncalibrated)
+    if args.update_baseline:
+        save_baseline(results, calibration, baseline, uncalibrated)
+        sys.exit(0)
+    if regressed:
+        print(f'\n{len(regressed)} benchmark(s) regressed: {", ".join(regressed)}')
+    sys.exit(1 if regressed else 0)